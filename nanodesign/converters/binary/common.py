@@ -0,0 +1,62 @@
+# Copyright 2016 Autodesk Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+Binary structure file common definitions.
+
+A binary structure file stores a DnaStructure as a set of columnar NumPy arrays so that it can be
+read back without reprocessing the design it was created from. The file layout is
+
+    magic (8 bytes)  header size (uint64)  header (JSON)  padding  array data
+
+The JSON header stores the structure scalars (name, lattice type, DNA parameters, etc.) and, for each
+array, its dtype, shape and byte offset from the start of the array data. Array data is aligned to
+ARRAY_ALIGNMENT bytes so that arrays can be memory-mapped directly from the file.
+
+Variable-length lists (e.g. the bases of each strand) are stored as a single concatenated array of
+IDs together with an offsets array, so that list i is ids[offsets[i]:offsets[i+1]].
+
+Base geometry is stored in three pools of coordinates, reference frames and nucleotide coordinates.
+Helices store the range of pool entries holding their arrays; bases store the index of the pool entry
+holding their geometry. The geometry of a base is the entry of the helix array element it references, given
+by the base helix axis node and its index in the helix base lists, so paired bases share their axis entries.
+Only base geometry that is not stored in a helix is added to the pools for the base.
+"""
+import struct
+
+# The first bytes of a binary structure file.
+MAGIC = b"NDSTRUCT"
+
+# The binary structure file format version.
+VERSION = 2
+
+# The header size is stored as a little-endian 64-bit unsigned integer.
+HEADER_SIZE_FORMAT = "<Q"
+HEADER_SIZE_BYTES = struct.calcsize(HEADER_SIZE_FORMAT)
+
+# The alignment in bytes of each array in the file.
+ARRAY_ALIGNMENT = 64
+
+
+def get_data_offset(header_size):
+    """ Get the offset in a file of the start of the array data.
+
+        Arguments:
+            header_size (int): The size in bytes of the JSON header.
+    """
+    return align_offset(len(MAGIC) + HEADER_SIZE_BYTES + header_size)
+
+
+def align_offset(offset):
+    """ Round an offset up to the next multiple of ARRAY_ALIGNMENT. """
+    return -(-offset // ARRAY_ALIGNMENT) * ARRAY_ALIGNMENT
@@ -0,0 +1,219 @@
+# Copyright 2016 Autodesk Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+This module is used to read binary structure files.
+
+The file is memory-mapped copy-on-write and its arrays are views into the mapping, so reading a file
+does not copy the array data and modifying the geometry of the structure (e.g. applying a helix
+transformation) does not change the file. The structure base table is created from the base arrays
+rather than derived again from the DnaBase objects.
+"""
+import json
+import logging
+import struct
+
+import numpy as np
+
+from ...data.base import DnaBase
+from ...data.base_table import COLUMNS, NONE_ID, BaseTable
+from ...data.domain import Domain
+from ...data.dna_structure import DnaStructure
+from ...data.dna_structure_helix import DnaStructureHelix
+from ...data.parameters import DnaParameters, DnaPolarity
+from ...data.strand import DnaStrand
+from .common import HEADER_SIZE_BYTES, HEADER_SIZE_FORMAT, MAGIC, VERSION, get_data_offset
+
+
+class BinaryStructureReader(object):
+    """ The BinaryStructureReader class reads a DnaStructure from a binary structure file.
+
+        Attributes:
+            arrays (Dict[NumPy ndarray]): The arrays read from the file, views into the memory-mapped file.
+            header (Dict): The file JSON header.
+    """
+
+    def __init__(self):
+        self.arrays = None
+        self.header = None
+        self._logger = logging.getLogger(__name__)
+
+    def read(self, file_name):
+        """ Read a binary structure file.
+
+            Arguments:
+                file_name (string): The name of the binary structure file to read.
+
+            Returns the DnaStructure object read from the file.
+        """
+        self._logger.info("Reading binary structure file %s " % file_name)
+        self.map_arrays(file_name)
+        header = self.header
+        arrays = self.arrays
+
+        dna_parameters = DnaParameters()
+        for name, value in header['dna_parameters'].items():
+            setattr(dna_parameters, name, value)
+
+        bases = self._create_bases()
+        helices = self._create_helices(bases)
+        dna_structure = DnaStructure(header['name'], bases, helices, dna_parameters)
+        dna_structure.set_lattice_type(header['lattice_type'])
+        dna_structure.strands = self._create_strands(dna_structure, bases)
+        self._logger.info("Number of bases %d " % len(bases))
+        self._logger.info("Number of strands %d " % len(dna_structure.strands))
+
+        if header['has_staple_ends']:
+            dna_structure.staple_ends = {(h, p): strand_id for h, p, strand_id in arrays['staple_ends'].tolist()}
+
+        # Set the possible crossovers using the helix IDs stored for each crossover.
+        helices_map = dna_structure.structure_helices_map
+        for name in ('staple', 'scaffold'):
+            crossover_helices = arrays['%s_crossover_helices' % name].tolist()
+            crossover_coords = arrays['%s_crossover_coords' % name]
+            for (helix_id, to_helix_id, index), coord in zip(crossover_helices, crossover_coords):
+                getattr(helices_map[helix_id], 'possible_%s_crossovers' % name).append(
+                    (helices_map[to_helix_id], index, coord))
+
+        if header['has_domains']:
+            self._create_domains(dna_structure, bases)
+        return dna_structure
+
+    def map_arrays(self, file_name):
+        """ Memory-map the arrays stored in a binary structure file.
+
+            Arguments:
+                file_name (string): The name of the binary structure file to read.
+
+            The file header is stored in self.header and the arrays in self.arrays.
+        """
+        with open(file_name, 'rb') as infile:
+            magic = infile.read(len(MAGIC))
+            if magic != MAGIC:
+                raise ValueError("%s is not a binary structure file." % file_name)
+            header_size, = struct.unpack(HEADER_SIZE_FORMAT, infile.read(HEADER_SIZE_BYTES))
+            header = json.loads(infile.read(header_size).decode('utf-8'))
+        if header['version'] != VERSION:
+            raise ValueError("Binary structure file %s has unsupported version %s." % (file_name, header['version']))
+
+        data_offset = get_data_offset(header_size)
+        file_map = np.memmap(file_name, dtype=np.uint8, mode='c')
+        arrays = {}
+        for name, info in header['arrays'].items():
+            dtype = np.dtype(info['dtype'])
+            shape = tuple(info['shape'])
+            start = data_offset + info['offset']
+            end = start + dtype.itemsize * int(np.prod(shape))
+            arrays[name] = file_map[start:end].view(dtype=dtype, type=np.ndarray).reshape(shape)
+        self.header = header
+        self.arrays = arrays
+
+    def _create_bases(self):
+        """ Create the list of DnaBase objects.
+
+            The bases are views of the rows of a BaseTable whose columns are the base arrays memory-mapped from
+            the file. The base geometry references the geometry pools.
+        """
+        arrays = self.arrays
+        table = BaseTable.from_columns({name: arrays['base_' + name] for name, _, _ in COLUMNS})
+        bases = [DnaBase.from_table_row(table, i) for i in range(len(table))]
+
+        def _pool_entries(pool, array):
+            return [None if index == NONE_ID else pool[index] for index in array.tolist()]
+
+        geometry = zip(bases, _pool_entries(arrays['coords_pool'], arrays['base_coords_index']),
+                       _pool_entries(arrays['frames_pool'], arrays['base_frame_index']),
+                       _pool_entries(arrays['nt_coords_pool'], arrays['base_nt_coords_index']))
+        for base, coordinates, ref_frame, nt_coords in geometry:
+            base.coordinates = coordinates
+            base.ref_frame = ref_frame
+            base.nt_coords = nt_coords
+        return bases
+
+    def _create_helices(self, bases):
+        """ Create the list of DnaStructureHelix objects.
+
+            The helix axis coordinates and frames, and nucleotide coordinates, are views into the geometry pools.
+        """
+        arrays = self.arrays
+        coords_pool = arrays['coords_pool']
+        frames_pool = arrays['frames_pool']
+        nt_coords_pool = arrays['nt_coords_pool']
+        scaffold_bases = _get_lists(arrays, 'helix_scaffold_bases')
+        staple_bases = _get_lists(arrays, 'helix_staple_bases')
+        helices = []
+        for i, helix_id in enumerate(arrays['helix_id'].tolist()):
+            start, size = arrays['helix_axis_range'][i].tolist()
+            scaffold_start, scaffold_size = arrays['helix_scaffold_range'][i].tolist()
+            staple_start, staple_size = arrays['helix_staple_range'][i].tolist()
+            polarity = DnaPolarity.FIVE_PRIME if arrays['helix_five_prime'][i] else DnaPolarity.THREE_PRIME
+            helix = DnaStructureHelix(
+                int(arrays['helix_load_order'][i]),
+                helix_id,
+                polarity,
+                coords_pool[start:start + size],
+                frames_pool[start:start + size].transpose(1, 2, 0),
+                nt_coords_pool[scaffold_start:scaffold_start + scaffold_size],
+                nt_coords_pool[staple_start:staple_start + staple_size],
+                [bases[id] for id in scaffold_bases[i]],
+                [bases[id] for id in staple_bases[i]],
+                end_coordinates=arrays['helix_end_coords'][i],
+                end_frames=arrays['helix_end_frames'][i]
+            )
+            (helix.lattice_row, helix.lattice_col, helix.lattice_num,
+             helix.lattice_max_vhelix_size) = arrays['helix_lattice'][i].tolist()
+            helices.append(helix)
+        return helices
+
+    def _create_strands(self, dna_structure, bases):
+        """ Create the list of DnaStrand objects. """
+        arrays = self.arrays
+        tours = _get_lists(arrays, 'strand_tour')
+        insert_seqs = _get_lists(arrays, 'strand_insert_seq')
+        strands = []
+        for i, strand_id in enumerate(arrays['strand_id'].tolist()):
+            tour = [bases[id] for id in tours[i]]
+            strand = DnaStrand(strand_id, dna_structure, bool(arrays['strand_is_scaffold'][i]),
+                               bool(arrays['strand_is_circular'][i]), tour)
+            strand.color = arrays['strand_color'][i].tolist()
+            if arrays['strand_has_icolor'][i]:
+                strand.icolor = int(arrays['strand_icolor'][i])
+            strand.insert_seq = [chr(letter) for letter in insert_seqs[i]]
+            strands.append(strand)
+        return strands
+
+    def _create_domains(self, dna_structure, bases):
+        """ Create the list of Domain objects, adding them to the structure and their strands. """
+        arrays = self.arrays
+        helices_map = dna_structure.structure_helices_map
+        strands_map = {strand.id: strand for strand in dna_structure.strands}
+        domain_bases = _get_lists(arrays, 'domain_bases')
+        connected = arrays['domain_connected'].tolist()
+        domain_list = []
+        for i, (domain_id, helix_id, strand_id) in enumerate(zip(arrays['domain_id'].tolist(),
+                                                                 arrays['domain_helix'].tolist(),
+                                                                 arrays['domain_strand'].tolist())):
+            strand = strands_map[strand_id]
+            domain = Domain(domain_id, helices_map[helix_id], strand, [bases[id] for id in domain_bases[i]])
+            domain.connected_strand, domain.connected_domain = connected[i]
+            strand.domain_list.append(domain)
+            domain_list.append(domain)
+        dna_structure.domain_list = domain_list
+
+
+def _get_lists(arrays, name):
+    """ Get a list of variable-length lists stored as a concatenated array and an offsets array. """
+    values = arrays[name].tolist()
+    offsets = arrays[name + '_offsets'].tolist()
+    return [values[start:end] for start, end in zip(offsets[:-1], offsets[1:])]
+
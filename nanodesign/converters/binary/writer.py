@@ -0,0 +1,248 @@
+# Copyright 2016 Autodesk Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+This module is used to write binary structure files.
+
+The file layout is described in the common module.
+"""
+import json
+import logging
+import struct
+
+import numpy as np
+
+from ...data.base_table import NONE_ID
+from ...data.parameters import DnaPolarity
+from .common import HEADER_SIZE_FORMAT, MAGIC, VERSION, align_offset, get_data_offset
+
+
+class BinaryStructureWriter(object):
+    """ The BinaryStructureWriter class writes out a DnaStructure as a binary structure file.
+
+        Attributes:
+            dna_structure (DnaStructure): The DNA structure to write.
+            modify (bool): If true then the DNA structure was created with deleted/inserted bases.
+    """
+
+    def __init__(self, dna_structure, modify=False):
+        self.dna_structure = dna_structure
+        self.modify = modify
+        self._logger = logging.getLogger(__name__)
+
+    def write(self, file_name):
+        """ Write a binary structure file.
+
+            Arguments:
+                file_name (string): The name of the binary structure file to write.
+        """
+        self._logger.info("Writing binary structure file %s " % file_name)
+        arrays = self.create_arrays()
+
+        # Set the location of each array relative to the start of the array data.
+        array_info = {}
+        offset = 0
+        for name, array in arrays.items():
+            offset = align_offset(offset)
+            array_info[name] = {'dtype': array.dtype.str, 'shape': list(array.shape), 'offset': offset}
+            offset += array.nbytes
+
+        dna_structure = self.dna_structure
+        header = {
+            'version': VERSION,
+            'name': dna_structure.name,
+            'lattice_type': dna_structure.lattice_type,
+            'modify': self.modify,
+            'dna_parameters': vars(dna_structure.dna_parameters),
+            'has_domains': len(dna_structure.domain_list) != 0,
+            'has_staple_ends': hasattr(dna_structure, 'staple_ends'),
+            'arrays': array_info
+        }
+        header_bytes = json.dumps(header).encode('utf-8')
+        data_offset = get_data_offset(len(header_bytes))
+
+        with open(file_name, 'wb') as outfile:
+            outfile.write(MAGIC)
+            outfile.write(struct.pack(HEADER_SIZE_FORMAT, len(header_bytes)))
+            outfile.write(header_bytes)
+            for name, array in arrays.items():
+                outfile.write(b'\0' * (data_offset + array_info[name]['offset'] - outfile.tell()))
+                outfile.write(np.ascontiguousarray(array).data)
+
+        self._logger.info("Number of arrays written %d " % len(arrays))
+        self._logger.info("Number of bytes written %d " % (data_offset + offset))
+
+    def create_arrays(self):
+        """ Create the arrays storing the DNA structure.
+
+            Returns a dict mapping array names to NumPy arrays.
+        """
+        dna_structure = self.dna_structure
+        bases = dna_structure.base_connectivity
+        helices = list(dna_structure.structure_helices_map.values())
+        table = dna_structure.base_table
+        arrays = {}
+
+        # Add helix geometry to the pools. Base geometry references the elements of its helix arrays: the axis
+        # node of the base and the nucleotide coordinates at the index of the base in the helix base lists. A
+        # base is given the pool entry of the element it references, so paired bases share their axis entries.
+        coords_pool = _ArrayPool((3,))
+        frames_pool = _ArrayPool((3, 3))
+        nt_coords_pool = _ArrayPool((3,))
+        num_helices = len(helices)
+        helix_axis_range = np.zeros((num_helices, 2), dtype=np.int64)
+        helix_scaffold_range = np.zeros((num_helices, 2), dtype=np.int64)
+        helix_staple_range = np.zeros((num_helices, 2), dtype=np.int64)
+        axis_offsets = np.zeros(max([helix.id for helix in helices], default=-1) + 1, dtype=np.int64)
+        base_nt_coords_index = np.full(len(table), NONE_ID, dtype=np.int64)
+        for i, helix in enumerate(helices):
+            num_nodes = len(helix.helix_axis_coords)
+            axis_offsets[helix.id] = coords_pool.add(helix.helix_axis_coords)
+            helix_axis_range[i] = (axis_offsets[helix.id], num_nodes)
+            frames_pool.add(np.moveaxis(helix.helix_axis_frames, 2, 0))
+            helix_scaffold_range[i] = (nt_coords_pool.add(helix.scaffold_coords), len(helix.scaffold_coords))
+            helix_staple_range[i] = (nt_coords_pool.add(helix.staple_coords), len(helix.staple_coords))
+            for helix_bases, start in ((helix.scaffold_bases, helix_scaffold_range[i, 0]),
+                                       (helix.staple_bases, helix_staple_range[i, 0])):
+                base_nt_coords_index[[base.id for base in helix_bases]] = start + np.arange(len(helix_bases))
+
+        # The axis pool index of each base is the pool offset of its helix plus its node.
+        has_node = table.node != NONE_ID
+        base_coords_index = np.full(len(table), NONE_ID, dtype=np.int64)
+        base_coords_index[has_node] = axis_offsets[table.helix[has_node]] + table.node[has_node]
+        base_frame_index = base_coords_index.copy()
+
+        # Add the geometry of bases that is not stored in a helix.
+        for id in np.flatnonzero(~has_node).tolist():
+            base = bases[id]
+            if base.coordinates is not None:
+                base_coords_index[id] = coords_pool.add(base.coordinates)
+            if base.ref_frame is not None:
+                base_frame_index[id] = frames_pool.add(base.ref_frame)
+        for id in np.flatnonzero(base_nt_coords_index == NONE_ID).tolist():
+            if bases[id].nt_coords is not None:
+                base_nt_coords_index[id] = nt_coords_pool.add(bases[id].nt_coords)
+
+        # Bases.
+        arrays['base_up'] = table.up
+        arrays['base_down'] = table.down
+        arrays['base_across'] = table.across
+        arrays['base_helix'] = table.helix
+        arrays['base_pos'] = table.pos
+        arrays['base_node'] = table.node
+        arrays['base_strand'] = table.strand
+        arrays['base_domain'] = table.domain
+        arrays['base_seq'] = table.seq
+        arrays['base_is_scaf'] = table.is_scaf
+        arrays['base_residue'] = table.residue
+        arrays['base_num_insertions'] = table.num_insertions
+        arrays['base_num_deletions'] = table.num_deletions
+        arrays['base_coords_index'] = base_coords_index
+        arrays['base_frame_index'] = base_frame_index
+        arrays['base_nt_coords_index'] = base_nt_coords_index
+
+        # Geometry pools.
+        arrays['coords_pool'] = coords_pool.get_array()
+        arrays['frames_pool'] = frames_pool.get_array()
+        arrays['nt_coords_pool'] = nt_coords_pool.get_array()
+
+        # Helices.
+        arrays['helix_id'] = np.array([helix.id for helix in helices], dtype=np.int32)
+        arrays['helix_load_order'] = np.array([helix.load_order for helix in helices], dtype=np.int32)
+        arrays['helix_five_prime'] = np.array([helix.scaffold_polarity == DnaPolarity.FIVE_PRIME
+                                               for helix in helices], dtype=bool)
+        arrays['helix_lattice'] = np.array([(helix.lattice_row, helix.lattice_col, helix.lattice_num,
+                                             helix.lattice_max_vhelix_size) for helix in helices],
+                                           dtype=np.int32).reshape((num_helices, 4))
+        arrays['helix_axis_range'] = helix_axis_range
+        arrays['helix_scaffold_range'] = helix_scaffold_range
+        arrays['helix_staple_range'] = helix_staple_range
+        arrays['helix_end_coords'] = np.array([helix.end_coordinates for helix in helices],
+                                              dtype=float).reshape((num_helices, 2, 3))
+        arrays['helix_end_frames'] = np.array([helix.end_frames for helix in helices],
+                                              dtype=float).reshape((num_helices, 3, 3, 2))
+        _add_lists(arrays, 'helix_scaffold_bases', [[base.id for base in helix.scaffold_bases] for helix in helices])
+        _add_lists(arrays, 'helix_staple_bases', [[base.id for base in helix.staple_bases] for helix in helices])
+        for name in ('staple', 'scaffold'):
+            crossovers = [(helix.id, to_helix.id, index, coord) for helix in helices
+                          for to_helix, index, coord in getattr(helix, 'possible_%s_crossovers' % name)]
+            arrays['%s_crossover_helices' % name] = np.array([c[:3] for c in crossovers],
+                                                             dtype=np.int32).reshape((len(crossovers), 3))
+            arrays['%s_crossover_coords' % name] = np.array([c[3] for c in crossovers],
+                                                            dtype=float).reshape((len(crossovers), 3))
+
+        # Strands.
+        strands = dna_structure.strands or []
+        arrays['strand_id'] = np.array([strand.id for strand in strands], dtype=np.int32)
+        arrays['strand_is_scaffold'] = np.array([strand.is_scaffold for strand in strands], dtype=bool)
+        arrays['strand_is_circular'] = np.array([strand.is_circular for strand in strands], dtype=bool)
+        arrays['strand_color'] = np.array([strand.color for strand in strands], dtype=float).reshape((len(strands), 3))
+        arrays['strand_icolor'] = np.array([NONE_ID if strand.icolor is None else strand.icolor
+                                            for strand in strands], dtype=np.int64)
+        arrays['strand_has_icolor'] = np.array([strand.icolor is not None for strand in strands], dtype=bool)
+        _add_lists(arrays, 'strand_tour', [[base.id for base in strand.tour] for strand in strands])
+        _add_lists(arrays, 'strand_insert_seq', [[ord(letter) for letter in strand.insert_seq] for strand in strands],
+                   dtype=np.uint8)
+
+        # Domains, computed if they have not been.
+        domains = dna_structure.domains
+        arrays['domain_id'] = np.array([domain.id for domain in domains], dtype=np.int32)
+        arrays['domain_helix'] = np.array([domain.helix.id for domain in domains], dtype=np.int32)
+        arrays['domain_strand'] = np.array([domain.strand.id for domain in domains], dtype=np.int32)
+        arrays['domain_connected'] = np.array([(domain.connected_strand, domain.connected_domain)
+                                               for domain in domains], dtype=np.int32).reshape((len(domains), 2))
+        _add_lists(arrays, 'domain_bases', [[base.id for base in domain.base_list] for domain in domains])
+
+        # Staple ends map (start helix, start position) to strand ID.
+        staple_ends = getattr(dna_structure, 'staple_ends', {})
+        arrays['staple_ends'] = np.array([(h, p, strand_id) for (h, p), strand_id in staple_ends.items()],
+                                         dtype=np.int32).reshape((len(staple_ends), 3))
+        return arrays
+
+
+class _ArrayPool(object):
+    """ This class collects fixed-shape array elements into a single array. """
+
+    def __init__(self, shape):
+        self._shape = shape
+        self._blocks = []
+        self._size = 0
+
+    def add(self, elements):
+        """ Add a block of elements, or a single element, to the pool.
+
+            Arguments:
+                elements (NumPy ndarray): The elements to add, indexed by the first axis, or an element.
+
+            Returns the pool index of the first element.
+        """
+        elements = np.asarray(elements, dtype=float).reshape((-1,) + self._shape)
+        start = self._size
+        self._blocks.append(elements)
+        self._size += len(elements)
+        return start
+
+    def get_array(self):
+        """ Get the array of all of the pool elements. """
+        if not self._blocks:
+            return np.zeros((0,) + self._shape, dtype=float)
+        return np.concatenate(self._blocks)
+
+
+def _add_lists(arrays, name, lists, dtype=np.int32):
+    """ Add a list of variable-length lists as a concatenated array and an offsets array. """
+    sizes = [len(values) for values in lists]
+    offsets = np.zeros(len(lists) + 1, dtype=np.int64)
+    np.cumsum(sizes, out=offsets[1:])
+    arrays[name] = np.array([value for values in lists for value in values], dtype=dtype)
+    arrays[name + '_offsets'] = offsets
@@ -30,14 +30,16 @@ from collections import OrderedDict
 import numpy as np
 
 from ...data.base import DnaBase
+from ...data.base_table import BaseTable
 from ...data.dna_structure_helix import DnaStructureHelix
 from ...data.dna_structure import DnaStructure
 
 from ...data.parameters import DnaPolarity
+from .common import CadnanoStrandType
 from .utils import (
     bp_interp,
     deg2rad,
-    generate_coordinates,
+    generate_helices_coordinates,
     get_start_coordinates_angle,
     vrrotvec2mat,
 )
@@ -55,6 +57,7 @@ class CadnanoConvertDesign(object):
         base_id (int): The current base ID used when creating a DnaBase object.
         base_map (OrderedDict[Tuple]): The dict that stores DnaBase objects
             using the tuple (helix_num,helix_pos) as a key.
+        base_table (BaseTable): The table storing the data of the DnaBase objects in base_map.
         dna_parameters (DnaParameters): The DNA parameters to use when creating the 3D geometry for the design.
         dna_structure (DnaStructure): The DnaStructure object.
         staple_colors (List[StapleColor]: The list of caDNAno staple strand colors.
@@ -71,6 +74,7 @@ class CadnanoConvertDesign(object):
         self.dna_parameters = dna_parameters
         self.base_id = 0
         self.base_map = OrderedDict()
+        self.base_table = BaseTable()
         self._logger = logging.getLogger(__name__)
 
     def _add_staple_color(self, staple_color, vhelix_num):
@@ -105,7 +109,7 @@ class CadnanoConvertDesign(object):
         Returns a DnaBase object.
         """
         if base_index not in self.base_map:
-            base = DnaBase(self.base_id)
+            base = DnaBase(self.base_id, table=self.base_table)
             self.base_map[base_index] = base
             self.base_id += 1
         else:
@@ -136,6 +140,7 @@ class CadnanoConvertDesign(object):
         # Reset these in case this function is called multiple times.
         self.base_id = 0
         self.base_map = OrderedDict()
+        self.base_table = BaseTable()
 
         # Create a list of DnaStructureHelix objects for the design.
         helices = self._create_structure_topology_and_geometry(design)
@@ -500,7 +505,7 @@ class CadnanoConvertDesign(object):
 
         # Create bases to insert.
         for i in range(0, num_inserts):
-            base = DnaBase(base_id)
+            base = DnaBase(base_id, table=curr_base.table)
             if curr_base.h not in new_bases:
                 new_bases[curr_base.h] = []
             new_bases[curr_base.h].append(base)
@@ -593,12 +598,12 @@ class CadnanoConvertDesign(object):
         last_base1 = None
         last_base2 = None
         for i in range(num_inserts):
-            base1 = DnaBase(base_id)
+            base1 = DnaBase(base_id, table=curr_base.table)
             if curr_base.h not in new_bases:
                 new_bases[curr_base.h] = []
             new_bases[curr_base.h].append(base1)
             base_id += 1
-            base2 = DnaBase(base_id)
+            base2 = DnaBase(base_id, table=curr_base.table)
             new_bases[curr_base.h].append(base2)
             base_id += 1
             self._logger.debug(
@@ -637,7 +642,7 @@ class CadnanoConvertDesign(object):
             base1.is_scaf = curr_base.is_scaf
             base1.nt_coords = curr_base.nt_coords + dy * (i + 1.0)
             base1.coordinates = insert_coords[i]
-            base1.ref_frame = insert_frames[i]
+            base1.ref_frame = insert_frames[:, :, i]
 
             base2.across = base1
             base2.h = curr_across.h
@@ -645,7 +650,7 @@ class CadnanoConvertDesign(object):
             base2.is_scaf = curr_across.is_scaf
             base2.nt_coords = curr_across.nt_coords + dy * (i + 0.5)
             base2.coordinates = insert_coords[i]
-            base2.ref_frame = insert_frames[i]
+            base2.ref_frame = insert_frames[:, :, i]
 
             last_base1 = base1
             last_base2 = base2
@@ -664,6 +669,7 @@ class CadnanoConvertDesign(object):
         row_list = []
         col_list = []
         structure_helices = []
+        helices_data = []
         vhelices = design.helices
         self._logger.debug(
             "==================== create structure topology and geometry ===================="
@@ -712,23 +718,21 @@ class CadnanoConvertDesign(object):
                     s += str(base.p) + " "
                 self._logger.debug("Staple bases positions %s " % s)
 
-            # Generate the helix axis coordinates and frames, and DNA helix nucleotide coordinates.
-            (
-                axis_coords,
-                axis_frames,
-                scaffold_coords,
-                staple_coords,
-            ) = generate_coordinates(
-                self.dna_parameters,
-                lattice_type,
-                row,
-                col,
-                num,
-                scaffold_bases,
-                staple_bases,
-            )
+            helices_data.append((i, num, scaffold_polarity, row, col, scaffold_bases, staple_bases))
+
+        # Generate the helix axis coordinates and frames, and DNA helix nucleotide coordinates
+        # for all helices at once.
+        helices_geometry = generate_helices_coordinates(
+            self.dna_parameters,
+            lattice_type,
+            [(row, col, num, scaffold_bases, staple_bases)
+             for _, num, _, row, col, scaffold_bases, staple_bases in helices_data],
+        )
 
-            # Create a dna structure object that stores the helix information.
+        # Create dna structure objects that store the helix information.
+        for helix_data, helix_geometry in zip(helices_data, helices_geometry):
+            i, num, scaffold_polarity, row, col, scaffold_bases, staple_bases = helix_data
+            axis_coords, axis_frames, scaffold_coords, staple_coords = helix_geometry
             structure_helix = DnaStructureHelix(
                 i,
                 num,
@@ -757,26 +761,34 @@ class CadnanoConvertDesign(object):
         Returns:
             scaffold_bases (List[DnaBase]): The list of scaffold bases defined for the helix.
             staple_bases (List[DnaBase]): The list of staple bases defined for the helix.
+
+        Only the positions that are not empty in the vhelix scaffold or staple strand blocks are visited.
         """
         # self._logger.debug("------------------- _create_single_helix ------------------- " )
-        scaffolds = vhelix.scaffold_strands
-        staples = vhelix.staple_strands
+        scaffold_positions, scaffold_block = vhelix.get_strand_block(CadnanoStrandType.SCAFFOLD)
+        staple_positions, staple_block = vhelix.get_strand_block(CadnanoStrandType.STAPLE)
+
+        # Expand the strand blocks to the positions that are not empty in either strand.
+        positions = np.union1d(scaffold_positions, staple_positions)
+        scaffolds = np.full((len(positions), 4), -1, dtype=np.int32)
+        scaffolds[np.searchsorted(positions, scaffold_positions)] = scaffold_block
+        staples = np.full((len(positions), 4), -1, dtype=np.int32)
+        staples[np.searchsorted(positions, staple_positions)] = staple_block
+        has_scaffold = (scaffolds[:, 0] >= 0) | (scaffolds[:, 2] >= 0)
+        has_staple = (staples[:, 0] >= 0) | (staples[:, 2] >= 0)
 
         # Iterate over the vhelix scaffold and staple bases.
         scaffold_bases = []
         staple_bases = []
-        for helix_pos, (current_scaffold, current_staple) in enumerate(
-            zip(scaffolds, staples)
+        for helix_pos, current_scaffold, current_staple, is_scaffold, is_staple in zip(
+            positions.tolist(), scaffolds.tolist(), staples.tolist(), has_scaffold.tolist(), has_staple.tolist()
         ):
             # If the base exists in the scaffold strand.
-            if (current_scaffold.initial_strand >= 0) or (
-                current_scaffold.final_strand >= 0
-            ):
+            if is_scaffold:
                 base = self._add_base(
                     StrandType.SCAFFOLD,
                     current_scaffold,
-                    StrandType.STAPLE,
-                    current_staple,
+                    is_staple,
                     helix_pos,
                     vhelix.num,
                 )
@@ -785,14 +797,11 @@ class CadnanoConvertDesign(object):
                 scaffold_bases.append(base)
 
             # if the base exists in the staple strand
-            if (current_staple.initial_strand >= 0) or (
-                current_staple.final_strand >= 0
-            ):
+            if is_staple:
                 base = self._add_base(
                     StrandType.STAPLE,
                     current_staple,
-                    StrandType.SCAFFOLD,
-                    current_scaffold,
+                    is_scaffold,
                     helix_pos,
                     vhelix.num,
                 )
@@ -802,20 +811,18 @@ class CadnanoConvertDesign(object):
 
         return scaffold_bases, staple_bases
 
-    def _add_base(
-        self, base_type, base, paired_base_type, paired_base, helix_pos, helix_num
-    ):
+    def _add_base(self, base_type, base, is_paired, helix_pos, helix_num):
         """Create a base from a cadnano base for a given location in a virtual helix.
 
         Arguments:
             base_type (StrandType): The type of helix strand, SCAFFOLD or STAPLE, the cadnano base is part of.
-            base (CadnanoBase): The cadnano base.
-            paired_base_type (StrandType): The type of helix paired strand, SCAFFOLD or STAPLE, the cadnano
-                paired base is part of.
-            paired_base (CadnanoBase): The cadnano paired base.
+            base (List[int]): The cadnano base 4-tuple [V_0,b_0,V_1,b_1] of its 5' and 3' neighbors.
+            is_paired (bool): If True then the base exists in the paired strand at the same location.
             helix_pos (int): The position of the base in the virtual helix.
             helix_num (int): The number of the virtual helix.
         """
+        initial_strand, initial_base, final_strand, final_base = base
+
         # Create the helix base.
         base_index = self._get_base_index(helix_num, helix_pos, base_type)
         new_base = self._get_base(base_index)
@@ -824,20 +831,17 @@ class CadnanoConvertDesign(object):
         new_base.p = helix_pos
 
         #  Add the 5'-neighbor.
-        base_index = self._get_base_index(
-            base.initial_strand, base.initial_base, base_type
-        )
+        base_index = self._get_base_index(initial_strand, initial_base, base_type)
         five_base = self._get_base(base_index)
         new_base.up = five_base
 
         # Add the 3'-neighbor
-        base_index = self._get_base_index(
-            base.final_strand, base.final_base, base_type)
+        base_index = self._get_base_index(final_strand, final_base, base_type)
         three_base = self._get_base(base_index)
         new_base.down = three_base
 
         # Watson-Crick neighbor.
-        if (paired_base.initial_strand >= 0) or (paired_base.final_strand >= 0):
+        if is_paired:
             base_index = self._get_base_index(
                 helix_num, helix_pos, not base_type)
             wc_base = self._get_base(base_index)
@@ -18,8 +18,10 @@ This module is used to store data read from caDNAno DNA origami design JSON file
 import logging
 from itertools import product
 
+import numpy as np
+
 from .common import CadnanoLatticeType, CadnanoStrandType
-from ...data.lattice import SquareLattice, HoneycombLattice
+from ...data.lattice import LatticeIndex, SquareLattice, HoneycombLattice
 
 
 class CadnanoDesign(object):
@@ -30,7 +32,7 @@ class CadnanoDesign(object):
         self.max_base_id = 0
         self.lattice_type = CadnanoLatticeType.none
         self.helices = []
-        self.helices_coord_map = {}
+        self.helices_coord_map = LatticeIndex()
         self.max_row = 0
         self.max_col = 0
         self._logger = logging.getLogger(__name__)
@@ -110,19 +112,11 @@ class CadnanoDesign(object):
 
     def get_neighbor_helices(self, lattice, vhelix):
         """ Get the neighboring helices for the given helix.
-        """
-        neighbor_helices = []
-        row = vhelix.row
-        col = vhelix.col
-        neighbor_coords = lattice.get_neighbors(row, col)
-        for coord in neighbor_coords:
-            if coord in self.helices_coord_map:
-                nhelix = self.helices_coord_map[coord]
-                neighbor_helices.append(nhelix)
-            else:
-                neighbor_helices.append(None)
 
-        return neighbor_helices
+            Returns the list of helices at the neighboring lattice coordinates of the helix, in the order given by
+            lattice.get_neighbors(), with None for coordinates that have no helix.
+        """
+        return self.helices_coord_map.get_neighbors(lattice, vhelix.row, vhelix.col)
 
 
 class CadnanoVirtualHelix(object):
@@ -137,6 +131,13 @@ class CadnanoVirtualHelix(object):
                 neighboring helices.
             possible_scaffold_crossovers (list[(CadnanoVirtualHelix,int)]: The list of possible scaffold crossovers to
                 neighboring helices.
+            scaffold_strands (List[CadnanoBase]): The scaffold bases for each position of the virtual helix.
+            staple_strands (List[CadnanoBase]): The staple bases for each position of the virtual helix.
+
+        The scaffold and staple bases are stored as strand blocks: an (N,4) array of the caDNAno 4-tuples of
+        the non-empty positions of the virtual helix together with the array of those positions. The lists of
+        CadnanoBase objects are only created from the strand blocks when scaffold_strands or staple_strands is
+        accessed. The lists then replace the strand blocks so that changes made to their bases are used.
     """
 
     def __init__(self, id, num, row, col, insertions, deletions):
@@ -146,11 +147,80 @@ class CadnanoVirtualHelix(object):
         self.col = col
         self.insertions = insertions
         self.deletions = deletions
-        self.scaffold_strands = []
-        self.staple_strands = []
         self.staple_colors = []
         self.possible_staple_crossovers = []
         self.possible_scaffold_crossovers = []
+        self._size = 0
+        self._strand_blocks = {CadnanoStrandType.SCAFFOLD: None, CadnanoStrandType.STAPLE: None}
+        self._strands = {CadnanoStrandType.SCAFFOLD: None, CadnanoStrandType.STAPLE: None}
+
+    @property
+    def scaffold_strands(self):
+        return self._get_strands(CadnanoStrandType.SCAFFOLD)
+
+    @property
+    def staple_strands(self):
+        return self._get_strands(CadnanoStrandType.STAPLE)
+
+    def set_strand_blocks(self, size, scaffold_block, staple_block):
+        """ Set the scaffold and staple bases of the virtual helix.
+
+            Arguments:
+                size (int): The number of positions in the virtual helix.
+                scaffold_block (Tuple(NumPy ndarray, NumPy ndarray)): The scaffold strand block, the positions
+                    and (N,4) array of 4-tuples of the non-empty scaffold positions.
+                staple_block (Tuple(NumPy ndarray, NumPy ndarray)): The staple strand block.
+        """
+        self._size = size
+        self._strand_blocks = {CadnanoStrandType.SCAFFOLD: scaffold_block, CadnanoStrandType.STAPLE: staple_block}
+        self._strands = {CadnanoStrandType.SCAFFOLD: None, CadnanoStrandType.STAPLE: None}
+
+    def get_strand_block(self, strand_type):
+        """ Get the strand block for the scaffold or staple bases of the virtual helix.
+
+            Arguments:
+                strand_type (CadnanoStrandType): The type of strand, SCAFFOLD or STAPLE.
+
+            Returns a tuple of the positions (NumPy ndarray[int32]) and the (N,4) array (NumPy ndarray[int32])
+            of 4-tuples of the non-empty positions of the strand.
+        """
+        strands = self._strands[strand_type]
+        if strands is not None:
+            return create_strand_block([(base.initial_strand, base.initial_base, base.final_strand,
+                                         base.final_base) for base in strands])
+        block = self._strand_blocks[strand_type]
+        if block is None:
+            return create_strand_block([])
+        return block
+
+    def _get_strands(self, strand_type):
+        """ Get the list of CadnanoBase objects for the scaffold or staple bases, creating it from the
+            strand block if needed.
+        """
+        strands = self._strands[strand_type]
+        if strands is None:
+            strands = [CadnanoBase(-1, -1, -1, -1) for _ in range(self._size)]
+            block = self._strand_blocks[strand_type]
+            if block is not None:
+                for pos, values in zip(*(array.tolist() for array in block)):
+                    strands[pos] = CadnanoBase(*values)
+            self._strands[strand_type] = strands
+            self._strand_blocks[strand_type] = None
+        return strands
+
+
+def create_strand_block(json_bases):
+    """ Create a strand block from the caDNAno 4-tuples [V_0,b_0,V_1,b_1] for the positions of a virtual helix.
+
+        Arguments:
+            json_bases (List[List[int]]): The 'scaf' or 'stap' array of a caDNAno virtual helix.
+
+        Returns a tuple of the positions (NumPy ndarray[int32]) and the (N,4) array (NumPy ndarray[int32])
+        of 4-tuples of the positions that are not empty, i.e. not [-1,-1,-1,-1].
+    """
+    block = np.array(json_bases, dtype=np.int32).reshape((-1, 4))
+    positions = np.flatnonzero((block != -1).any(axis=1)).astype(np.int32)
+    return positions, block[positions]
 
 
 class CadnanoBase():
@@ -14,15 +14,23 @@
 
 """
 This module is used to read caDNAno DNA origami design JSON files.
+
+The orjson package is used to decode the JSON data if it is installed, otherwise the standard library
+json module is used.
 """
 import csv
 import json
 import logging
 import re
 from .common import CadnanoLatticeType, CadnanoJsonFields
-from .design import CadnanoDesign, CadnanoVirtualHelix, CadnanoBase
+from .design import CadnanoDesign, CadnanoVirtualHelix, create_strand_block
 from ...data.sequence import DnaSequence
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 
 class CadnanoReader(object):
     """The CadnanoReader class."""
@@ -47,8 +55,7 @@ class CadnanoReader(object):
         import os.path
         file_name = os.path.expanduser(file_name)
         self._logger.info("Reading caDNAno design file {}".format(file_name))
-        with open(file_name) as json_file:
-            json_data = json.load(json_file)
+        json_data = load_json_file(file_name)
 
         # parse the json data into a CadnanoDesign object.
         design = self.parse_json_data(json_data)
@@ -147,36 +154,14 @@ class CadnanoReader(object):
             # Check for a vhelix with no bases.
             scaffold = json_helix[CadnanoJsonFields.SCAF]
             staples = json_helix[CadnanoJsonFields.STAP]
-            if scaffold.count([-1, -1, -1, -1]) + staples.count([-1, -1, -1, -1]) == len(scaffold) + len(staples):
+            scaffold_block = create_strand_block(scaffold)
+            staple_block = create_strand_block(staples)
+            if len(scaffold_block[0]) + len(staple_block[0]) == 0:
                 continue
 
-            # Parse scaffold information
-            # num_scaffold = len(scaffold)
-            for json_base in scaffold:
-                initial_strand = json_base[0]
-                initial_base = json_base[1]
-                final_strand = json_base[2]
-                final_base = json_base[3]
-                self._logger.debug("scaffold base=" + str(json_base))
-                base = CadnanoBase(
-                    initial_strand, initial_base, final_strand, final_base)
-                helix.scaffold_strands.append(base)
-                bsum = sum(json_base)
-                if (bsum != -4):
-                    num_scaffold_bases += 1
-
-            # parse staple information
-            # num_staples = len(staples)
-            for json_base in staples:
-                initial_strand = json_base[0]
-                initial_base = json_base[1]
-                final_strand = json_base[2]
-                final_base = json_base[3]
-                self._logger.debug("staple base=" + str(json_base))
-                base = CadnanoBase(
-                    initial_strand, initial_base, final_strand, final_base)
-                helix.staple_strands.append(base)
-                bsum = sum(json_base)
+            # Set the scaffold and staple information.
+            helix.set_strand_blocks(len(scaffold), scaffold_block, staple_block)
+            num_scaffold_bases += len(scaffold_block[0])
 
             design.helices.append(helix)
 
@@ -201,3 +186,19 @@ class CadnanoReader(object):
         self._logger.info(
             "Maximum number of lattice columns %d " % max_col_json)
         return design
+
+
+def load_json_file(file_name):
+    """Load the data from a JSON file, using orjson if it is installed.
+
+    Args:
+        file_name (string): The name of the JSON file to read.
+
+    Returns:
+        The data decoded from the JSON file.
+    """
+    if orjson is not None:
+        with open(file_name, 'rb') as json_file:
+            return orjson.loads(json_file.read())
+    with open(file_name) as json_file:
+        return json.load(json_file)
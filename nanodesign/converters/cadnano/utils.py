@@ -45,91 +45,148 @@ def generate_coordinates(
     positions that contain a base. The coordinates and refereance frames are also set for
     scaffold and staple bases.
     """
-    # r_strand = dna_parameters.helix_distance / 2.0  # half the distance between the axes of adjacent DNA helices.
-    r_helix = dna_parameters.helix_radius  # radius of DNA helices (nm)
-    # rise between two neighboring base-pairs (nm)
-    dist_bp = dna_parameters.base_pair_rise
-    # twisting angle between two neighboring base-pairs (degrees)
-    ang_bp = dna_parameters.base_pair_twist_angle
+    return generate_helices_coordinates(
+        dna_parameters, lattice_type, [(row, col, helix_num, scaffold_bases, staple_bases)]
+    )[0]
+
+
+def generate_helices_coordinates(dna_parameters, lattice_type, helices):
+    """Generate the axis coordinates, axis reference frames, and nucleotide coordinates for a list of
+    virtual helices.
+
+    Arguments:
+        dna_parameters (DnaParameters): The DNA parameters to use when creating the 3D geometry for the design.
+        lattice_type (CadnanoLatticeType): The lattice type for this design.
+        helices (List[Tuple]): The list of (row, col, helix_num, scaffold_bases, staple_bases) tuples
+            describing each virtual helix, as passed to generate_coordinates().
+
+    Returns a list of (axis_coords, axis_frames, scaffold_coords, staple_coords) tuples, one for each
+    virtual helix, as returned by generate_coordinates().
+
+    The positions of all helices are concatenated and their geometry is computed with whole-array
+    operations, so the cost of the Python code does not depend on the number of bases. The bases'
+    coordinates, reference frames and nucleotide coordinates are set to views into the returned arrays.
+    """
+    # radius of DNA helices (nm)
+    r_helix = dna_parameters.helix_radius
     # angle of the minor groove (degrees)
     ang_minor = dna_parameters.minor_groove_angle
 
     # Positions of the scaffold nucleotide and staple nucleotide
     # in the local reference frame.
-    scaf_local = (
-        r_helix
-        * np.array(
-            [cos(deg2rad(180 - ang_minor / 2)),
-             sin(deg2rad(180 - ang_minor / 2)), 0.0]
-        ).transpose()
+    scaf_local = r_helix * np.array(
+        [cos(deg2rad(180 - ang_minor / 2)), sin(deg2rad(180 - ang_minor / 2)), 0.0]
     )
-    stap_local = (
-        r_helix
-        * np.array(
-            [cos(deg2rad(180 + ang_minor / 2)),
-             sin(deg2rad(180 + ang_minor / 2)), 0.0]
-        ).transpose()
+    stap_local = r_helix * np.array(
+        [cos(deg2rad(180 + ang_minor / 2)), sin(deg2rad(180 + ang_minor / 2)), 0.0]
     )
 
-    # Set the helix start coordinates.
-    init_coord, init_ang = get_start_coordinates_angle(
-        dna_parameters, lattice_type, row, col, helix_num
+    # Gather the sorted base positions of each helix.
+    helix_positions = []
+    init_coords = []
+    init_angles = []
+    axis_dirs = []
+    for row, col, helix_num, scaffold_bases, staple_bases in helices:
+        positions = np.unique(
+            np.fromiter(
+                (base.p for bases in (scaffold_bases, staple_bases) for base in bases),
+                dtype=int,
+            )
+        )
+        helix_positions.append(positions)
+        init_coord, init_ang = get_start_coordinates_angle(
+            dna_parameters, lattice_type, row, col, helix_num
+        )
+        init_coords.append(init_coord)
+        init_angles.append(init_ang)
+        axis_dirs.append(1.0 if helix_num % 2 == 0 else -1.0)
+
+    # Compute the helix axis coordinates and frames for all helices.
+    sizes = [len(positions) for positions in helix_positions]
+    positions = np.concatenate(helix_positions) if helices else np.zeros(0, dtype=int)
+    helix_index = np.repeat(np.arange(len(helices)), sizes)
+    axis_coords, frames = _axis_geometry(
+        dna_parameters,
+        np.array(init_coords, dtype=float).reshape(-1, 3)[helix_index],
+        np.array(init_angles, dtype=float)[helix_index],
+        np.array(axis_dirs, dtype=float)[helix_index],
+        positions,
     )
 
-    # Set the direction of the helix axis.
-    if helix_num % 2 == 0:
-        e3 = np.array([0, 1, 0], dtype=float)
-    else:
-        e3 = np.array([0, -1, 0], dtype=float)
-
-    # Create a list of sorted base positions.
-    base_positions = set()
-    for base in scaffold_bases:
-        base_positions.add(base.p)
-    for base in staple_bases:
-        base_positions.add(base.p)
-
-    # Compute helix axis coordinates and frames.
-    num_base_positions = len(base_positions)
-    axis_coords = np.zeros((num_base_positions, 3), dtype=float)
-    axis_frames = np.zeros((3, 3, num_base_positions), dtype=float)
-    pos_map = {}
-    for i, p in enumerate(sorted(base_positions)):
-        pos_map[p] = i
-        ref_coord = init_coord + np.array([0, dist_bp * p, 0])
-        angle = init_ang + ang_bp * p
-        # Base coordinate.
-        axis_coords[i, :] = ref_coord
-        # Base orientation.
-        e2 = np.array([cos(-deg2rad(angle)), 0, sin(-deg2rad(angle))])
-        e1 = np.cross(e2, e3)
-        axis_frames[:, :, i] = np.array([e1, e2, e3]).transpose()
-
-    # Compute scaffold nucleotide positions and set base coordinates and frame.
-    num_scaffold_bases = len(scaffold_bases)
-    scaffold_coords = np.zeros((num_scaffold_bases, 3), dtype=float)
-    for i, base in enumerate(scaffold_bases):
-        j = pos_map[base.p]
-        base.coordinates = axis_coords[j]
-        base.ref_frame = axis_frames[:, :, j]
-        scaffold_coords[i, :] = axis_coords[j, :] + np.dot(
-            axis_frames[:, :, j], scaf_local
+    # Split the geometry into helices, then compute nucleotide coordinates and set base geometry.
+    helix_geometry = []
+    offsets = np.cumsum([0] + sizes)
+    for k, (row, col, helix_num, scaffold_bases, staple_bases) in enumerate(helices):
+        start, end = offsets[k], offsets[k + 1]
+        helix_coords = axis_coords[start:end]
+        helix_frames = frames[start:end]
+        axis_frames = np.ascontiguousarray(helix_frames.transpose(1, 2, 0))
+        scaffold_coords = _set_bases_geometry(
+            scaffold_bases, helix_positions[k], helix_coords, helix_frames, axis_frames, scaf_local
+        )
+        staple_coords = _set_bases_geometry(
+            staple_bases, helix_positions[k], helix_coords, helix_frames, axis_frames, stap_local
         )
-        base.nt_coords = scaffold_coords[i]
+        helix_geometry.append((helix_coords, axis_frames, scaffold_coords, staple_coords))
+
+    return helix_geometry
+
 
-    # Compute staple nucleotide positions and set base coordinates and frame.
-    num_staple_bases = len(staple_bases)
-    staple_coords = np.zeros((num_staple_bases, 3), dtype=float)
-    for i, base in enumerate(staple_bases):
-        j = pos_map[base.p]
+def _axis_geometry(dna_parameters, init_coords, init_angles, axis_dirs, positions):
+    """Compute helix axis coordinates and frames for a set of helix positions.
+
+    Arguments:
+        dna_parameters (DnaParameters): The DNA parameters to use when creating the 3D geometry for the design.
+        init_coords (NumPy Nx3 ndarray[float]): The start coordinates of the helix of each position.
+        init_angles (NumPy N ndarray[float]): The start angle of the helix of each position.
+        axis_dirs (NumPy N ndarray[float]): The direction (1 or -1) along the y-axis of the helix of each position.
+        positions (NumPy N ndarray[int]): The helix positions.
+
+    Returns:
+        axis_coords (NumPy Nx3 ndarray[float]): The coordinates of the helix axis at each position.
+        frames (NumPy Nx3x3 ndarray[float]): The frame at each position, with frame axes stored as columns.
+    """
+    # rise between two neighboring base-pairs (nm)
+    dist_bp = dna_parameters.base_pair_rise
+    # twisting angle between two neighboring base-pairs (degrees)
+    ang_bp = dna_parameters.base_pair_twist_angle
+
+    num_positions = len(positions)
+    zeros = np.zeros(num_positions, dtype=float)
+
+    # Base coordinates.
+    axis_coords = init_coords + np.stack([zeros, dist_bp * positions, zeros], axis=1)
+
+    # Base orientations.
+    angles = -deg2rad(init_angles + ang_bp * positions)
+    e2 = np.stack([np.cos(angles), zeros, np.sin(angles)], axis=1)
+    e3 = np.stack([zeros, axis_dirs, zeros], axis=1)
+    e1 = np.cross(e2, e3)
+    frames = np.stack([e1, e2, e3], axis=2)
+    return axis_coords, frames
+
+
+def _set_bases_geometry(bases, positions, axis_coords, frames, axis_frames, local_coord):
+    """Compute the nucleotide coordinates for a list of bases and set their geometry.
+
+    Arguments:
+        bases (List[DnaBase]): The list of bases.
+        positions (NumPy N ndarray[int]): The sorted helix positions of the helix axis nodes.
+        axis_coords (NumPy Nx3 ndarray[float]): The coordinates of the helix axis nodes.
+        frames (NumPy Nx3x3 ndarray[float]): The frames of the helix axis nodes.
+        axis_frames (NumPy 3x3xN ndarray[float]): The frames of the helix axis nodes, as stored in the helix.
+        local_coord (NumPy 3 ndarray[float]): The nucleotide position in the local reference frame.
+
+    Returns the nucleotide coordinates (NumPy Mx3 ndarray[float]) of the bases.
+    """
+    index = np.searchsorted(positions, np.fromiter((base.p for base in bases), dtype=int, count=len(bases)))
+    nt_coords = axis_coords[index] + np.matmul(frames[index], local_coord)
+    for base, j, coords in zip(bases, index.tolist(), nt_coords):
         base.coordinates = axis_coords[j]
         base.ref_frame = axis_frames[:, :, j]
-        staple_coords[i, :] = axis_coords[j, :] + np.dot(
-            axis_frames[:, :, j], stap_local
-        )
-        base.nt_coords = staple_coords[i]
-
-    return axis_coords, axis_frames, scaffold_coords, staple_coords
+        base.node = j
+        base.nt_coords = coords
+    return nt_coords
 
 
 def get_start_coordinates_angle(dna_parameters, lattice_type, row, col, helix_num):
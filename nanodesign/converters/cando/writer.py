@@ -17,12 +17,21 @@ This module is used to write CanDo .cndo files.
 """
 import logging
 
+import numpy as np
+
+from ...data.base_table import NONE_ID
+
 
 class CandoWriter(object):
     """ The CandoWriter class writes out a CanDo .cndo file.
     """
 
     def __init__(self, dna_structure):
+        """ Initialize the CandoWriter object.
+
+            Arguments:
+                dna_structure (DnaStructure): The dna structure to write.
+        """
         self.dna_structure = dna_structure
         self._logger = logging.getLogger(__name__)
 
@@ -38,6 +47,17 @@ class CandoWriter(object):
         self._logger.info("Writing CanDo .cndo file: %s " % file_name)
         self._logger.info("Number of bases %d " % len(base_conn))
 
+        # The topology is read from the base table columns, where the row of each base is its index into
+        # base_connectivity. Rows are mapped to base IDs, the extra last entry maps a NONE_ID row to -1.
+        table = dna_structure.base_table
+        base_ids = np.array([base.id for base in base_conn] + [NONE_ID], dtype=np.int64)
+        ids = base_ids[:-1].tolist()
+        up_ids = base_ids[table.up].tolist()
+        down_ids = base_ids[table.down].tolist()
+        across_ids = base_ids[table.across].tolist()
+        seq = table.get_sequence()
+        coordinates, ref_frames, _ = dna_structure.get_base_geometry()
+
         with open(file_name, 'w') as cndo_file:
             # write header
             cndo_file.write(
@@ -47,45 +67,31 @@ class CandoWriter(object):
 
             # write dna topology
             cndo_file.write("dnaTop,id,up,down,across,seq\n")
-            for i in range(0, len(base_conn)):
-                base = base_conn[i]
-                up = base.up.id if base.up else -1
-                down = base.down.id if base.down else -1
-                across = base.across.id if base.across else -1
-                cndo_file.write("%d,%d,%d,%d,%d,%s\n" %
-                                (i+1, base.id, up, down, across, base.seq))
+            cndo_file.write("".join(["%d,%d,%d,%d,%d,%s\n" %
+                                     (i+1, ids[i], up_ids[i], down_ids[i], across_ids[i], seq[i])
+                                     for i in range(len(base_conn))]))
             cndo_file.write("\n")
 
             # base nodes
             cndo_file.write('dNode,"e0(1)","e0(2)","e0(3)"\n')
-            for i in range(0, len(base_conn)):
-                coords = base_conn[i].coordinates
-                cndo_file.write("%d,%f,%f,%f\n" %
-                                (i+1, coords[0], coords[1], coords[2]))
+            cndo_file.write("".join(["%d,%f,%f,%f\n" % (i+1, x, y, z)
+                                     for i, (x, y, z) in enumerate(coordinates.tolist())]))
             cndo_file.write("\n")
 
-            # triad vectors
+            # triad vectors: e1 and e3 are the negated first and third columns of the reference frame, e2
+            # is the second column.
             cndo_file.write(
                 'triad,"e1(1)","e1(2)","e1(3)","e2(1)","e2(2)","e2(3)","e3(1)","e3(2)","e3(3)"\n')
-            for i in range(0, len(base_conn)):
-                ref_frame = base_conn[i].ref_frame
-                cndo_file.write(
-                    "%d,%f,%f,%f,%f,%f,%f,%f,%f,%f\n" % (
-                        i+1, -ref_frame[0, 0], -
-                        ref_frame[1, 0], -ref_frame[2, 0],
-                        ref_frame[0, 1], ref_frame[1, 1],
-                        ref_frame[2, 1], -ref_frame[0, 2],
-                        -ref_frame[1, 2], -ref_frame[2, 2]
-                    )
-                )
+            triads = (ref_frames * [-1.0, 1.0, -1.0]).transpose(0, 2, 1).reshape(-1, 9).tolist()
+            cndo_file.write("".join(["%d,%f,%f,%f,%f,%f,%f,%f,%f,%f\n" % (i+1, *triad)
+                                     for i, triad in enumerate(triads)]))
             cndo_file.write("\n")
 
             # Nucleotide binding table.
-            id_nt = self._create_id_nt(base_conn)
+            id_nt = dna_structure.pair_table.base_ids
             cndo_file.write("id_nt,id1,id2\n")
-            for i in range(0, len(id_nt)):
-                cndo_file.write("%d,%d,%d\n" %
-                                (i+1, id_nt[i][0]+1, id_nt[i][1]+1))
+            for i, (id1, id2) in enumerate((id_nt + 1).tolist()):
+                cndo_file.write("%d,%d,%d\n" % (i+1, id1, id2))
         self._logger.info("Done.")
 
     def _setup_logging(self):
@@ -98,13 +104,3 @@ class CandoWriter(object):
                 '[%(name)s] %(levelname)s - %(message)s')
             console_handler.setFormatter(formatter)
             self._logger.addHandler(console_handler)
-
-    def _create_id_nt(self, base_conn):
-        """ Create a list of paired bases. """
-        id_nt = []
-        for base in base_conn:
-            if not (base.across and base.is_scaf):
-                continue
-            id_nt.append([base.id, base.across.id])
-
-        return id_nt
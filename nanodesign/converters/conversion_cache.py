@@ -0,0 +1,209 @@
+# Copyright 2016 Autodesk Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+This module is used to cache the DNA structures created from caDNAno design files.
+
+A DnaStructure is stored in the cache directory as a binary structure file named by a hash of the
+inputs used to create it: the contents of the caDNAno design file, the sequence file contents or
+sequence name, the DNA parameter values and the modify flag. The hash also includes the binary format
+version and a hash of the source of the modules used to convert designs, so structures created by a
+different version of the conversion code are not read. Reading a design with the same inputs
+again reads the structure from its binary structure file instead of converting the design.
+
+The total size of the cache files is bounded. When the bound is exceeded the least recently used
+files are removed, where file modification times are updated each time a file is read.
+"""
+import hashlib
+import json
+import logging
+import os
+import tempfile
+
+from .binary.common import VERSION
+from .binary.reader import BinaryStructureReader
+from .binary.writer import BinaryStructureWriter
+
+# The default maximum total size in bytes of the files in a cache directory.
+DEFAULT_MAX_CACHE_SIZE = 512 * 1024 * 1024
+
+# The file name extension of cache files.
+CACHE_FILE_EXTENSION = ".nds"
+
+# The package directories, relative to the nanodesign package directory, storing the modules used to
+# convert caDNAno designs into DNA structures, and the module of the Converter class.
+CONVERSION_CODE_DIRS = ["data", os.path.join("converters", "binary"), os.path.join("converters", "cadnano")]
+CONVERSION_CODE_FILES = [os.path.join("converters", "converter.py")]
+
+# The hash of the conversion code, computed when first used.
+_code_hash = None
+
+
+def get_default_cache_directory():
+    """ Get the default cache directory, given by the NANODESIGN_CACHE_DIR environment variable if set. """
+    cache_dir = os.environ.get("NANODESIGN_CACHE_DIR")
+    if cache_dir:
+        return cache_dir
+    return os.path.join(os.path.expanduser("~"), ".cache", "nanodesign")
+
+
+class ConversionCache(object):
+    """ This class stores the DNA structures created from caDNAno design files in a cache directory.
+
+        Attributes:
+            directory (string): The directory storing the cache files.
+            max_size (int): The maximum total size in bytes of the cache files.
+    """
+
+    def __init__(self, directory=None, max_size=DEFAULT_MAX_CACHE_SIZE):
+        self.directory = directory if directory else get_default_cache_directory()
+        self.max_size = max_size
+        self._logger = logging.getLogger(__name__)
+
+    def get_key(self, file_name, seq_file_name, seq_name, dna_parameters, modify):
+        """ Get the cache key for the structure created from a caDNAno design file.
+
+            Arguments:
+                file_name (String): The name of the caDNAno file to convert.
+                seq_file_name (String): The name of the file used to assign a DNA base sequence to the DNA structure.
+                seq_name (String): The name of a sequence used to assign a DNA base sequence to the DNA structure.
+                dna_parameters (DnaParameters): The DNA parameters used to create the structure.
+                modify (bool): If true then the structure is created with deleted/inserted bases.
+
+            Returns the key (string) as a hexadecimal hash.
+        """
+        settings = {
+            "version": VERSION,
+            "code": get_code_hash(),
+            "design": _hash_file(file_name),
+            "dna_parameters": vars(dna_parameters),
+            "modify": bool(modify),
+            "seq_file": _hash_file(seq_file_name) if seq_file_name else None,
+            "seq_file_extension": os.path.splitext(seq_file_name)[1] if seq_file_name else None,
+            "seq_name": seq_name,
+        }
+        return hashlib.sha256(json.dumps(settings, sort_keys=True).encode("utf-8")).hexdigest()
+
+    def get(self, key):
+        """ Get a DNA structure from the cache.
+
+            Arguments:
+                key (string): The cache key for the structure.
+
+            Returns the DnaStructure read from the cache, or None if the structure is not in the cache.
+        """
+        file_name = self._get_file_name(key)
+        if not os.path.exists(file_name):
+            return None
+        try:
+            os.utime(file_name, None)
+            dna_structure = BinaryStructureReader().read(file_name)
+        except Exception as error:
+            # Any failure to read a file (e.g. a truncated file) is a cache miss and the file is removed.
+            self._logger.warning("Unable to read cache file %s: %s: %s" % (file_name, type(error).__name__, error))
+            _remove_file(file_name)
+            return None
+        self._logger.info("Read structure from cache file %s" % file_name)
+        return dna_structure
+
+    def put(self, key, dna_structure, modify):
+        """ Add a DNA structure to the cache.
+
+            Arguments:
+                key (string): The cache key for the structure.
+                dna_structure (DnaStructure): The structure to add.
+                modify (bool): If true then the structure was created with deleted/inserted bases.
+
+            The structure is written to a temporary file that is then renamed, so a cache file is never read
+            while it is partially written. Failing to write the cache is not an error.
+        """
+        file_name = self._get_file_name(key)
+        temp_file_name = None
+        try:
+            if not os.path.isdir(self.directory):
+                os.makedirs(self.directory)
+            fd, temp_file_name = tempfile.mkstemp(suffix=".tmp", dir=self.directory)
+            os.close(fd)
+            BinaryStructureWriter(dna_structure, modify).write(temp_file_name)
+            os.replace(temp_file_name, file_name)
+        except Exception as error:
+            # Any failure to write a file (e.g. a full disk or a structure the binary format cannot store) leaves
+            # the structure uncached and the partially written file is removed.
+            self._logger.warning("Unable to write cache file %s: %s: %s" % (file_name, type(error).__name__, error))
+            if temp_file_name is not None:
+                _remove_file(temp_file_name)
+            return
+        self._logger.info("Wrote structure to cache file %s" % file_name)
+        self.evict()
+
+    def evict(self):
+        """ Remove the least recently used cache files until their total size is no more than max_size. """
+        entries = []
+        for entry_name in os.listdir(self.directory):
+            if not entry_name.endswith(CACHE_FILE_EXTENSION):
+                continue
+            file_name = os.path.join(self.directory, entry_name)
+            try:
+                stat = os.stat(file_name)
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, file_name))
+
+        total_size = sum(size for _, size, _ in entries)
+        for _, size, file_name in sorted(entries):
+            if total_size <= self.max_size:
+                break
+            self._logger.info("Remove cache file %s" % file_name)
+            _remove_file(file_name)
+            total_size -= size
+
+    def _get_file_name(self, key):
+        return os.path.join(self.directory, key + CACHE_FILE_EXTENSION)
+
+
+def get_code_hash():
+    """ Get the hexadecimal hash of the source of the modules used to convert caDNAno designs.
+
+        The hash is computed once per process.
+    """
+    global _code_hash
+    if _code_hash is None:
+        package_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        file_names = [os.path.join(package_dir, name) for name in CONVERSION_CODE_FILES]
+        for dir_name in CONVERSION_CODE_DIRS:
+            dir_path = os.path.join(package_dir, dir_name)
+            file_names.extend(os.path.join(dir_path, name) for name in os.listdir(dir_path) if name.endswith(".py"))
+        code_hash = hashlib.sha256()
+        for file_name in sorted(file_names):
+            code_hash.update(os.path.relpath(file_name, package_dir).encode("utf-8"))
+            code_hash.update(_hash_file(file_name).encode("ascii"))
+        _code_hash = code_hash.hexdigest()
+    return _code_hash
+
+
+def _hash_file(file_name):
+    """ Get the hexadecimal hash of the contents of a file. """
+    file_hash = hashlib.sha256()
+    with open(file_name, "rb") as infile:
+        for block in iter(lambda: infile.read(1 << 20), b""):
+            file_hash.update(block)
+    return file_hash.hexdigest()
+
+
+def _remove_file(file_name):
+    """ Remove a file that may have already been removed by another process. """
+    try:
+        os.remove(file_name)
+    except OSError:
+        pass
@@ -22,9 +22,12 @@ DnaStructure is not created with deleted/inserted bases. The DnaStructure is cre
 deleted/inserted bases by specifying the --modify command-line argument.
 
 """
+from concurrent.futures import ThreadPoolExecutor
+import copy
 import logging
 import os
 import re
+import time
 
 from ..data.parameters import DnaParameters
 from ..utils.xform import (
@@ -33,11 +36,15 @@ from ..utils.xform import (
     apply_helix_xforms,
     xform_from_connectors,
 )
+from .binary.reader import BinaryStructureReader
+from .binary.writer import BinaryStructureWriter
 from .cadnano.convert_design import CadnanoConvertDesign
 from .cadnano.reader import CadnanoReader
 from .cadnano.writer import CadnanoWriter
 from .cando.writer import CandoWriter
+from .conversion_cache import ConversionCache
 from .dna_sequence_data import dna_sequence_data
+from .pdbcif.atomic_structure import AtomicStructure
 from .pdbcif.cif_writer import CifWriter
 from .pdbcif.pdb_writer import PdbWriter
 from .simdna.writer import SimDnaWriter
@@ -45,11 +52,16 @@ from .viewer.writer import ViewerWriter
 
 # TODO (JMS, 10/26/16): revisit where the sequence data is kept?
 
+# The distance between adjacent helices of the structures written to Nanodesign Viewer files, a bit larger than
+# the default to better visualize the helices.
+VIEWER_HELIX_DISTANCE = 2.50
+
 
 class ConverterFileFormats(object):
     """File format names to convert to/from."""
 
     UNKNOWN = "unknown"
+    BINARY = "binary"
     CADNANO = "cadnano"
     CANDO = "cando"
     CIF = "cif"
@@ -58,13 +70,39 @@ class ConverterFileFormats(object):
     STRUCTURE = "structure"
     TOPOLOGY = "topology"
     VIEWER = "viewer"
-    names = [CADNANO, CANDO, CIF, PDB, SIMDNA, STRUCTURE, TOPOLOGY, VIEWER]
+    names = [BINARY, CADNANO, CANDO, CIF, PDB, SIMDNA, STRUCTURE, TOPOLOGY, VIEWER]
+
+    # The suffix appended to a file name prefix to name a file written in each format.
+    file_suffixes = {
+        BINARY: ".nds",
+        CADNANO: "_cadnano.json",
+        CANDO: ".cndo",
+        CIF: ".cif",
+        PDB: ".pdb",
+        SIMDNA: "_simdna.txt",
+        STRUCTURE: "_structure.json",
+        TOPOLOGY: "_topology.json",
+        VIEWER: "_viewer.json",
+    }
+
+    # The DnaStructure auxiliary data items read or computed by the writer of each format. The structure
+    # writer computes all of the items (see DnaStructure.write()).
+    aux_data_items = {
+        BINARY: ("domains",),
+        CIF: ("strand_helix_refs",),
+        PDB: ("strand_helix_refs",),
+        STRUCTURE: ("strand_helix_refs", "domains", "helix_connectivity", "design_crossovers"),
+        VIEWER: ("strand_helix_refs", "domains", "helix_connectivity", "design_crossovers"),
+    }
 
 
 class Converter(object):
     """This class stores objects for various models created when reading from a file.
 
     Attributes:
+        atomic_workers (int): The number of processes used to generate the atoms written to atomic structure files
+            (PDB, CIF).
+        cache (ConversionCache): The cache storing the DNA structures created from caDNAno design files.
         cadnano_design (CadnanoDesign): The object storing the caDNAno design information.
         cadnano_convert_design (CadnanoConvertDesign): The object used to convert a caDNAno design into a DnaStructure.
         dna_parameters (DnaParameters): The DNA physical parameters used to generate the geometry of a DNA structure
@@ -73,18 +111,47 @@ class Converter(object):
         informat (String): The format of the file to convert, taken from ConverterFileFormats.
         modify (bool): If true then DnaStructure is created with deleted/inserted bases.
         outfile (String): The name of the file for converter output.
+        streaming (bool): If true then atomic structure files (PDB, CIF) are written one chunk of strands at a time.
+        use_cache (bool): If true then DNA structures created from caDNAno design files are read from and added
+            to the cache. The cache is not used by default.
     """
 
     def __init__(self):
-        self.cadnano_design = None
+        self._cadnano_design = None
+        self._cadnano_design_file = None
         self.dna_structure = None
         self.cadnano_convert_design = None
         self.infile = None
         self.informat = None
         self.outfile = None
         self.modify = False
+        self.streaming = False
+        self.atomic_workers = 1
+        self.use_cache = False
+        self.cache = ConversionCache()
         self.dna_parameters = DnaParameters()
         self.logger = logging.getLogger(__name__)
+        # The sequence arguments and the operations (staple operations, transformations) used to create the DNA
+        # structure, used to create the structure again with different DNA parameters.
+        self._sequence_args = (None, None)
+        self._structure_operations = []
+
+    @property
+    def cadnano_design(self):
+        """The CadnanoDesign object storing the caDNAno design information.
+
+        If the DNA structure was read from the cache then the caDNAno design file is read when the design is
+        first accessed.
+        """
+        if self._cadnano_design is None and self._cadnano_design_file is not None:
+            self._cadnano_design = CadnanoReader().read_json(self._cadnano_design_file)
+            self._cadnano_design_file = None
+        return self._cadnano_design
+
+    @cadnano_design.setter
+    def cadnano_design(self, cadnano_design):
+        self._cadnano_design = cadnano_design
+        self._cadnano_design_file = None
 
     def read_cadnano_file(self, file_name, seq_file_name, seq_name):
         """Read in a caDNAno file.
@@ -93,18 +160,97 @@ class Converter(object):
             file_name (String): The name of the caDNAno file to convert.
             seq_file_name (String): The name of the CSV file used to assign a DNA base sequence to the DNA structure.
             seq_name (String): The name of a sequence used to assign a DNA base sequence to the DNA structure.
+
+        If use_cache is true and the structure for the same design file, sequence, DNA parameters and modify flag
+        is in the cache then it is read from the cache. The caDNAno design file is then only read if cadnano_design
+        is accessed.
         """
+        self._sequence_args = (seq_file_name, seq_name)
+        self._structure_operations = []
+        if self.use_cache:
+            cache_key = self.cache.get_key(file_name, seq_file_name, seq_name, self.dna_parameters, self.modify)
+            dna_structure = self.cache.get(cache_key)
+            if dna_structure is not None:
+                dna_structure.dna_parameters = self.dna_parameters
+                self.cadnano_design = None
+                self._cadnano_design_file = file_name
+                self.cadnano_convert_design = CadnanoConvertDesign(self.dna_parameters)
+                self.dna_structure = dna_structure
+                return
+
         cadnano_reader = CadnanoReader()
         self.cadnano_design = cadnano_reader.read_json(file_name)
+        self._create_structure(seq_file_name, seq_name)
+
+        if self.use_cache:
+            self.cache.put(cache_key, self.dna_structure, self.modify)
+
+    def read_structure_file(self, file_name, seq_file_name=None, seq_name=None):
+        """Read in a binary structure file.
+
+        Arguments:
+            file_name (String): The name of the binary structure file to read.
+            seq_file_name (String): The name of the CSV file used to assign a DNA base sequence to the DNA structure.
+            seq_name (String): The name of a sequence used to assign a DNA base sequence to the DNA structure.
+
+        The structure arrays are memory-mapped from the file. The DNA parameters and modify flag the structure
+        was created with are read from the file.
+        """
+        structure_reader = BinaryStructureReader()
+        self.dna_structure = structure_reader.read(file_name)
+        self.cadnano_design = None
+        self._sequence_args = (seq_file_name, seq_name)
+        self._structure_operations = []
+        self.dna_parameters = self.dna_structure.dna_parameters
+        self.modify = structure_reader.header["modify"]
+        self.cadnano_convert_design = CadnanoConvertDesign(self.dna_parameters)
+        self._set_sequence(seq_file_name, seq_name)
+
+    def _create_structure(self, seq_file_name, seq_name):
+        """Create the DNA structure from the caDNAno design.
+
+        Arguments:
+            seq_file_name (String): The name of the CSV file used to assign a DNA base sequence to the DNA structure.
+            seq_name (String): The name of a sequence used to assign a DNA base sequence to the DNA structure.
+        """
         self.cadnano_convert_design = CadnanoConvertDesign(self.dna_parameters)
         self.dna_structure = self.cadnano_convert_design.create_structure(
             self.cadnano_design, self.modify
         )
 
+        self._set_sequence(seq_file_name, seq_name)
+
+    def create_viewer_structure(self):
+        """Create the DNA structure written to Nanodesign Viewer files.
+
+        The structure is created from the caDNAno design already read using VIEWER_HELIX_DISTANCE as the
+        distance between helices, and the sequence, staple operations and transformations used to create
+        the DNA structure. If the DNA structure already uses that distance, or was read from a binary structure
+        file, then the DNA structure is returned.
+        """
+        if self.dna_parameters.helix_distance == VIEWER_HELIX_DISTANCE or self.cadnano_design is None:
+            return self.dna_structure
+        viewer_converter = Converter()
+        viewer_converter.modify = self.modify
+        viewer_converter.dna_parameters = copy.copy(self.dna_parameters)
+        viewer_converter.dna_parameters.helix_distance = VIEWER_HELIX_DISTANCE
+        viewer_converter.cadnano_design = self.cadnano_design
+        viewer_converter._create_structure(*self._sequence_args)
+        for name, arg in self._structure_operations:
+            getattr(viewer_converter, name)(arg)
+        return viewer_converter.dna_structure
+
+    def _set_sequence(self, seq_file_name, seq_name):
+        """Assign a DNA base sequence to the DNA structure.
+
+        Arguments:
+            seq_file_name (String): The name of the CSV file used to assign a DNA base sequence to the DNA structure.
+            seq_name (String): The name of a sequence used to assign a DNA base sequence to the DNA structure.
+        """
         if seq_file_name is not None:
             _, file_extension = os.path.splitext(seq_file_name)
             if file_extension == ".csv":
-                sequences: list = cadnano_reader.read_csv(seq_file_name)
+                sequences: list = CadnanoReader().read_csv(seq_file_name)
                 self.logger.debug(
                     f"set all sequences from file: {seq_file_name}")
                 self.cadnano_convert_design.set_sequence(
@@ -149,7 +295,8 @@ class Converter(object):
         Arguments:
             file_name (String): The name of the PDB file to write.
         """
-        pdb_writer = PdbWriter(self.dna_structure)
+        atomic_structure = AtomicStructure(self.dna_structure, self.atomic_workers)
+        pdb_writer = PdbWriter(self.dna_structure, self.streaming, atomic_structure)
         pdb_writer.write(file_name)
 
     def write_cif_file(self, file_name):
@@ -158,7 +305,8 @@ class Converter(object):
         Arguments:
             file_name (String): The name of the CIF file to write.
         """
-        cif_writer = CifWriter(self.dna_structure)
+        atomic_structure = AtomicStructure(self.dna_structure, self.atomic_workers)
+        cif_writer = CifWriter(self.dna_structure, self.streaming, atomic_structure)
         cif_writer.write(file_name, self.infile, self.informat)
 
     def write_simdna_file(self, file_name):
@@ -193,6 +341,15 @@ class Converter(object):
         cando_writer = CandoWriter(self.dna_structure)
         cando_writer.write(file_name)
 
+    def write_binary_file(self, file_name):
+        """Write a binary structure file.
+
+        Arguments:
+            file_name (String): The name of the binary structure file to write.
+        """
+        structure_writer = BinaryStructureWriter(self.dna_structure, self.modify)
+        structure_writer.write(file_name)
+
     def write_cadnano_file(self, file_name):
         """Write a caDNAno JSON file.
 
@@ -202,12 +359,97 @@ class Converter(object):
         cadnano_writer = CadnanoWriter(self.dna_structure)
         cadnano_writer.write(file_name)
 
+    def write_many(self, formats, prefix, max_workers=1, stop_on_error=True):
+        """Write the DNA structure to files in several formats.
+
+        Arguments:
+            formats (List[String]): The formats to write, taken from ConverterFileFormats.
+            prefix (String): The file name prefix, the name of each file is the prefix followed by the
+                format suffix given in ConverterFileFormats.file_suffixes.
+            max_workers (int): The maximum number of files written concurrently.
+            stop_on_error (bool): If true then an error writing a file is raised, otherwise it is returned and
+                the other files are written.
+
+        Returns a list of (format, file name, seconds, error message) tuples for the files written, where
+        error message is None if the file was written.
+
+        Viewer files are written from the structure given by create_viewer_structure(), created from the
+        caDNAno design already read with a larger distance between helices.
+
+        The data derived from the DNA structure that is used by the writers is computed once before any
+        file is written: the auxiliary data (domains, crossovers, etc.) read by the requested formats, the
+        base table, the pair table and, for PDB and CIF files, the atomic model. The writers then only read
+        the structure and so can write their files concurrently.
+        """
+        for file_format in formats:
+            if file_format not in ConverterFileFormats.file_suffixes:
+                raise ValueError("Unknown output file format %s." % file_format)
+
+        dna_structure = self.dna_structure
+        viewer_structure = None
+        if ConverterFileFormats.VIEWER in formats:
+            viewer_structure = self.create_viewer_structure()
+        for file_format in formats:
+            structure = viewer_structure if file_format == ConverterFileFormats.VIEWER else dna_structure
+            for name in ConverterFileFormats.aux_data_items.get(file_format, ()):
+                getattr(structure, name)
+        dna_structure.base_table
+        dna_structure.pair_table
+
+        atomic_structure = None
+        if not self.streaming and (ConverterFileFormats.PDB in formats or ConverterFileFormats.CIF in formats):
+            atomic_structure = AtomicStructure(dna_structure, self.atomic_workers)
+            atomic_structure.get_atom_table(coords_dtype=float)
+
+        def get_atomic_structure():
+            # Streaming writers generate atoms as they write so each is given its own atomic structure.
+            if atomic_structure is not None:
+                return atomic_structure
+            return AtomicStructure(dna_structure, self.atomic_workers)
+
+        writers = {
+            ConverterFileFormats.BINARY: self.write_binary_file,
+            ConverterFileFormats.CADNANO: self.write_cadnano_file,
+            ConverterFileFormats.CANDO: lambda file_name: CandoWriter(dna_structure).write(file_name),
+            ConverterFileFormats.CIF: lambda file_name: CifWriter(dna_structure, self.streaming, get_atomic_structure())
+            .write(file_name, self.infile, self.informat),
+            ConverterFileFormats.PDB: lambda file_name: PdbWriter(dna_structure, self.streaming, get_atomic_structure())
+            .write(file_name),
+            ConverterFileFormats.SIMDNA: self.write_simdna_file,
+            ConverterFileFormats.STRUCTURE: self.write_structure_file,
+            ConverterFileFormats.TOPOLOGY: self.write_topology_file,
+            ConverterFileFormats.VIEWER: lambda file_name: ViewerWriter(viewer_structure,
+                                                                        viewer_structure.dna_parameters)
+            .write(file_name),
+        }
+
+        def write_file(file_format, file_name):
+            start_time = time.time()
+            error_message = None
+            try:
+                writers[file_format](file_name)
+            except Exception as error:
+                if stop_on_error:
+                    raise
+                error_message = "%s: %s" % (type(error).__name__, error)
+                self.logger.error("Error writing %s file %s: %s" % (file_format, file_name, error_message))
+            return file_format, file_name, time.time() - start_time, error_message
+
+        files = [(file_format, prefix + ConverterFileFormats.file_suffixes[file_format]) for file_format in formats]
+        self.logger.info("Writing %d files using %d workers" % (len(files), max_workers))
+        if max_workers <= 1:
+            return [write_file(file_format, file_name) for file_format, file_name in files]
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = [executor.submit(write_file, file_format, file_name) for file_format, file_name in files]
+            return [future.result() for future in futures]
+
     def perform_staple_operations(self, staples_arg):
         """Perform operations on staples.
 
         Arguments:
             staples_arg (String): The argument to the staples command-line option.
         """
+        self._structure_operations.append(("perform_staple_operations", staples_arg))
         tokens = staples_arg.split(",", 1)
         operation = tokens[0]
         retain_staples = []
@@ -238,6 +480,7 @@ class Converter(object):
         The format of the transform commands is:
             helices(0,1):rotate(90,0,0),translate(0,0,0);helices(2,3):rotate(0,90,0),translate(0,0,0)
         """
+        self._structure_operations.append(("transform_structure", transform))
         helices_map = self.dna_structure.structure_helices_map
         self.logger.info("Transform %s" % transform)
         helix_groups = transform.split(";")
@@ -326,6 +569,8 @@ class Converter(object):
 
         # Apply the transformation to the dna structure helices.
         apply_helix_xforms(helix_group_xforms)
+        for helix_group_xform in helix_group_xforms:
+            self.dna_structure.mark_helices_changed(helix_group_xform.helices)
 
     def set_module_loggers(self, names):
         module_names = names.split(",")
@@ -26,17 +26,21 @@ structure. It is similar to the DnaStrand object but is augmented with the
 rotation and translation data of each base along a strand.
 
 Atomic models are generated using template structures containing three paired
-residues for A-T, G-C, C-G and T-A.
+residues for A-T, G-C, C-G and T-A. The templates are read and transformed
+once per process and shared by all AtomicStructure objects.
 """
 # from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+import contextlib
 import logging
 import numpy as np
 import os
+import threading
 from math import pi
 
 
-from .utils import _Rx, _Ry,  _vrrotmat2vec, _vrrotvec2mat
-from .atomic_types import Molecule
+from .utils import _Rx, _Ry, _vrrotvec2mat, _find_runs, _vrrotmat2vec_batch, _vrrotvec2mat_batch
+from .atomic_types import AtomTable
 from .pdb_reader import PdbReader
 from ...data.parameters import DnaBaseNames
 
@@ -45,6 +49,143 @@ from ...data.parameters import DnaBaseNames
 dna_pdb_templates_dir = os.path.abspath(os.path.join(
     os.path.dirname(os.path.abspath(__file__)), '../../res/'))
 
+# The default number of bases in a chunk of strands when generating atoms one
+# chunk at a time.
+DEFAULT_CHUNK_BASES = 10000
+
+# The name of the file the transformed base templates are saved to by
+# save_atom_templates() and loaded from if it is newer than the template PDB
+# files.
+ATOM_TEMPLATES_FILE = os.path.join(dna_pdb_templates_dir, 'atom_templates.npz')
+
+# The base templates shared by all atomic structures in a process, set when
+# first used.
+_atom_templates = None
+_atom_templates_lock = threading.Lock()
+
+# The base templates used by a worker process, set when the process starts.
+_worker_templates = None
+
+
+class AtomTemplates(object):
+    """ This class stores the atoms of the base template structures as NumPy
+        arrays.
+
+        Attributes:
+            coords (NumPy Tx3 ndarray[float]): The coordinates of the atoms of
+                all templates.
+            elements (NumPy T ndarray[str]): The atom element names.
+            names (NumPy T ndarray[str]): The atom names.
+            offsets (NumPy K+1 ndarray[int]): The index of the first atom of
+                each template; the atoms of template k are in rows offsets[k]
+                to offsets[k+1]-1.
+            res_names (NumPy T ndarray[str]): The atom residue names.
+            sizes (NumPy K ndarray[int]): The number of atoms in each template.
+
+        A template is stored for the forward and reverse structure of each
+        base. The templates are ordered by base name (A, C, G, T), with the
+        forward structure of a base followed by its reverse structure.
+    """
+
+    BASE_NAMES = [DnaBaseNames.A, DnaBaseNames.C, DnaBaseNames.G,
+                  DnaBaseNames.T]
+
+    # The version of the format of files written by save().
+    FILE_VERSION = 1
+
+    def __init__(self, forward_struct, reverse_struct):
+        """ Initialize an AtomTemplates object.
+
+            Arguments:
+                forward_struct (Dict{String:List[Atom]}: A dictionary mapping a
+                    base name to a forward structure.
+                reverse_struct (Dict{String:List[Atom]}: A dictionary mapping a
+                    base name to a reverse structure.
+        """
+        atoms = []
+        sizes = []
+        for base_name in AtomTemplates.BASE_NAMES:
+            for struct in (forward_struct, reverse_struct):
+                atoms.extend(struct[base_name])
+                sizes.append(len(struct[base_name]))
+        self._set_arrays(sizes, [atom.coords for atom in atoms],
+                         [atom.name for atom in atoms],
+                         [atom.res_name for atom in atoms],
+                         [atom.element for atom in atoms])
+
+    def _set_arrays(self, sizes, coords, names, res_names, elements):
+        """ Set the template arrays. The arrays are made read only because
+            the templates are shared by all atomic structures.
+        """
+        self.sizes = np.array(sizes, dtype=int)
+        self.offsets = np.concatenate(([0], np.cumsum(self.sizes)))
+        self.coords = np.ascontiguousarray(coords, dtype=float).reshape(-1, 3)
+        self.names = np.array(names, dtype=str)
+        self.res_names = np.array(res_names, dtype=str)
+        self.elements = np.array(elements, dtype=str)
+        for array in (self.sizes, self.offsets, self.coords, self.names,
+                      self.res_names, self.elements):
+            array.flags.writeable = False
+        self._template_index = {}
+        for i, base_name in enumerate(AtomTemplates.BASE_NAMES):
+            self._template_index[(base_name, True)] = 2*i
+            self._template_index[(base_name, False)] = 2*i+1
+
+    @classmethod
+    def load(cls, file_name):
+        """ Load templates saved to a NumPy .npz file using save().
+
+            Arguments:
+                file_name (String): The name of the file to load.
+
+            Returns the AtomTemplates object storing the templates.
+        """
+        templates = cls.__new__(cls)
+        with np.load(file_name, allow_pickle=False) as data:
+            if int(data['version']) != cls.FILE_VERSION:
+                raise ValueError("Unknown atom templates file version %d." %
+                                 int(data['version']))
+            templates._set_arrays(data['sizes'], data['coords'], data['names'],
+                                  data['res_names'], data['elements'])
+        return templates
+
+    def save(self, file_name):
+        """ Save the templates to a NumPy .npz file.
+
+            Arguments:
+                file_name (String): The name of the file to write.
+        """
+        np.savez(file_name, version=self.FILE_VERSION, sizes=self.sizes,
+                 coords=self.coords, names=self.names, res_names=self.res_names,
+                 elements=self.elements)
+
+    @property
+    def num_templates(self):
+        return len(self.sizes)
+
+    def get_index(self, base_name, is_forward):
+        """ Get the index of the template for a base.
+
+            Arguments:
+                base_name (String): The base name (A, C, G or T).
+                is_forward (bool): If True then get the forward structure.
+
+            Returns the template index (int), or None if there is no template
+            for the base name.
+        """
+        return self._template_index.get((base_name, bool(is_forward)))
+
+    def get_radius(self):
+        """ Get the largest distance of a template atom from the origin. """
+        if len(self.coords) == 0:
+            return 0.0
+        return float(np.sqrt((self.coords**2).sum(axis=1).max()))
+
+    def get_coords(self, index):
+        """ Get the atom coordinates (NumPy Mx3 ndarray[float]) of a template.
+        """
+        return self.coords[self.offsets[index]:self.offsets[index+1]]
+
 
 class AtomicStructureStrand(object):
     """ This class stores data for the atomic structure of a strand.
@@ -54,17 +195,19 @@ class AtomicStructureStrand(object):
                 writing out the atomic structure.
             dna_strand (DnaStrand): The DnaStrand object representing a series
                 of bases in the DNA structure.
+            has_transform (NumPy N ndarray[bool]): For each base in the strand
+                True if its rotation and translation are set.
             id (int): The strand ID: between 0 and number of strands-1.
             is_circular (bool): True if the strand is circular.
-            is_main (List[bool]): For each base in the strand True if the base
-                is part of a scaffold.
-            rotations (List[NumPy 3x3 array of floats]): The rotation matrix
-                for each base in the strand.
+            is_main (NumPy N ndarray[bool]): For each base in the strand True
+                if the base is part of a scaffold.
+            rotations (NumPy Nx3x3 ndarray[float]): The rotation matrix for
+                each base in the strand.
             seq (List[string]: The base sequence letter (A,C,G or T) for the
                 strand bases.
             tour (list[int]): The list of base IDs for the strand.
-            translations (List[NumPy 3x1 array of floats]): The translation
-                vector for each base in the strand.
+            translations (NumPy Nx3 ndarray[float]): The translation vector for
+                each base in the strand.
 
         This class is similar to the DnaStrand class object and uses data from
         that object but contains additional data (e.g. rotation and translation
@@ -97,10 +240,11 @@ class AtomicStructureStrand(object):
 
         # Initialize rotations and translations along the strand.
         size = len(strand.tour)
-        self.is_main = [False]*size
+        self.is_main = np.zeros(size, dtype=bool)
         self.seq = ['N']*size
-        self.rotations = [np.empty(shape=(0, 0))] * size
-        self.translations = [np.empty(shape=(0))] * size
+        self.has_transform = np.zeros(size, dtype=bool)
+        self.rotations = np.zeros((size, 3, 3), dtype=float)
+        self.translations = np.zeros((size, 3), dtype=float)
 
         # Create the chain ID.
         # base_conn = strand.dna_structure.base_connectivity
@@ -121,8 +265,12 @@ class AtomicStructure(object):
     """ This class stores the atomic structure for a DNA model.
 
         Attributes:
+            atom_table (AtomTable): The atoms created for the atomic structure.
             dna_structure (DnaStructure): The DNA structure the atomic stucture
                 will be created from.
+            max_workers (int): The number of processes used to transform the
+                base templates. If 1 then atoms are generated in the calling
+                process.
             molecules (List[Molecule]): The list of Molecule objects created
                 for the atomic structure.
             strands (List[AtomicStructureStrand]): The list of atomic structure
@@ -136,29 +284,25 @@ class AtomicStructure(object):
     TEMPLATE_PDB_STRUCTURE_FILE_C = 'CCC.pdb'
     TEMPLATE_PDB_STRUCTURE_FILE_T = 'TTT.pdb'
 
-    def __init__(self, dna_structure):
+    def __init__(self, dna_structure, max_workers=1):
         """ Initialize a AtomicStructure object.
 
             Arguments:
                 dna_structure (DnaStructure): The DNA structure the atomic
                     stucture will be created from.
+                max_workers (int): The number of processes used to transform
+                    the base templates.
         """
         self.dna_structure = dna_structure
+        self.max_workers = max_workers
+        self.atom_table = None
         self.molecules = []
         self.strands = []
+        self._strand_transforms_set = False
+        self._templates = None
         self._logger = logging.getLogger(__name__)
         self._init_strand_data()
 
-        # Template structures file names.
-        self.templatePdbStructureFile_A = os.path.join(
-            dna_pdb_templates_dir, 'AAA.pdb')
-        self.templatePdbStructureFile_G = os.path.join(
-            dna_pdb_templates_dir, 'GGG.pdb')
-        self.templatePdbStructureFile_C = os.path.join(
-            dna_pdb_templates_dir, 'CCC.pdb')
-        self.templatePdbStructureFile_T = os.path.join(
-            dna_pdb_templates_dir, 'TTT.pdb')
-
     def _init_strand_data(self):
         """ Create the list of AtomicStructureStrand objects from DnaStrand
         objects. """
@@ -166,436 +310,84 @@ class AtomicStructure(object):
             atomic_strand = AtomicStructureStrand(dna_strand)
             self.strands.append(atomic_strand)
 
-    def generate_structure(self):
-        """ Generate the atomic structure for the dna model. """
-        base_conn = self.dna_structure.base_connectivity
-        base_nodes = self.dna_structure.helix_axis_coords
-        triads = self.dna_structure.helix_axis_frames
-        id_nt = self.dna_structure.id_nt
-        self._logger.info("Generate atomic structure.")
-        self._logger.info("Number of bases  %d " % len(base_conn))
-        self._logger.info("Number of base helix axis nodes %d " %
-                          len(base_nodes))
-        self._logger.info("Number of triads: %d" % triads.shape[2])
-
-        # Convert base node coords to angstroms.
-        for i in range(0, len(id_nt)):
-            base_nodes[i, 0] = 10.0*base_nodes[i, 0]
-            base_nodes[i, 1] = 10.0*base_nodes[i, 1]
-            base_nodes[i, 2] = 10.0*base_nodes[i, 2]
-
-        # Reverse the directions of coordinate frames for the major groove (0)
-        # and helix axis (2).
-        if True:
-            for i in range(0, len(id_nt)):
-                triads[0, 0, i] = -triads[0, 0, i]
-                triads[1, 0, i] = -triads[1, 0, i]
-                triads[2, 0, i] = -triads[2, 0, i]
-                triads[0, 2, i] = -triads[0, 2, i]
-                triads[1, 2, i] = -triads[1, 2, i]
-                triads[2, 2, i] = -triads[2, 2, i]
-
-        # Rotation to convert frame [e1 e2 e3] to [-e2 e3 -e1].
-        rot_mat = np.array([[0, 0, -1], [-1, 0, 0], [0, 1, 0]], dtype=float)
-
-        # Set the rotation matrix, translation vector and sequence for strand
-        # paired bases.
-        self._logger.debug(
-            "=================== set strand data ==================")
-        for i in range(0, len(id_nt)):
-            self._logger.debug("---------- i %d ----------\n" % i)
-            base_id1 = id_nt[i, 0]
-            base1 = base_conn[base_id1]
-            strand1 = self.strands[base1.strand]
-            base1_sindex = strand1.get_base_index(base1)
-            strand1.is_main[base1_sindex] = True
-            strand1.seq[base1_sindex] = base1.seq
-            strand1.rotations[base1_sindex] = np.dot(triads[:, :, i], rot_mat)
-            strand1.translations[base1_sindex] = base_nodes[i]
-
-            # Paired base.
-            base_id2 = id_nt[i, 1]
-            base2 = base_conn[base_id2]
-            strand2 = self.strands[base2.strand]
-            base2_sindex = strand2.get_base_index(base2)
-            strand2.is_main[base2_sindex] = False
-            strand2.seq[base2_sindex] = base2.seq
-            strand2.rotations[base2_sindex] = np.dot(triads[:, :, i], rot_mat)
-            strand2.translations[base2_sindex] = base_nodes[i]
-
-        self._logger.debug(
-            "=================== create bulges ==================")
-        for strand in self.strands:
-            self._logger.debug(
-                "=================== strand:%d =================== " % strand.id)
-            # base = base_conn[strand.tour[0]-1]
-            rotations = strand.rotations
-            translations = strand.translations
-            is_main = strand.is_main
-            is_circular = strand.is_circular
-            seq = strand.seq
-
-            self._generate_bulge_dof(
-                strand, rotations, translations, is_main, is_circular)
-
-            strand.rotations = rotations
-            strand.translations = translations
-            strand.is_main = is_main
-
-            for i in range(0, len(seq)):
-                if (seq[i] == 'N'):
-                    base_index = strand.tour[i]-1
-                    strand.seq[i] = base_conn[base_index].seq
-            # _for i in range(0,len(seq))
-
-        # Generate atomic structures from the dna strands.
-        self._logger.debug(
-            "=================== generate atomic structures =================="
-        )
-        self.molecules = self._generate_atoms(self.strands)
-        self._logger.debug("Generated %d atomic structures. " %
-                           len(self.molecules))
-        return self.molecules
-
-    def _generate_atoms(self, strands):
-        """ Generate atomic structures from the dna strands.
-
-            Arguments:
-                strands (List[AtomicStructureStrand]): The list of atomic
-                    stucture strands to create atoms for.
-        """
-        # Read template structures, seperating atoms into forward (5'->3') and
-        # reverse chains.
-        A_for, T_rev = self._read_template(
-            AtomicStructure.TEMPLATE_PDB_STRUCTURE_FILE_A)
-        G_for, C_rev = self._read_template(
-            AtomicStructure.TEMPLATE_PDB_STRUCTURE_FILE_G)
-        C_for, G_rev = self._read_template(
-            AtomicStructure.TEMPLATE_PDB_STRUCTURE_FILE_C)
-        T_for, A_rev = self._read_template(
-            AtomicStructure.TEMPLATE_PDB_STRUCTURE_FILE_T)
-
-        # Create a dict mapping base name to forward and reverse structures.
-        forward_struct = {DnaBaseNames.A: A_for, DnaBaseNames.C: C_for,
-                          DnaBaseNames.G: G_for, DnaBaseNames.T: T_for}
-        reverse_struct = {DnaBaseNames.A: A_rev, DnaBaseNames.C: C_rev,
-                          DnaBaseNames.G: G_rev, DnaBaseNames.T: T_rev}
-
-        molecular_structures = []
-        # num_strands = len(strands)
-        first_atomID = 1     # serial number for the first atom in a tour
-
-        # Create a Molecule object containing the atoms for each strand.
-        for strand in strands:
-            molecule, first_atomID = self._create_atoms_from_strand(
-                strand, forward_struct, reverse_struct, first_atomID)
-            molecular_structures.append(molecule)
-
-        return molecular_structures
-
-    def _create_atoms_from_strand(self, strand, forward_struct, reverse_struct,
-                                  first_atomID_in):
-        """ Create the atoms for the list of bases in a strand.
+    def _generate_bulge_dof(self, strand):
+        """ Set the rotations and translations of the single-stranded regions
+            of a strand.
 
             Arguments:
-                strand (AtomicStructureStrand): The input strand to create and
-                    atomistic structure from.
-                forward_struct:
-                reverse_struct:
-                first_atomID_in:
-
-            Returns:
-                molecule (Molecule):  A Molecule object containing the strand
-                    atoms.
-
-            A Molecule object is created to store the atoms for the strand
-            structure.
-        """
-        self._logger.debug(
-            "=================== strand ID %d =================== " % strand.id
-        )
-        self._logger.debug("Number of bases %d " % len(strand.tour))
-        self._logger.debug("Scaffold %d " % strand.is_scaffold)
-        base_conn = strand.dna_strand.dna_structure.base_connectivity
-        base = base_conn[strand.tour[0]-1]
-        self._logger.debug("Start helix %d  position %d" % (base.h, base.p))
-        first_atomID_out = first_atomID_in
-        # max_atom_per_base = 40
-        num_bases = len(strand.tour)
-
-        # Create a Molecule object to store the atoms for the strand structure.
-        molecule = Molecule(strand.id)
-
-        # Create a rotation matrix for a 180 degree rotation about the y-axis.
-        Ry180 = _Ry(180.0)
-
-        # Build up a structure from the strand bases.
-        atom_index = 1
-        for i in range(0, num_bases):
-            strand_R = strand.rotations[i]
-            if (strand_R.size == 0):
-                continue
-            base_name = strand.seq[i].upper()
-            self._logger.debug("base(%d)='%s'" % (i, base_name))
-
-            if base_name not in forward_struct:
-                self._logger.warn("base(%d)='%s' not found." % (i, base_name))
-                continue
-
-            # Get the rotation and translation for the base.
-            R = np.dot(strand_R, Ry180)
-            D = strand.translations[i]
-
-            # Get the structure for the base. If is_main[i] is True then the
-            # base is for a scaffold.
-            if (strand.is_main[i]):
-                current_struct = forward_struct[base_name]
-            else:
-                current_struct = reverse_struct[base_name]
-
-            # Duplicate and transform the atoms in the reference structure.
-            num_atoms = len(current_struct)
-            for j in range(0, num_atoms):
-                current_atom = current_struct[j].dupe()
-                current_atom.id = first_atomID_out
-                current_atom.chainID = strand.chainID
-                first_atomID_out = first_atomID_out+1
-                current_atom.res_seq_num = i+1
-                # coords = current_atom.coords
-                # Transform the atom coordinates.
-                xform_coord = current_atom.coords
-                xform_coord = np.dot(R, xform_coord)
-                xform_coord = np.add(xform_coord, D)
-                self._logger.debug(" atom id %d  name %s  coord (%g %g %g)" % (
-                    current_atom.id, current_atom.name,
-                    xform_coord[0], xform_coord[1], xform_coord[2]))
-                current_atom.coords = xform_coord
-                molecule.add_atom(current_atom)
-                atom_index = atom_index+1
-
-        # _for i in range(0,num_bases)
-
-        return molecule, first_atomID_out
-
-    def _read_template(self, infile_name):
-        """ Read a template structure from a PDB file.
-
-            Arguments:
-                infile_name (String): The name of the template structure file
-                    to read.
-
-            Returns:
-                forward_struct (List[Atom]): The list of atoms for the forward
-                    dna strand.
-                reverse_struct (List[Atom]): The list of atoms for the reverse
-                    dna strand.
-
-            In the reference structure:
-                forward strand chainID = S
-                backward strand chainID = A
+                strand (AtomicStructureStrand): The strand to set the
+                    single-stranded region transforms for.
+
+            The regions of bases without a transform are found using
+            _find_runs(). Regions with a free end of a strand that is not
+            circular are not set. The transforms of all other regions are
+            interpolated at once using _fit_R_d() and written into the strand
+            rotations and translations arrays.
         """
-        forward_struct = []
-        reverse_struct = []
-
-        # Read in the template structure.
-        file_name = os.path.join(dna_pdb_templates_dir, infile_name)
-        reader = PdbReader()
-        reader.read(file_name)
-        molecules = reader.molecules
-        molecule = molecules[0]
-
-        # Create rotation matrix for a -90 deg rotation about x-axis
-        # followed by a -90 deg rotation about y-axis.
-        R = np.dot(_Ry(-90), _Rx(-90))
-
-        # Group atoms into forward/backward chains.
-        for atom in molecule.atoms:
-            # Transform and store atom for the forward reference structure.
-            if (atom.chainID == 'S') and (atom.res_seq_num == 2):
-                atom.id = -1
-                atom.res_seq_num = -1
-                xform_coord = atom.coords
-                xform_coord = np.dot(R, xform_coord)
-                atom.coords = xform_coord
-                atom.chainID = 'A'
-                forward_struct.append(atom)
-
-            # Transform and store atom for the backward reference structure.
-            elif (atom.chainID == 'A') and (atom.res_seq_num == 2):
-                atom.id = -1
-                atom.res_seq_num = -1
-                xform_coord = atom.coords
-                xform_coord = np.dot(R, xform_coord)
-                atom.coords = xform_coord
-                reverse_struct.append(atom)
-
-        return forward_struct, reverse_struct
-
-    def _generate_bulge_dof(self, strand, rotations, translations, is_main,
-                            is_circular):
         self._logger.debug(">>> _generate_bulge_dof ")
-        num_nt = len(rotations)
-
-        # Find all regions in the strand that are not paired.
-        single_strands = self._find_single_strands(rotations, is_circular)
-
-        # Remove single-stranded regions with free ends.
-        if (not is_circular):
-            for i in range(len(single_strands)-1, -1, -1):
-                strand_pos = single_strands[i]
-                if ((strand_pos[0] == 0) or (strand_pos[-1] == num_nt-1)):
-                    single_strands[i] = []
-        # _if (not is_circular)
-
-        self._logger.debug("Number of single_strands) %d " %
-                           len(single_strands))
-
-        # Find positions and orientations of the single-stranded regions.
-        for i in range(0, len(single_strands)):
-            strand_pos = single_strands[i]
-            if len(strand_pos) == 0:
-                continue
-            self._logger.debug(">>> process single stranded region %d " % i)
-            self._logger.debug("strand_pos %d: %s " %
-                               (len(strand_pos), str(strand_pos)))
-            # sys.exit(0)
-
-            if self._logger.getEffectiveLevel() == logging.DEBUG:
-                base_conn = strand.dna_strand.dna_structure.base_connectivity
-                base_str = ""
-                for si in strand_pos:
-                    base_id = strand.tour[si]-1
-                    base = base_conn[base_id]
-                    base_str += "(%d,%d) " % (base.h, base.p)
-                self._logger.debug("bases: %s" % base_str)
-
-            # Get the rotation/translation at the start of the single-strand
-            # region.
-            i_1 = strand_pos[0] - 1
-            if (i_1 < 0):
-                i_1 = num_nt-1
-            R_1 = rotations[i_1]
-            d_1 = translations[i_1]
-
-            # Get the rotation/translation at the enb of the single-strand
-            # region.
-            if (not is_main[i_1]):
-                vrot = _vrrotvec2mat([0, 0, 1], pi)
-                R_1 = np.dot(R_1, vrot)
-            i_2 = strand_pos[-1] + 1
-            if (i_2 > num_nt-1):
-                i_2 = 0
-            R_2 = rotations[i_2]
-            d_2 = translations[i_2]
-            self._logger.debug("i_1 %d   i_2 %d " % (i_1, i_2))
-
-            if (not is_main[i_2]):
-                vrot = _vrrotvec2mat([0, 0, 1], pi)
-                R_2 = np.dot(R_2, vrot)
-
-            # Interpolate between the start/end rotation/translation.
-            R_fit, d_fit = self._fit_R_d(R_1, d_1, R_2, d_2, len(strand_pos))
-
-            # Update the rotations and translations.
-            for j in range(0, len(strand_pos)):
-                k = strand_pos[j]
-                is_main[k] = True
-                rotations[k] = R_fit[:, :, j]
-                translations[k] = d_fit[:, j]
-
-    def _find_single_strands(self, rotations, is_circular):
-        """ Find all regions in the strand that are not paired.
-
-            Arguments:
-                rotations (List[NumPy 3x3 array of floats]): The rotation
-                    matrix for each base in the strand.
-                is_circular (bool): If True then the strand is circular.
-
-            Returns:
-                single_strands (List(List[2])): A list of [start,end]
-                    single-strand locations within the strand.
-
-            Iterate through the strand 'rotations' array  to find bases that
-            are not paired.
-        """
-        num_nt = len(rotations)
-        is_visited = [False]*num_nt
-
-        for i in range(0, num_nt):
-            rmat = rotations[i]
-            if (rmat.size != 0):
-                is_visited[i] = True
-        # _for i
-
-        # Search for the start of a single-stranded region.
-        loop = 0
-        single_strands = []
-
-        while (True):
-            if False in is_visited:
-                i_0 = is_visited.index(False)
-            else:
-                break
-
-            single_strands.append([])
-
-            # Scan in the 5' direction.
-            i = i_0
-            while (not is_visited[i]):
-                is_visited[i] = True
-                single_strands[loop].append(i)
-
-                if (i > 0):
-                    i = i - 1
-                elif (is_circular):
-                    i = num_nt-1
-                else:
-                    break
-            # _while(not is_visited[i])
-
-            single_strands[-1] = []
-            is_visited[i_0] = False
-
-            # Scan in the 3' direction.
-            i = i_0
-            while(not is_visited[i]):
-                is_visited[i] = True
-                single_strands[loop].append(i)
-
-                if (i < num_nt-1):
-                    i = i + 1
-                elif (is_circular):
-                    i = 0
-                else:
-                    break
-            # _while(not is_visited[i])
-
-            loop = loop + 1
-        # _while(True)
-
-        return single_strands
+        num_nt = len(strand.tour)
+        if num_nt == 0 or strand.has_transform.all():
+            return
+        if not strand.has_transform.any():
+            self._logger.debug("No transforms for strand %d." % strand.id)
+            return
+
+        # Find all regions in the strand that are not paired, removing
+        # single-stranded regions with free ends.
+        starts, lengths = _find_runs(~strand.has_transform, strand.is_circular)
+        if not strand.is_circular:
+            is_free = (starts == 0) | (starts + lengths == num_nt)
+            starts = starts[~is_free]
+            lengths = lengths[~is_free]
+        self._logger.debug("Number of single_strands) %d " % len(starts))
+        if len(starts) == 0:
+            return
+
+        # Get the rotations/translations at the start and end of the
+        # single-strand regions, rotating those of bases that are not part of
+        # a scaffold by 180 degrees about the z-axis.
+        i_1 = (starts - 1) % num_nt
+        i_2 = (starts + lengths) % num_nt
+        vrot = _vrrotvec2mat([0, 0, 1], pi)
+        R_1 = strand.rotations[i_1]
+        R_2 = strand.rotations[i_2]
+        R_1[~strand.is_main[i_1]] = np.matmul(R_1[~strand.is_main[i_1]], vrot)
+        R_2[~strand.is_main[i_2]] = np.matmul(R_2[~strand.is_main[i_2]], vrot)
+        d_1 = strand.translations[i_1]
+        d_2 = strand.translations[i_2]
+
+        # Interpolate between the start/end rotation/translation and update
+        # the rotations and translations.
+        R_fit, d_fit = self._fit_R_d(R_1, d_1, R_2, d_2, lengths)
+        region_offsets = np.arange(lengths.sum()) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+        indices = (np.repeat(starts, lengths) + region_offsets) % num_nt
+        strand.rotations[indices] = R_fit
+        strand.translations[indices] = d_fit
+        strand.is_main[indices] = True
+        strand.has_transform[indices] = True
 
     def _fit_R_d(self, R_1, d_1, R_2, d_2, num_bases):
         """ This function interpolates the rotations and translations between
-        the start and end of a region in a strand.
+        the start and end of regions in a strand.
 
             Arguments:
-                R_1 (NumPy 3x3 array of floats): The rotation matix at the
-                    start of the strand region.
-                d_1 (NumPy 3x1 array of float): The translation vector at the
-                    start of the strand region.
-                R_2 (NumPy 3x3 array of floats): The rotation matix at the end
-                    of the strand region.
-                d_2 (NumPy 3x1 array of float): The translation vector at the
-                    end of the strand region.
-                num_bases (int): The number of bases in the strand region.
+                R_1 (NumPy Kx3x3 ndarray[float]): The rotation matices at the
+                    start of the strand regions.
+                d_1 (NumPy Kx3 ndarray[float]): The translation vectors at the
+                    start of the strand regions.
+                R_2 (NumPy Kx3x3 ndarray[float]): The rotation matices at the
+                    end of the strand regions.
+                d_2 (NumPy Kx3 ndarray[float]): The translation vectors at the
+                    end of the strand regions.
+                num_bases (NumPy K ndarray[int]): The number of bases in each
+                    strand region.
 
             Returns:
-                R_fit (List[NumPy 3x3 array of floats)]: The list of rotation
-                    matices from the start to the end of the strand region.
-                d_fit (List[NumPy 3x1 array of floats)]: The list of
-                    translation matices from the start to the end of the strand
-                    region.
+                R_fit (NumPy Nx3x3 ndarray[float]): The rotation matices from
+                    the start to the end of each strand region, for the N bases
+                    of all regions in region order.
+                d_fit (NumPy Nx3 ndarray[float]): The translation vectors from
+                    the start to the end of each strand region.
 
             Given the rotations and translations at the start of a strand
             region (R_1,d_1) and the rotations and translations at the end of a
@@ -609,83 +401,171 @@ class AtomicStructure(object):
             The angle of the (axis,angle) representation of R is then used to
             generate successive rotation matices.
         """
-        R_fit = np.zeros((3, 3, num_bases), dtype=float)
-        d_fit = np.zeros((3, num_bases), dtype=float)
-
         # Calculate R from right-inverse of R * R_1 = R_2.
-        R = np.dot(R_2, R_1.T)
+        R = np.matmul(R_2, np.transpose(R_1, (0, 2, 1)))
 
         # Extract angle/axis of rotation.
-        axis1, theta1 = _vrrotmat2vec(R_1)
-        axis2, theta2 = _vrrotmat2vec(R_2)
-        axis, theta = _vrrotmat2vec(R)
-        self._logger.debug("[_fit_R_d] theta  %g  axis  %g %g %g" %
-                           (theta, axis[0], axis[1], axis[2]))
-        self._logger.debug("[_fit_R_d] theta1 %g  axis1 %g %g %g" %
-                           (theta1, axis1[0], axis1[1], axis1[2]))
-        self._logger.debug("[_fit_R_d] theta2 %g  axis2 %g %g %g" %
-                           (theta2, axis2[0], axis2[1], axis2[2]))
-
-        # Interpolate rotations/translations.
-        for i in range(0, num_bases):
-            j = i+1
-            angle = (theta*j)/(num_bases+1)
-            self._logger.debug("[_fit_R_d] angle %g " % angle)
-            R = _vrrotvec2mat(axis, angle)
-            R_fit[:, :, i] = np.dot(R, R_1)
-            d_fit[:, i] = (d_1*(num_bases+1-j) + d_2*j) / (num_bases+1)
-
+        axis, theta = _vrrotmat2vec_batch(R)
+
+        # Interpolate rotations/translations for base j = 1 to num_bases of
+        # each region.
+        region = np.repeat(np.arange(len(num_bases)), num_bases)
+        j = np.arange(1, num_bases.sum()+1) - np.repeat(np.cumsum(num_bases) - num_bases, num_bases)
+        n = num_bases[region] + 1
+        angle = (theta[region]*j)/n
+        R_fit = np.matmul(_vrrotvec2mat_batch(axis[region], angle), R_1[region])
+        d_fit = (d_1[region]*(n-j)[:, np.newaxis] + d_2[region]*j[:, np.newaxis]) / n[:, np.newaxis]
         return R_fit, d_fit
 
     def get_extent(self):
         """ Get the extent of the atom coordinates.
+
+            Returns the tuple (xmin, xmax, ymin, ymax, zmin, zmax).
         """
-        xmin = 0.0
-        xmax = 0.0
-        ymin = 0.0
-        ymax = 0.0
-        zmin = 0.0
-        zmax = 0.0
-        num_atoms = 0
-
-        if len(self.molecules) == 0:
-            self.generate_structure()
-
-        for molecule in self.molecules:
-            for atom in molecule.atoms:
-                x = atom.coords[0]
-                y = atom.coords[1]
-                z = atom.coords[2]
-                if num_atoms == 0:
-                    xmin = xmax = x
-                    ymin = ymax = y
-                    zmin = zmax = z
-                else:
-                    if x < xmin:
-                        xmin = x
-                    elif x > xmax:
-                        xmax = x
-                    if y < ymin:
-                        ymin = y
-                    elif y > ymax:
-                        ymax = y
-                    if z < zmin:
-                        zmin = z
-                    elif z > zmax:
-                        zmax = z
-                num_atoms += 1
-
-        return xmin, xmax, ymin, ymax, zmin, zmax
+        coords = self.coordinates()
+        if len(coords) == 0:
+            return 0.0, 0.0, 0.0, 0.0, 0.0, 0.0
+        cmin = coords.min(axis=0).tolist()
+        cmax = coords.max(axis=0).tolist()
+        return cmin[0], cmax[0], cmin[1], cmax[1], cmin[2], cmax[2]
+
+    def coordinates(self, coords_dtype=None):
+        """ Get the coordinates of all the atoms of the dna model.
+
+            Arguments:
+                coords_dtype (NumPy dtype): The data type of the atom
+                    coordinates. If None then the coordinates of the atom table
+                    already generated are returned, or of an atom table
+                    generated with float coordinates.
+
+            Returns the NumPy Nx3 ndarray of atom coordinates, one row per atom
+            in strand order and then base order. This is the coordinates
+            column of the atom table, so it must not be modified.
+        """
+        if coords_dtype is None:
+            coords_dtype = float if self.atom_table is None else self.atom_table.coords.dtype
+        return self.get_atom_table(coords_dtype).coords
 
     # =========================================================================
     # ======================================= new ssDNA generation code =======
     # =========================================================================
 
     def generate_structure_ss(self):
-        """ Generate the atomic structure for the dna model. """
-        base_conn = self.dna_structure.base_connectivity
+        """ Generate the atomic structure for the dna model.
+
+            Returns the list of Molecule objects (List[Molecule]) created for
+            the strands of the dna model.
+        """
+        atom_table = self.generate_atom_table(coords_dtype=float)
+        self.molecules = atom_table.create_molecules()
+        self._logger.debug("Generated %d atomic structures. " %
+                           len(self.molecules))
+        return self.molecules
+
+    def generate_atom_table(self, coords_dtype=np.float32):
+        """ Generate the atomic structure for the dna model as an atom table.
+
+            Arguments:
+                coords_dtype (NumPy dtype): The data type of the atom
+                    coordinates.
+
+            Returns the AtomTable created for the strands of the dna model.
+        """
+        self._set_strand_transforms()
+
+        # Generate atomic structures from the dna strands.
+        with self._create_executor() as executor:
+            self.atom_table = self._generate_atom_table(self.strands, coords_dtype,
+                                                        executor=executor)
+        self._logger.debug("Generated %d atoms. " % len(self.atom_table))
+        return self.atom_table
+
+    def get_atom_table(self, coords_dtype=np.float32):
+        """ Get the atom table for the dna model, generating it if it has not
+            already been generated with the given coordinates data type.
+
+            Arguments:
+                coords_dtype (NumPy dtype): The data type of the atom
+                    coordinates.
+
+            Returns the AtomTable for the strands of the dna model.
+        """
+        if self.atom_table is None or self.atom_table.coords.dtype != coords_dtype:
+            self.generate_atom_table(coords_dtype)
+        return self.atom_table
+
+    def generate_atom_tables(self, max_chunk_bases=DEFAULT_CHUNK_BASES,
+                             coords_dtype=np.float32):
+        """ Generate the atomic structure for the dna model one chunk of
+            strands at a time.
+
+            Arguments:
+                max_chunk_bases (int): The number of bases after which a chunk
+                    of strands is generated. A strand is never split between
+                    chunks.
+                coords_dtype (NumPy dtype): The data type of the atom
+                    coordinates.
+
+            Returns a generator of AtomTable objects, one for each chunk of
+            strands. Atom IDs continue from one chunk to the next.
+
+            Only the atoms of the current chunk are stored in memory, so this
+            is used to write atomic structures of large designs.
+        """
+        self._set_strand_transforms()
+        with self._create_executor() as executor:
+            first_serial = 1
+            chunk = []
+            num_chunk_bases = 0
+            for strand in self.strands:
+                chunk.append(strand)
+                num_chunk_bases += len(strand.tour)
+                if num_chunk_bases >= max_chunk_bases:
+                    atom_table = self._generate_atom_table(chunk, coords_dtype,
+                                                           first_serial, executor)
+                    first_serial += len(atom_table)
+                    chunk = []
+                    num_chunk_bases = 0
+                    yield atom_table
+            if chunk:
+                yield self._generate_atom_table(chunk, coords_dtype,
+                                                first_serial, executor)
+
+    def get_extent_bound(self):
+        """ Get a bound on the extent of the atom coordinates without
+            generating atoms.
+
+            Returns the tuple (xmin, xmax, ymin, ymax, zmin, zmax).
+
+            The atoms of a base are its template atoms rotated about and
+            translated by its helix axis coordinates, so they lie within the
+            template radius of the base translation.
+        """
+        self._set_strand_transforms()
+        translations = [strand.translations[strand.has_transform]
+                        for strand in self.strands]
+        translations = np.concatenate(translations) if translations else np.zeros((0, 3))
+        if len(translations) == 0:
+            return 0.0, 0.0, 0.0, 0.0, 0.0, 0.0
+        radius = self._get_templates().get_radius()
+        cmin = (translations.min(axis=0) - radius).tolist()
+        cmax = (translations.max(axis=0) + radius).tolist()
+        return cmin[0], cmax[0], cmin[1], cmax[1], cmin[2], cmax[2]
+
+    def _set_strand_transforms(self):
+        """ Set the rotation, translation and sequence of the strand bases.
+
+            The first and third axes of a base reference frame are flipped each
+            time the frame is used. A frame shared by two paired bases is flipped
+            for the first base and restored for the second. The number of flips of
+            each frame is tracked here rather than modifying the frames in place,
+            so the DNA structure is not changed.
+        """
+        if self._strand_transforms_set:
+            return
+        self._strand_transforms_set = True
         self._logger.info("Generate atomic structure for ssDNA.")
-        self._logger.info("Number of bases  %d " % len(base_conn))
+        self._logger.info("Number of bases  %d " % len(self.dna_structure.base_connectivity))
 
         # Scale to convert base node coords in nm to angstroms.
         nm_to_ang = 10.0
@@ -694,7 +574,11 @@ class AtomicStructure(object):
         rot_mat = np.array([[0, 0, -1], [-1, 0, 0], [0, 1, 0]], dtype=float)
 
         # Create strands helix maps.
-        self.dna_structure.set_strand_helix_references()
+        self.dna_structure.strand_helix_refs
+
+        # Frames are identified by the memory they reference.
+        flip = np.array([-1.0, 1.0, -1.0])
+        is_flipped = {}
 
         # Set the rotation matrix, translation vector and sequence for strand
         # paired bases.
@@ -710,8 +594,10 @@ class AtomicStructure(object):
                 frame = base.ref_frame
                 self._logger.debug("base id %d  vh %d  pos %d " %
                                    (base.id, base.h, base.p))
-                frame[:, 0] = -frame[:, 0]
-                frame[:, 2] = -frame[:, 2]
+                key = (frame.__array_interface__['data'][0], frame.strides)
+                is_flipped[key] = not is_flipped.get(key, False)
+                if is_flipped[key]:
+                    frame = frame * flip
                 self._logger.debug("     frame[0] %g %g %g" % (
                     frame[0, 0], frame[1, 0], frame[2, 0]))
                 self._logger.debug("     frame[1] %g %g %g" % (
@@ -725,161 +611,336 @@ class AtomicStructure(object):
                     strand.seq[i] = base.seq
                 strand.rotations[i] = np.dot(frame, rot_mat)
                 strand.translations[i] = nm_to_ang*base_coords[i]
+                strand.has_transform[i] = True
 
         self._logger.debug(
             "=================== create bulges ==================")
         for strand in self.strands:
             self._logger.debug("---------- strand %d ---------- " % strand.id)
-            base = strand.tour[0]
-            rotations = strand.rotations
-            translations = strand.translations
-            is_main = strand.is_main
-            is_circular = strand.is_circular
-            seq = strand.seq
-
-            self._generate_bulge_dof(
-                strand, rotations, translations, is_main, is_circular)
-
-            strand.rotations = rotations
-            strand.translations = translations
-            strand.is_main = is_main
-
-            for i in range(0, len(seq)):
-                if (seq[i] == 'N'):
-                    base_index = strand.tour[i]-1
-                    strand.seq[i] = base_conn[base_index].seq
-            # _for i in range(0,len(seq))
+            self._generate_bulge_dof(strand)
 
-        # Generate atomic structures from the dna strands.
-        self.molecules = self._generate_atoms_ss(self.strands)
-        self._logger.debug("Generated %d atomic structures. " %
-                           len(self.molecules))
-        return self.molecules
+    def _get_templates(self):
+        """ Get the base template structures shared by all atomic structures.
+        """
+        if self._templates is None:
+            self._templates = get_atom_templates()
+        return self._templates
 
-    def _generate_atoms_ss(self, strands):
-        """ Generate atomic structures from the dna strands.
+    def _create_executor(self):
+        """ Create the pool of processes used to transform the base templates.
+
+            Returns a ProcessPoolExecutor whose processes are given the base
+            templates when they start, or a context returning None if
+            max_workers is 1.
+        """
+        if self.max_workers <= 1:
+            return contextlib.nullcontext()
+        return ProcessPoolExecutor(max_workers=self.max_workers,
+                                   initializer=_init_worker_templates,
+                                   initargs=(self._get_templates(),))
+
+    def _generate_atom_table(self, strands, coords_dtype, first_serial=1,
+                             executor=None):
+        """ Generate the atoms for a list of strands.
 
             Arguments:
                 strands (List[AtomicStructureStrand]): The list of atomic
                     stucture strands to create atoms for.
+                coords_dtype (NumPy dtype): The data type of the atom
+                    coordinates.
+                first_serial (int): The ID of the first atom.
+                executor (ProcessPoolExecutor): The pool of processes used to
+                    transform the base templates, or None to transform them in
+                    this process.
+
+            Returns the AtomTable storing the atoms of the strands.
+
+            When an executor is given the strands are split into contiguous
+            shards with about the same number of bases, one per process. Each
+            process returns the coordinates and template rows of the atoms of
+            its shard and the number of atoms of each of its strands. The
+            shards are concatenated in strand order and the offsets of the
+            molecules are the prefix sums of the strand atom counts, so the
+            atoms and their IDs are the same as when generated in this process.
         """
         self._logger.debug(
-            "=================== _generate_atoms_ss ==================")
-        # Read template structures, seperating atoms into forward (5'->3') and
-        # reverse chains.
-        A_for, T_rev = self._read_template(
-            AtomicStructure.TEMPLATE_PDB_STRUCTURE_FILE_A)
-        G_for, C_rev = self._read_template(
-            AtomicStructure.TEMPLATE_PDB_STRUCTURE_FILE_G)
-        C_for, G_rev = self._read_template(
-            AtomicStructure.TEMPLATE_PDB_STRUCTURE_FILE_C)
-        T_for, A_rev = self._read_template(
-            AtomicStructure.TEMPLATE_PDB_STRUCTURE_FILE_T)
-
-        # Create a dict mapping base name to forward and reverse structures.
-        forward_struct = {DnaBaseNames.A: A_for, DnaBaseNames.C: C_for,
-                          DnaBaseNames.G: G_for, DnaBaseNames.T: T_for}
-        reverse_struct = {DnaBaseNames.A: A_rev, DnaBaseNames.C: C_rev,
-                          DnaBaseNames.G: G_rev, DnaBaseNames.T: T_rev}
-
-        molecular_structures = []
-        # num_strands = len(strands)
-        first_atomID = 1     # serial number for the first atom in a tour
-
-        # Create a Molecule object containing the atoms for each strand.
+            "=================== _generate_atom_table ==================")
+        templates = self._get_templates()
+
+        # Gather the transformation and template of each base.
+        rotations = []
+        translations = []
+        template_ids = []
+        res_seq = []
+        num_strand_bases = []
         for strand in strands:
-            molecule, first_atomID = self._create_atoms_from_strand_ss(
-                strand, forward_struct, reverse_struct, first_atomID)
-            molecular_structures.append(molecule)
+            indices = []
+            for i in np.flatnonzero(strand.has_transform).tolist():
+                base_name = strand.seq[i].upper()
+                template_id = templates.get_index(base_name, strand.is_main[i])
+                if template_id is None:
+                    self._logger.warning("base(%d)='%s' not found." % (i, base_name))
+                    continue
+                indices.append(i)
+                template_ids.append(template_id)
+                res_seq.append(i+1)
+            rotations.append(strand.rotations[indices])
+            translations.append(strand.translations[indices])
+            num_strand_bases.append(len(indices))
+        template_ids = np.array(template_ids, dtype=int)
+        num_strand_bases = np.array(num_strand_bases, dtype=int)
+
+        # A 180 degree rotation about the y-axis is applied to the base
+        # rotations.
+        if len(template_ids) != 0:
+            R = np.matmul(np.concatenate(rotations), _Ry(180.0))
+            D = np.concatenate(translations)
+        else:
+            R = np.zeros((0, 3, 3))
+            D = np.zeros((0, 3))
+
+        # Transform the template atoms of each shard of strands.
+        num_shards = 1 if executor is None else min(self.max_workers, len(strands))
+        strand_bounds = _split_strands(num_strand_bases, num_shards)
+        base_bounds = np.concatenate(([0], np.cumsum(num_strand_bases)))[strand_bounds]
+        shards = [(R[b0:b1], D[b0:b1], template_ids[b0:b1], num_strand_bases[s0:s1], coords_dtype)
+                  for s0, s1, b0, b1 in zip(strand_bounds[:-1], strand_bounds[1:],
+                                            base_bounds[:-1], base_bounds[1:])]
+        if executor is None:
+            results = [_transform_templates(templates, *shard) for shard in shards]
+        else:
+            self._logger.debug("Transform templates for %d shards using %d processes" %
+                               (len(shards), self.max_workers))
+            results = list(executor.map(_transform_templates_worker, *zip(*shards)))
+        coords = np.concatenate([result[0] for result in results])
+        template_rows = np.concatenate([result[1] for result in results])
+        num_strand_atoms = np.concatenate([result[2] for result in results])
+
+        # Set the per-atom base data.
+        base_sizes = templates.sizes[template_ids]
+        strand_of_base = np.repeat(np.arange(len(strands)), num_strand_bases)
+        molecule_offsets = np.concatenate(([0], np.cumsum(num_strand_atoms)))
+
+        return AtomTable(
+            templates.names[template_rows],
+            templates.res_names[template_rows],
+            templates.elements[template_rows],
+            np.repeat(np.array(res_seq, dtype=np.int32), base_sizes),
+            np.repeat(strand_of_base.astype(np.int32), base_sizes),
+            coords,
+            [strand.chainID for strand in strands],
+            [strand.id for strand in strands],
+            molecule_offsets,
+            first_serial)
+
+
+def _split_strands(num_strand_bases, num_shards):
+    """ Split a list of strands into contiguous shards with about the same
+        number of bases.
+
+        Arguments:
+            num_strand_bases (NumPy N ndarray[int]): The number of bases of
+                each strand.
+            num_shards (int): The number of shards to split the strands into.
+
+        Returns the index of the first strand of each shard followed by the
+        number of strands (NumPy ndarray[int]). Shards are never empty unless
+        there are no strands.
+    """
+    num_strands = len(num_strand_bases)
+    if num_shards <= 1 or num_strands <= 1:
+        return np.array([0, num_strands], dtype=int)
+    ends = np.cumsum(num_strand_bases)
+    targets = ends[-1] * np.arange(1, num_shards) / num_shards
+    splits = np.searchsorted(ends, targets, side='right')
+    return np.unique(np.concatenate(([0], np.clip(splits, 1, num_strands-1), [num_strands])))
+
+
+def _transform_templates(templates, rotations, translations, template_ids,
+                         num_strand_bases, coords_dtype):
+    """ Transform the base templates by the rotation and translation of the
+        bases of a list of strands.
+
+        Arguments:
+            templates (AtomTemplates): The base templates.
+            rotations (NumPy Nx3x3 ndarray[float]): The base rotations.
+            translations (NumPy Nx3 ndarray[float]): The base translations.
+            template_ids (NumPy N ndarray[int]): The template index of each
+                base.
+            num_strand_bases (NumPy S ndarray[int]): The number of bases of
+                each strand.
+            coords_dtype (NumPy dtype): The data type of the atom coordinates.
+
+        Returns the tuple (coords, template_rows, num_strand_atoms) giving the
+        coordinates and template row of the atoms, in base order, and the
+        number of atoms of each strand.
+
+        The templates are transformed using whole-array operations, one
+        template at a time.
+    """
+    num_bases = len(template_ids)
+    base_sizes = templates.sizes[template_ids]
+    base_starts = np.concatenate(([0], np.cumsum(base_sizes)))
+    num_atoms = int(base_starts[-1])
+    base_of_atom = np.repeat(np.arange(num_bases), base_sizes)
+
+    coords = np.zeros((num_atoms, 3), dtype=coords_dtype)
+    for k in range(templates.num_templates):
+        bases = np.flatnonzero(template_ids == k)
+        if len(bases) == 0:
+            continue
+        template_coords = templates.get_coords(k)
+        xform_coords = np.einsum('bij,mj->bmi', rotations[bases], template_coords)
+        xform_coords += translations[bases, np.newaxis, :]
+        rows = base_starts[bases, np.newaxis] + np.arange(len(template_coords))
+        coords[rows] = xform_coords
+
+    template_rows = (np.arange(num_atoms) - base_starts[base_of_atom] +
+                     templates.offsets[template_ids][base_of_atom])
+    num_strand_atoms = np.diff(base_starts[np.concatenate(([0], np.cumsum(num_strand_bases)))])
+    return coords, template_rows, num_strand_atoms
+
+
+def _init_worker_templates(templates):
+    """ Set the base templates used by a worker process. """
+    global _worker_templates
+    _worker_templates = templates
+
+
+def _transform_templates_worker(rotations, translations, template_ids,
+                                num_strand_bases, coords_dtype):
+    """ Transform the base templates in a worker process using the templates
+        it was given when it started.
+    """
+    return _transform_templates(_worker_templates, rotations, translations,
+                                template_ids, num_strand_bases, coords_dtype)
 
-        return molecular_structures
 
-    def _create_atoms_from_strand_ss(self, strand, forward_struct,
-                                     reverse_struct, first_atomID_in):
-        """ Create the atoms for the list of bases in a strand.
+def _read_template(infile_name):
+    """ Read a template structure from a PDB file.
 
-            Arguments:
-                strand (AtomicStructureStrand): The input strand to create an
-                    atomistic structure from.
-                forward_struct (Dict{String:List[Atom]}: A dictionary mapping a
-                    base name to a forward structure.
-                reverse_struct (Dict{String:List[Atom]}: A dictionary mapping a
-                    base name to a reverse structure.
-                first_atomID_in (int): The current atom ID.
+        Arguments:
+            infile_name (String): The name of the template structure file
+                to read.
 
-            Returns:
-                molecule (Molecule):  A Molecule object containing the strand
-                    atoms.
-                first_atomID_out (int): The current atom ID of the last atom
-                    created for the input the strand.
+        Returns:
+            forward_struct (List[Atom]): The list of atoms for the forward
+                dna strand.
+            reverse_struct (List[Atom]): The list of atoms for the reverse
+                dna strand.
 
-            A Molecule object is created to store the atoms for the strand
-            structure.
-        """
-        self._logger.debug(
-            "=================== _create_atoms_from_strand_ss =================== ")
-        self._logger.debug("Strand %d " % strand.id)
-        self._logger.debug("Number of bases %d " % len(strand.tour))
-        self._logger.debug("Scaffold %d " % strand.is_scaffold)
-        # base_conn = strand.dna_strand.dna_structure.base_connectivity
-        base = strand.tour[0]
-        self._logger.debug("Start helix %d  position %d" % (base.h, base.p))
-        first_atomID_out = first_atomID_in
-        # max_atom_per_base = 40
-        num_bases = len(strand.tour)
-        self._logger.debug("first_atomID_in %d " % first_atomID_in)
-
-        # Create a Molecule object to store the atoms for the strand structure.
-        molecule = Molecule(strand.id)
-
-        # Create a rotation matrix for a 180 degree rotation about the y-axis.
-        Ry180 = _Ry(180.0)
-
-        # Build up a structure from the strand bases.
-        atom_index = 1
-        for i in range(0, num_bases):
-            strand_R = strand.rotations[i]
-            if (strand_R.size == 0):
-                continue
-            base_name = strand.seq[i].upper()
-            self._logger.debug(
-                "---------- base(%d)='%s' ---------- " % (i, base_name))
-
-            if base_name not in forward_struct:
-                self._logger.warn("base(%d)='%s' not found." % (i, base_name))
-                continue
-
-            # Get the rotation and translation for the base.
-            R = np.dot(strand_R, Ry180)
-            D = strand.translations[i]
-
-            # Get the structure for the base. If is_main[i] is True then the
-            # base is for a scaffold.
-            if (strand.is_main[i]):
-                current_struct = forward_struct[base_name]
-            else:
-                current_struct = reverse_struct[base_name]
-
-            # Duplicate and transform the atoms in the reference structure.
-            num_atoms = len(current_struct)
-            for j in range(0, num_atoms):
-                current_atom = current_struct[j].dupe()
-                current_atom.id = first_atomID_out
-                current_atom.chainID = strand.chainID
-                first_atomID_out = first_atomID_out+1
-                current_atom.res_seq_num = i+1
-                # coords = current_atom.coords
-                # Transform the atom coordinates.
-                xform_coord = current_atom.coords
-                xform_coord = np.dot(R, xform_coord)
-                xform_coord = np.add(xform_coord, D)
-                self._logger.debug(" atom id %d  name %s  coord (%g %g %g)" % (
-                    current_atom.id, current_atom.name,
-                    xform_coord[0], xform_coord[1], xform_coord[2]))
-                current_atom.coords = xform_coord
-                molecule.add_atom(current_atom)
-                atom_index = atom_index+1
-
-        # _for i in range(0,num_bases)
-
-        return molecule, first_atomID_out
+        In the reference structure:
+            forward strand chainID = S
+            backward strand chainID = A
+    """
+    forward_struct = []
+    reverse_struct = []
+
+    # Read in the template structure.
+    file_name = os.path.join(dna_pdb_templates_dir, infile_name)
+    reader = PdbReader()
+    reader.read(file_name)
+    molecules = reader.molecules
+    molecule = molecules[0]
+
+    # Create rotation matrix for a -90 deg rotation about x-axis
+    # followed by a -90 deg rotation about y-axis.
+    R = np.dot(_Ry(-90), _Rx(-90))
+
+    # Group atoms into forward/backward chains.
+    for atom in molecule.atoms:
+        # Transform and store atom for the forward reference structure.
+        if (atom.chainID == 'S') and (atom.res_seq_num == 2):
+            atom.id = -1
+            atom.res_seq_num = -1
+            xform_coord = atom.coords
+            xform_coord = np.dot(R, xform_coord)
+            atom.coords = xform_coord
+            atom.chainID = 'A'
+            forward_struct.append(atom)
+
+        # Transform and store atom for the backward reference structure.
+        elif (atom.chainID == 'A') and (atom.res_seq_num == 2):
+            atom.id = -1
+            atom.res_seq_num = -1
+            xform_coord = atom.coords
+            xform_coord = np.dot(R, xform_coord)
+            atom.coords = xform_coord
+            reverse_struct.append(atom)
+
+    return forward_struct, reverse_struct
+
+
+def _read_atom_templates():
+    """ Read the template structures for all bases.
+
+        Returns the AtomTemplates object storing the templates.
+    """
+    # Read template structures, seperating atoms into forward (5'->3') and
+    # reverse chains.
+    A_for, T_rev = _read_template(
+        AtomicStructure.TEMPLATE_PDB_STRUCTURE_FILE_A)
+    G_for, C_rev = _read_template(
+        AtomicStructure.TEMPLATE_PDB_STRUCTURE_FILE_G)
+    C_for, G_rev = _read_template(
+        AtomicStructure.TEMPLATE_PDB_STRUCTURE_FILE_C)
+    T_for, A_rev = _read_template(
+        AtomicStructure.TEMPLATE_PDB_STRUCTURE_FILE_T)
+
+    # Create a dict mapping base name to forward and reverse structures.
+    forward_struct = {DnaBaseNames.A: A_for, DnaBaseNames.C: C_for,
+                      DnaBaseNames.G: G_for, DnaBaseNames.T: T_for}
+    reverse_struct = {DnaBaseNames.A: A_rev, DnaBaseNames.C: C_rev,
+                      DnaBaseNames.G: G_rev, DnaBaseNames.T: T_rev}
+    return AtomTemplates(forward_struct, reverse_struct)
+
+
+def _get_template_files():
+    """ Get the names of the template PDB files. """
+    return [os.path.join(dna_pdb_templates_dir, file_name) for file_name in
+            (AtomicStructure.TEMPLATE_PDB_STRUCTURE_FILE_A,
+             AtomicStructure.TEMPLATE_PDB_STRUCTURE_FILE_G,
+             AtomicStructure.TEMPLATE_PDB_STRUCTURE_FILE_C,
+             AtomicStructure.TEMPLATE_PDB_STRUCTURE_FILE_T)]
+
+
+def get_atom_templates():
+    """ Get the base templates shared by all atomic structures.
+
+        Returns the AtomTemplates object storing the templates.
+
+        The templates are created once per process. They are loaded from
+        ATOM_TEMPLATES_FILE if it exists and is newer than the template PDB
+        files, otherwise they are read from the PDB files and transformed.
+    """
+    global _atom_templates
+    with _atom_templates_lock:
+        if _atom_templates is None:
+            _atom_templates = _load_atom_templates()
+        return _atom_templates
+
+
+def _load_atom_templates():
+    """ Load the base templates from ATOM_TEMPLATES_FILE if it is up to date,
+        otherwise read them from the template PDB files.
+    """
+    logger = logging.getLogger(__name__)
+    try:
+        file_time = os.path.getmtime(ATOM_TEMPLATES_FILE)
+        if file_time >= max(os.path.getmtime(file_name) for file_name in _get_template_files()):
+            logger.debug("Load atom templates from %s" % ATOM_TEMPLATES_FILE)
+            return AtomTemplates.load(ATOM_TEMPLATES_FILE)
+        logger.debug("Atom templates file %s is out of date" % ATOM_TEMPLATES_FILE)
+    except (OSError, ValueError, KeyError) as error:
+        logger.debug("Can't load atom templates from %s: %s" % (ATOM_TEMPLATES_FILE, error))
+    return _read_atom_templates()
+
+
+def save_atom_templates(file_name=ATOM_TEMPLATES_FILE):
+    """ Save the transformed base templates to a file so that later processes
+        load them without reading the template PDB files.
+
+        Arguments:
+            file_name (String): The name of the file to write.
+    """
+    get_atom_templates().save(file_name)
@@ -19,7 +19,8 @@ This module defines the classes used to create an atomic representation of a
 DNA structure.
 
 A Molecule object is created for each AtomicStructureStrand object. It contains
-a list of atoms for a strand.
+a list of atoms for a strand. An AtomTable stores the atoms of all strands as
+columns of NumPy arrays.
 
 """
 from collections import OrderedDict
@@ -98,3 +99,90 @@ class Molecule(object):
             # self.residues[atom.res_seq_num] = []
             self.residues[atom.res_seq_num] = {}
         self.residues[atom.res_seq_num][atom.name.strip()] = atom
+
+
+class AtomTable(object):
+    """ This class stores the atoms of an atomic structure as NumPy arrays.
+
+        Attributes:
+            chain_ids (List[string]): The chain ID of each molecule.
+            chain_index (NumPy N ndarray[int32]): The index into chain_ids of
+                the chain each atom belongs to.
+            coords (NumPy Nx3 ndarray[float32]): The atom coordinates.
+            elements (NumPy N ndarray[str]): The atom element names.
+            molecule_ids (List[int]): The ID of each molecule.
+            molecule_offsets (NumPy M+1 ndarray[int]): The index of the first
+                atom of each molecule; the atoms of molecule i are in rows
+                molecule_offsets[i] to molecule_offsets[i+1]-1.
+            names (NumPy N ndarray[str]): The atom names (e.g. 'OP1').
+            res_names (NumPy N ndarray[str]): The names of the residues the
+                atoms belong to (e.g. 'DT').
+            res_seq (NumPy N ndarray[int32]): The residue sequence numbers.
+            serial (NumPy N ndarray[int64]): The atom IDs.
+
+        An AtomTable stores the same data as a list of Molecule objects, one
+        row per atom, without creating an Atom object for each atom. Each
+        molecule is stored as a contiguous range of rows.
+    """
+
+    def __init__(self, names, res_names, elements, res_seq, chain_index,
+                 coords, chain_ids, molecule_ids, molecule_offsets,
+                 first_serial=1):
+        self.names = names
+        self.res_names = res_names
+        self.elements = elements
+        self.res_seq = res_seq
+        self.chain_index = chain_index
+        self.coords = coords
+        self.chain_ids = chain_ids
+        self.molecule_ids = molecule_ids
+        self.molecule_offsets = molecule_offsets
+        self.serial = np.arange(first_serial, first_serial+len(names),
+                                dtype=np.int64)
+
+    def __len__(self):
+        return len(self.names)
+
+    def get_molecule_rows(self, index):
+        """ Get the range of rows for a molecule.
+
+            Arguments:
+                index (int): The index of the molecule in molecule_ids.
+
+            Returns the slice of the rows storing the atoms of the molecule.
+        """
+        return slice(self.molecule_offsets[index],
+                     self.molecule_offsets[index+1])
+
+    def get_extent(self):
+        """ Get the extent of the atom coordinates.
+
+            Returns the tuple (xmin, xmax, ymin, ymax, zmin, zmax).
+        """
+        if len(self) == 0:
+            return 0.0, 0.0, 0.0, 0.0, 0.0, 0.0
+        cmin = self.coords.min(axis=0).tolist()
+        cmax = self.coords.max(axis=0).tolist()
+        return cmin[0], cmax[0], cmin[1], cmax[1], cmin[2], cmax[2]
+
+    def create_molecules(self):
+        """ Create a list of Molecule objects from the table.
+
+            Returns the list of Molecule objects (List[Molecule]), one for
+            each molecule in the table.
+        """
+        molecules = []
+        for index, model_id in enumerate(self.molecule_ids):
+            molecule = Molecule(model_id)
+            rows = self.get_molecule_rows(index)
+            chain_id = self.chain_ids[index]
+            for serial, name, res_name, res_seq, coords, element in zip(
+                    self.serial[rows].tolist(), self.names[rows].tolist(),
+                    self.res_names[rows].tolist(),
+                    self.res_seq[rows].tolist(), self.coords[rows].tolist(),
+                    self.elements[rows].tolist()):
+                molecule.add_atom(Atom(serial, name, res_name, chain_id,
+                                       res_seq, coords[0], coords[1],
+                                       coords[2], element))
+            molecules.append(molecule)
+        return molecules
@@ -42,6 +42,9 @@ class CifWriter(object):
         Attributes:
             dna_structure (DnaStructure) : The dna structure to convert to an atomic structure and write to a CIF file.
             entityID (int): The CIF entiy ID for the dna structure.
+            streaming (bool): If True then atoms are generated and written one chunk of strands at a time.
+            atomic_structure (AtomicStructure): The atomic structure created for the dna structure, or None if
+                it is created when writing.
     """
 
     # Define some constants used in the CIF file.
@@ -51,15 +54,20 @@ class CifWriter(object):
     COMMENT_SPACES = "#\n#\n"
     LOOP = "loop_\n"
 
-    def __init__(self, dna_structure):
+    def __init__(self, dna_structure, streaming=False, atomic_structure=None):
         """
             Initialize the CifWriter object.
 
             Arguments:
                 dna_structure (DnaStructure) : The dna structure to convert to an
                     atomic structure and write to a CIF file.
+                streaming (bool): If True then atoms are generated and written one chunk of strands at a time.
+                atomic_structure (AtomicStructure): An atomic structure already created for the dna structure,
+                    so that its atom table can be shared with other writers.
         """
         self.dna_structure = dna_structure
+        self.streaming = streaming
+        self.atomic_structure = atomic_structure
         self.entityID = 1
         self._logger = logging.getLogger(__name__)
 
@@ -80,14 +88,16 @@ class CifWriter(object):
 
         # Generate atomic models of the dna structure. A list of Molecule objects is
         # created for each strand.
-        atomic_structure = AtomicStructure(dna_structure)
-        molecules = atomic_structure.generate_structure_ss()  # converts ssDNA
-        # molecules = atomic_structure.generate_structure()
-        self._logger.info("Number of molecules %d " % len(molecules))
-        num_atoms = 0
-        for molecule in molecules:
-            num_atoms += len(molecule.atoms)
-        self._logger.info("Number of atoms %d " % num_atoms)
+        atomic_structure = self.atomic_structure
+        if atomic_structure is None:
+            atomic_structure = AtomicStructure(dna_structure)
+        self._logger.info("Number of molecules %d " % len(atomic_structure.strands))
+        if self.streaming:
+            atom_tables = atomic_structure.generate_atom_tables(coords_dtype=float)  # converts ssDNA
+        else:
+            atom_table = atomic_structure.get_atom_table(coords_dtype=float)  # converts ssDNA
+            atom_tables = [atom_table]
+            self._logger.info("Number of atoms %d " % len(atom_table))
 
         # Write the CIF file.
         with open(file_name, 'w') as cif_file:
@@ -96,7 +106,7 @@ class CifWriter(object):
             self._write_struct_records(cif_file, informat, infile)
             self._write_entity_records(cif_file, atomic_structure.strands)
             self._write_struct_asym_records(cif_file, atomic_structure.strands)
-            self._write_atom_site_records(cif_file, molecules)
+            self._write_atom_site_records(cif_file, atom_tables)
         self._logger.info("Done.")
 
     def _write_struct_records(self, cif_file, informat, infile):
@@ -176,15 +186,15 @@ class CifWriter(object):
                 strand.chainID, self.entityID, CifWriter.EMPTY_FIELD))
         cif_file.write(CifWriter.COMMENT_SPACES)
 
-    def _write_atom_site_records(self, cif_file, molecules):
+    def _write_atom_site_records(self, cif_file, atom_tables):
         """ Write CIF _atom_site records.
 
             Arguments:
                 cif_file (file): The file object used to write the CIF file.
-                molecules(List[AtomicStructureMolecule]): The list of the molecules for the DNA atomic structure.
+                atom_tables (Iterable[AtomTable]): The tables of the atoms for the DNA atomic structure.
 
             The CIF _atom_site records describe the atom data for the DNA structure. The atom data is obtained
-            from a Molecule object.
+            from AtomTable objects, each table written as it is obtained.
         """
 
         # Define an OrderedDict of field names,values and print('format. ')
@@ -245,24 +255,22 @@ class CifWriter(object):
             cif_file.write("_atom_site.%s\n" % name)
 
         # Write atom data.
-        for molecule in molecules:
-            for atom in molecule.atoms:
-                id = atom.id
-                type_symbol = atom.element
-                label_atom_id = atom.name
-                label_comp_id = atom.res_name
-                label_asym_id = atom.chainID
-                label_seq_id = atom.res_seq_num
-                Cartn_x = atom.coords[0]
-                Cartn_y = atom.coords[1]
-                Cartn_z = atom.coords[2]
-                auth_seq_id = atom.res_seq_num
-                auth_comp_id = atom.res_name
-                auth_asym_id = atom.chainID
-                auth_atom_id = atom.name
-                cif_file.write(format % (
+        for atom_table in atom_tables:
+            chain_ids = atom_table.chain_ids
+            records = []
+            for id, type_symbol, label_atom_id, label_comp_id, chain_index, label_seq_id, (Cartn_x, Cartn_y, Cartn_z) \
+                    in zip(atom_table.serial.tolist(), atom_table.elements.tolist(), atom_table.names.tolist(),
+                           atom_table.res_names.tolist(), atom_table.chain_index.tolist(), atom_table.res_seq.tolist(),
+                           atom_table.coords.tolist()):
+                label_asym_id = chain_ids[chain_index]
+                auth_seq_id = label_seq_id
+                auth_comp_id = label_comp_id
+                auth_asym_id = label_asym_id
+                auth_atom_id = label_atom_id
+                records.append(format % (
                     "ATOM ", id, type_symbol, label_atom_id, label_alt_id, label_comp_id, label_asym_id,
                     label_entity_id, label_seq_id, pdbx_PDB_ins_code, Cartn_x, Cartn_y, Cartn_z, occupancy,
                     B_iso_or_equiv, Cartn_x_esd, Cartn_y_esd, Cartn_z_esd, occupancy_esd, B_iso_or_equiv_esd,
                     pdbx_formal_charge, auth_seq_id, auth_comp_id, auth_asym_id, auth_atom_id, pdbx_PDB_model_num)
                 )
+            cif_file.write("".join(records))
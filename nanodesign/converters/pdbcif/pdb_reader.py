@@ -18,10 +18,17 @@ models of DNA nanodesigns.
 
 The PDB files are used as templates to create atomic models for nanodesigns.
 Only ATOM records are read.
+
+Large PDB files (e.g. atomic models written for nanodesigns or simulation
+output) are read using PdbAtomTableReader, which reads the atoms of each model
+into AtomTable objects one chunk of lines at a time without creating Atom
+objects.
 """
 import logging
 
-from .atomic_types import Molecule, Atom
+import numpy as np
+
+from .atomic_types import AtomTable, Molecule, Atom
 
 # PDB ATOM record format.
 ATOM_FORMAT = (
@@ -29,11 +36,23 @@ ATOM_FORMAT = (
 )
 
 
+# The approximate number of bytes of a PDB file read and parsed at a time by
+# PdbAtomTableReader.
+DEFAULT_CHUNK_BYTES = 1 << 24
+
+# The width of the records parsed by PdbAtomTableReader; shorter records are
+# padded with spaces.
+RECORD_WIDTH = 80
+
+
 class PdbRecordTypes(object):
     """ PDB record names. """
     ATOM = "ATOM"
+    ENDMDL = "ENDMDL"
+    HETATM = "HETATM"
+    MODEL = "MODEL"
     TER = "TER"
-    names = [ATOM, TER]
+    names = [ATOM, ENDMDL, HETATM, MODEL, TER]
 
 
 class PdbReader(object):
@@ -99,3 +118,256 @@ class PdbReader(object):
     def process_ter(self, line):
         """ Process a PDB TER record. """
         pass
+
+
+class PdbAtomTableReader(object):
+    """ The PdbAtomTableReader class reads the atoms of a PDB format .pdb file
+        into AtomTable objects.
+
+        Attributes:
+            chunk_bytes (int): The approximate number of bytes of the file read
+                and parsed at a time by read_chunks().
+            coords_dtype (NumPy dtype): The data type of the atom coordinates.
+
+        The ATOM and HETATM records of a chunk of lines are stored as rows of
+        a fixed-width byte array and their fields are sliced from the fixed
+        PDB columns and converted using whole-array operations.
+
+        The atoms of each model are stored in a separate table; a file without
+        MODEL records is read as model 1. A molecule is a run of atoms with the
+        same chain ID ended by a TER, MODEL or ENDMDL record. The molecule IDs
+        of a model are numbered from 1. The table serial numbers are read from
+        the file, or numbered from 1 in each model if they are not decimal
+        integers (e.g. the hexadecimal serial numbers written by some programs
+        for more than 99999 atoms). Residue sequence numbers are decimal or
+        hybrid-36 integers (e.g. 'A000' for residue 10000); a residue sequence
+        number field that is neither (e.g. blank) is read as 0.
+    """
+
+    def __init__(self, chunk_bytes=DEFAULT_CHUNK_BYTES, coords_dtype=float):
+        self.chunk_bytes = chunk_bytes
+        self.coords_dtype = coords_dtype
+        self._logger = logging.getLogger(__name__)
+
+    def read(self, file_name):
+        """ Read all the atoms of a .pdb file.
+
+            Arguments:
+                file_name (string): The name of the PDB file to read.
+
+            Returns a list of (model number, AtomTable) tuples, one for each
+            model in the file.
+        """
+        return list(self._read_tables(file_name, None))
+
+    def read_chunks(self, file_name):
+        """ Read the atoms of a .pdb file one chunk of lines at a time.
+
+            Arguments:
+                file_name (string): The name of the PDB file to read.
+
+            Returns a generator of (model number, AtomTable) tuples. A model
+            may be split between several tables and a molecule split between
+            tables has the same ID in each of them. Only the atoms of the
+            current chunk are stored in memory.
+        """
+        return self._read_tables(file_name, self.chunk_bytes)
+
+    def _read_tables(self, file_name, chunk_bytes):
+        """ Read the atoms of a .pdb file, chunk_bytes of the file at a time or
+            all at once if chunk_bytes is None.
+        """
+        self._logger.info("Reading PDB file %s " % file_name)
+        state = _PdbReadState()
+        num_atoms = 0
+        with open(file_name, "rb") as pdb_file:
+            while True:
+                if chunk_bytes is None:
+                    data = pdb_file.read()
+                else:
+                    # Read whole lines.
+                    data = pdb_file.read(chunk_bytes) + pdb_file.readline()
+                if not data:
+                    break
+                for model_num, atom_table in self._read_records(data.splitlines(), state):
+                    num_atoms += len(atom_table)
+                    yield model_num, atom_table
+        self._logger.info("Done.")
+        self._logger.info("Read %d atoms." % num_atoms)
+
+    def _read_records(self, lines, state):
+        """ Create the atom tables for the records in a chunk of lines.
+
+            Arguments:
+                lines (List[bytes]): The chunk of lines.
+                state (_PdbReadState): The state of the file read before the
+                    chunk, updated for the chunk.
+
+            Returns a generator of (model number, AtomTable) tuples.
+        """
+        records = np.array(lines, dtype="S%d" % RECORD_WIDTH)
+        columns = records.view(np.uint8).reshape(len(records), RECORD_WIDTH)
+        columns[columns == 0] = ord(" ")
+        rec_types = _get_field(columns, 0, 6)
+        is_atom = (rec_types == b"ATOM  ") | (rec_types == b"HETATM")
+        is_ter = rec_types == b"TER   "
+
+        # Split the records at the MODEL and ENDMDL records.
+        is_model = rec_types == b"MODEL "
+        model_records = np.flatnonzero(is_model | (rec_types == b"ENDMDL")).tolist()
+        start = 0
+        for end in model_records + [len(records)]:
+            atom_table = self._create_atom_table(columns[start:end], is_atom[start:end], is_ter[start:end], state)
+            if atom_table is not None:
+                yield state.model_num, atom_table
+            if end == len(records):
+                break
+            if is_model[end]:
+                state.start_model(_parse_int(columns[end, 10:14], state.model_num + 1))
+            else:
+                state.end_molecule()
+            start = end + 1
+
+    def _create_atom_table(self, columns, is_atom, is_ter, state):
+        """ Create the atom table for the records of a chunk within a model.
+
+            Arguments:
+                columns (NumPy NxW ndarray[uint8]): The bytes of the records.
+                is_atom (NumPy N ndarray[bool]): True for ATOM and HETATM records.
+                is_ter (NumPy N ndarray[bool]): True for TER records.
+                state (_PdbReadState): The state of the file read before the
+                    records, updated for the records.
+
+            Returns the AtomTable storing the atoms of the records, or None if
+            there are none.
+        """
+        atoms = columns[is_atom]
+        num_atoms = len(atoms)
+        # The number of atoms before each TER record.
+        ter_offsets = np.cumsum(is_atom)[is_ter] if is_ter.any() else np.zeros(0, dtype=int)
+        if num_atoms == 0:
+            if len(ter_offsets) != 0:
+                state.end_molecule()
+            return None
+
+        # Start a molecule at each TER record and change of chain ID.
+        chains = _get_field(atoms, 21, 22)
+        starts = np.concatenate(([0], ter_offsets[(ter_offsets > 0) & (ter_offsets < num_atoms)],
+                                 np.flatnonzero(chains[1:] != chains[:-1]) + 1))
+        molecule_offsets = np.concatenate((np.unique(starts), [num_atoms]))
+        num_molecules = len(molecule_offsets) - 1
+
+        # The first molecule continues the last molecule of the previous chunk
+        # if it was not ended.
+        continues = (not state.molecule_ended and chains[0] == state.chain and
+                     not (len(ter_offsets) != 0 and ter_offsets[0] == 0))
+        first_id = state.num_molecules if continues else state.num_molecules + 1
+        molecule_ids = list(range(first_id, first_id + num_molecules))
+        chain_ids = [chain.decode() for chain in chains[molecule_offsets[:-1]].tolist()]
+        chain_index = np.repeat(np.arange(num_molecules, dtype=np.int32), np.diff(molecule_offsets))
+
+        atom_table = AtomTable(
+            np.char.strip(_get_field(atoms, 12, 16)).astype(str),
+            np.char.strip(_get_field(atoms, 17, 20)).astype(str),
+            np.char.strip(_get_field(atoms, 76, 78)).astype(str),
+            _parse_res_seq(_get_field(atoms, 22, 26)),
+            chain_index,
+            np.ascontiguousarray(atoms[:, 30:54]).view("S8").reshape(num_atoms, 3).astype(self.coords_dtype),
+            chain_ids,
+            molecule_ids,
+            molecule_offsets,
+            state.num_model_atoms + 1)
+        try:
+            atom_table.serial = _get_field(atoms, 6, 11).astype(np.int64)
+        except ValueError:
+            pass
+
+        state.num_molecules = molecule_ids[-1]
+        state.num_model_atoms += num_atoms
+        state.chain = chains[-1]
+        state.molecule_ended = len(ter_offsets) != 0 and ter_offsets[-1] == num_atoms
+        return atom_table
+
+
+class _PdbReadState(object):
+    """ The state of a PDB file read by PdbAtomTableReader carried from one
+        chunk of records to the next.
+
+        Attributes:
+            chain (bytes): The chain ID of the last atom read.
+            model_num (int): The number of the current model.
+            molecule_ended (bool): If True then the last molecule read has been
+                ended by a TER, MODEL or ENDMDL record.
+            num_model_atoms (int): The number of atoms read for the current model.
+            num_molecules (int): The number of molecules read for the current model.
+    """
+
+    def __init__(self):
+        self.start_model(1)
+
+    def start_model(self, model_num):
+        """ Start reading a model. """
+        self.model_num = model_num
+        self.num_model_atoms = 0
+        self.num_molecules = 0
+        self.chain = None
+        self.molecule_ended = True
+
+    def end_molecule(self):
+        """ End the last molecule read. """
+        self.molecule_ended = True
+
+
+def _get_field(columns, start, end):
+    """ Get a fixed-column field of the rows of a byte array as a NumPy
+        ndarray[bytes].
+    """
+    return np.ascontiguousarray(columns[:, start:end]).view("S%d" % (end - start)).ravel()
+
+
+def _parse_res_seq(fields):
+    """ Parse the residue sequence number fields of atom records as a NumPy
+        ndarray[int32].
+
+        The fields are converted as decimal integers at once. If a field is
+        not a decimal integer then each distinct field is decoded on its own
+        using _decode_hybrid36().
+    """
+    try:
+        return fields.astype(np.int32)
+    except ValueError:
+        pass
+    values, inverse = np.unique(fields, return_inverse=True)
+    res_seq = np.array([_decode_hybrid36(value.decode().strip(), 4) for value in values.tolist()], dtype=np.int32)
+    return res_seq[inverse.ravel()]
+
+
+def _decode_hybrid36(text, width):
+    """ Decode a decimal or hybrid-36 integer field, returning 0 if it is
+        neither.
+
+        Hybrid-36 encodes numbers larger than the decimal numbers of the field
+        width as base-36 numbers of upper case letters and digits starting with a
+        letter, followed by those of lower case letters and digits.
+    """
+    try:
+        return int(text)
+    except ValueError:
+        pass
+    if len(text) != width or not text.isalnum() or not text.isascii():
+        return 0
+    if text[0].isupper() and not any(letter.islower() for letter in text):
+        return int(text, 36) - 10 * 36**(width - 1) + 10**width
+    if text[0].islower() and not any(letter.isupper() for letter in text):
+        return int(text, 36) + 16 * 36**(width - 1) + 10**width
+    return 0
+
+
+def _parse_int(field, default):
+    """ Parse the bytes of an integer field, returning default if it is not
+        an integer.
+    """
+    try:
+        return int(field.tobytes())
+    except ValueError:
+        return default
@@ -21,6 +21,7 @@ from [A-Z,a-z,0-9], cycling through the list as needed.
 """
 
 import logging
+import numpy as np
 from .atomic_structure import AtomicStructure
 
 
@@ -37,8 +38,20 @@ class PdbWriter(object):
     CHAIN_IDS = list(
         'ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789')
 
-    def __init__(self, dna_structure):
+    def __init__(self, dna_structure, streaming=False, atomic_structure=None):
+        """ Initialize the PdbWriter object.
+
+            Arguments:
+                dna_structure (DnaStructure): The dna structure to convert to an atomic structure.
+                streaming (bool): If True then atoms are generated and written one chunk of strands at a time.
+                    The coordinates are then shifted by a bound on the atomic structure extent rather than
+                    its exact extent.
+                atomic_structure (AtomicStructure): An atomic structure already created for the dna structure,
+                    so that its atom table can be shared with other writers.
+        """
         self.dna_structure = dna_structure
+        self.streaming = streaming
+        self.atomic_structure = atomic_structure
         self._logger = logging.getLogger(__name__)
 
     def write(self, file_name):
@@ -55,10 +68,16 @@ class PdbWriter(object):
         self._logger.info("Number of strands %d " % len(strands))
 
         # Generate atomic models of the dna structure.
-        atomic_structure = AtomicStructure(dna_structure)
-        molecules = atomic_structure.generate_structure_ss()   # converts ssDNA
-        # molecules = atomic_structure.generate_structure()
-        xmin, _, ymin, _, zmin, _ = atomic_structure.get_extent()
+        atomic_structure = self.atomic_structure
+        if atomic_structure is None:
+            atomic_structure = AtomicStructure(dna_structure)
+        if self.streaming:
+            atom_tables = atomic_structure.generate_atom_tables(coords_dtype=float)  # converts ssDNA
+            xmin, _, ymin, _, zmin, _ = atomic_structure.get_extent_bound()
+        else:
+            atom_table = atomic_structure.get_atom_table(coords_dtype=float)  # converts ssDNA
+            atom_tables = [atom_table]
+            xmin, _, ymin, _, zmin, _ = atom_table.get_extent()
 
         # Write the models.
         res_seq = 0
@@ -69,82 +88,80 @@ class PdbWriter(object):
             # write header
             # pdb_file.write('"PDB file generated from "');
             pdb_file.write(PdbWriter.MODEL_FORMAT % model_num)
-            for molecule in molecules:
-                chain_id = PdbWriter.CHAIN_IDS[chain_count]
-                res_seq, atom_id, model_num = self._write_molecule(pdb_file, molecule, model_num, res_seq, atom_id,
-                                                                   chain_id, xmin, ymin, zmin)
-                # model_num += 1
-                chain_count += 1
-                if chain_count == len(PdbWriter.CHAIN_IDS):
-                    chain_count = 0
+            for atom_table in atom_tables:
+                # Shift the atom coordinates to the minimum extent. The table may be shared with other
+                # writers so its coordinates are copied and the copy shifted in place.
+                coords = np.array(atom_table.coords, dtype=float)
+                coords -= [xmin, ymin, zmin]
+                for index in range(len(atom_table.molecule_ids)):
+                    chain_id = PdbWriter.CHAIN_IDS[chain_count]
+                    res_seq, atom_id, model_num = self._write_molecule(pdb_file, atom_table, coords, index,
+                                                                       model_num, res_seq, atom_id, chain_id)
+                    # model_num += 1
+                    chain_count += 1
+                    if chain_count == len(PdbWriter.CHAIN_IDS):
+                        chain_count = 0
 
             pdb_file.write("\n")
             pdb_file.write(PdbWriter.ENDMDL_FORMAT)
         self._logger.info("Done.")
 
-    def _write_molecule(self, pdb_file, molecule, model_num, res_seq, atom_id, chain_id, xmin, ymin, zmin):
+    def _write_molecule(self, pdb_file, atom_table, coords, index, model_num, res_seq, atom_id, chain_id):
         """ Write the atoms in a molecule to a file.
 
             Arguments:
                 pdb_file (File): The file handle used to write to the file.
-                molecule (Molecule): The Molecule object to write.
+                atom_table (AtomTable): The table storing the atoms of the molecule.
+                coords (NumPy Nx3 ndarray[float]): The atom table coordinates shifted to the minimum extent
+                    of the atomic structure.
+                index (int): The index of the molecule in the table.
                 model_num (int):
                 res_seq (int):
                 atom_id (int):,
                 chain_id (string):
-                xmin (Float): The x minimum extent of the atomic structure.
-                ymin (Float): The y minimum extent of the atomic structure.
-                zmin (Float): The z minimum extent of the atomic structure.
         """
-        self._logger.debug("Write molecule %d " % molecule.model_id)
-        self._logger.debug("Number of chains %d  %s" %
-                           (len(molecule.chains), str(list(molecule.chains))))
-        self._logger.debug("Number of atoms %d " % (len(molecule.atoms)))
-        # cmpd = "   "
-        current_res_seq = molecule.atoms[0].res_seq_num
+        rows = atom_table.get_molecule_rows(index)
+        res_seq_nums = atom_table.res_seq[rows].tolist()
+        self._logger.debug("Write molecule %d " % atom_table.molecule_ids[index])
+        self._logger.debug("Number of atoms %d " % (len(res_seq_nums)))
+        if len(res_seq_nums) == 0:
+            return res_seq, atom_id, model_num
+
+        # Set the values of fields that do not change.
+        chain = chain_id
+        alt_loc = " "
+        icode = " "
+        occupancy = 0.0
+        temp_factor = 0.0
+        segID = " "
+        charge = " "
+
+        current_res_seq = res_seq_nums[0]
         res_seq += 1
-        # pdb_file.write(PdbWriter.MODEL_FORMAT % model_num)
         new_res = False
+        records = []
 
-        for atom in molecule.atoms:
-            x = atom.coords[0] - xmin
-            y = atom.coords[1] - ymin
-            z = atom.coords[2] - zmin
-
-            name = atom.name.ljust(3)
-            res = atom.res_name
-            if current_res_seq != atom.res_seq_num:
-                current_res_seq = atom.res_seq_num
+        for name, res, seq, element, (x, y, z) in zip(atom_table.names[rows].tolist(),
+                                                      atom_table.res_names[rows].tolist(), res_seq_nums,
+                                                      atom_table.elements[rows].tolist(), coords[rows].tolist()):
+            if current_res_seq != seq:
+                current_res_seq = seq
                 res_seq += 1
                 new_res = True
             else:
                 new_res = False
 
-            seq = atom.res_seq_num
-            chain = chain_id
-            element = atom.element
-            # mass = 1.0
-            # remote_ind = " "
-            # branch = " "
-            alt_loc = " "
-            icode = " "
-            occupancy = 0.0
-            temp_factor = 0.0
-            segID = " "
-            charge = " "
-
             if atom_id > 99900 and new_res:
-                pdb_file.write(PdbWriter.ENDMDL_FORMAT)
+                records.append(PdbWriter.ENDMDL_FORMAT)
                 model_num += 1
                 atom_id = 1
-                pdb_file.write(PdbWriter.MODEL_FORMAT % model_num)
+                records.append(PdbWriter.MODEL_FORMAT % model_num)
 
-            pdb_file.write(PdbWriter.ATOM_FORMAT % (atom_id, name, alt_loc, res, chain, seq, icode, x, y, z, occupancy,
-                                                    temp_factor, segID, element, charge))
+            records.append(PdbWriter.ATOM_FORMAT % (atom_id, name.ljust(3), alt_loc, res, chain, seq, icode, x, y, z,
+                                                    occupancy, temp_factor, segID, element, charge))
             atom_id += 1
 
-        pdb_file.write(PdbWriter.TER_FORMAT %
-                       (atom_id, res, chain, seq, icode))
+        records.append(PdbWriter.TER_FORMAT % (atom_id, res, chain, seq, icode))
         atom_id += 1
-        # pdb_file.write(PdbWriter.ENDMDL_FORMAT)
+        pdb_file.write("".join(records))
         return res_seq, atom_id, model_num
@@ -163,3 +163,114 @@ def _vrrotvec2mat(axis, theta):
     return np.array([[t*x*x + c,   t*x*y - s*z,  t*x*z + s*y],
                      [t*x*y + s*z, t*y*y + c,    t*y*z - s*x],
                      [t*x*z - s*y, t*y*z + s*x,  t*z*z + c]])
+
+
+def _vrrotmat2vec_batch(R):
+    """ Extract the equivalent rotations about axes from an array of rotation
+    matrices.
+
+        Arguments:
+            R (NumPy Kx3x3 ndarray[float]): The rotation matrices.
+
+        Returns a 2-tuple of the NumPy Kx3 ndarray[float] of rotation axes and
+        the NumPy K ndarray[float] of rotation angles, the values _vrrotmat2vec()
+        returns for each matrix.
+    """
+    R = np.asarray(R, dtype=float).reshape(-1, 3, 3)
+    r00, r01, r02 = R[:, 0, 0], R[:, 0, 1], R[:, 0, 2]
+    r10, r11, r12 = R[:, 1, 0], R[:, 1, 1], R[:, 1, 2]
+    r20, r21, r22 = R[:, 2, 0], R[:, 2, 1], R[:, 2, 2]
+    angles = np.arccos(np.clip((r00 + r11 + r22 - 1)/2.0, -1.0, 1.0))
+    axes = np.zeros((len(R), 3), dtype=float)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        # Calculate axes for non-singular angles.
+        norm = np.sqrt(pow(r21-r12, 2) + pow(r02-r20, 2) + pow(r10-r01, 2))
+        general = np.stack(((r21 - r12) / norm, (r02 - r20) / norm,
+                            (r10 - r01) / norm), axis=1)
+
+        # Calculate axes for angle=180 using the largest diagonal term.
+        epsilon = 0.01
+        xx = (r00+1) / 2.0
+        yy = (r11+1) / 2.0
+        zz = (r22+1) / 2.0
+        xy = (r01+r10) / 4.0
+        xz = (r02+r20) / 4.0
+        yz = (r12+r21) / 4.0
+        x = np.sqrt(xx)
+        y = np.sqrt(yy)
+        z = np.sqrt(zz)
+        use_x = (xx > yy) & (xx > zz)
+        use_y = ~use_x & (yy > zz)
+        use_z = ~use_x & ~use_y
+        conditions = [use_x & (xx < epsilon), use_x, use_y & (yy < epsilon), use_y,
+                      use_z & (zz < epsilon)]
+        singular = np.select(
+            [condition[:, np.newaxis] for condition in conditions],
+            [np.array([0.0, 0.7071, 0.7071]), np.stack((x, xy / x, xz / x), axis=1),
+             np.array([0.7071, 0.0, 0.7071]), np.stack((xy / y, y, yz / y), axis=1),
+             np.array([0.7071, 0.7071, 0.0])],
+            np.stack((xz / z, yz / z, z), axis=1))
+
+    # Check for singularities at angle=0 and angle=180.
+    is_zero = np.abs(angles) < 0.0001
+    is_pi = ~is_zero & (np.abs(angles - pi) < 0.0001)
+    axes[:] = general
+    axes[is_pi] = singular[is_pi]
+    axes[is_zero] = [1.0, 0.0, 0.0]
+    angles[is_zero] = 0.0
+    return axes, angles
+
+
+def _vrrotvec2mat_batch(axes, angles):
+    """ Create the rotation matrices to rotate angles about axes.
+
+        Arguments:
+            axes (NumPy Kx3 ndarray[float]): The rotation axes.
+            angles (NumPy K ndarray[float]): The rotation angles in radians.
+
+        Returns the NumPy Kx3x3 ndarray[float] of rotation matrices, the values
+        _vrrotvec2mat() returns for each axis and angle.
+    """
+    s = np.sin(angles)
+    c = np.cos(angles)
+    t = 1 - c
+
+    # normalize the vectors
+    axes = axes / np.linalg.norm(axes, axis=1)[:, np.newaxis]
+    x, y, z = axes[:, 0], axes[:, 1], axes[:, 2]
+
+    R = np.empty((len(axes), 3, 3), dtype=float)
+    R[:, 0, 0] = t*x*x + c
+    R[:, 0, 1] = t*x*y - s*z
+    R[:, 0, 2] = t*x*z + s*y
+    R[:, 1, 0] = t*x*y + s*z
+    R[:, 1, 1] = t*y*y + c
+    R[:, 1, 2] = t*y*z - s*x
+    R[:, 2, 0] = t*x*z - s*y
+    R[:, 2, 1] = t*y*z + s*x
+    R[:, 2, 2] = t*z*z + c
+    return R
+
+
+def _find_runs(mask, is_circular=False):
+    """ Find the runs of consecutive True values in a boolean array using run-length encoding.
+
+        Arguments:
+            mask (NumPy N ndarray[bool]): The array to find runs in.
+            is_circular (bool): If True then the array is circular and a run at its end continues
+                into a run at its start.
+
+        Returns a 2-tuple of the NumPy ndarray[int] of the index of the first value of each run and
+        the NumPy ndarray[int] of the number of values in each run. A run wrapping around the end of
+        a circular array starts at its end. If all values are True the single run starts at 0.
+    """
+    mask = np.asarray(mask, dtype=bool)
+    padded = np.concatenate(([False], mask, [False]))
+    changes = np.flatnonzero(padded[1:] != padded[:-1])
+    starts = changes[0::2]
+    lengths = changes[1::2] - starts
+    if is_circular and len(starts) > 1 and mask[0] and mask[-1]:
+        starts = np.append(starts[1:-1], starts[-1])
+        lengths = np.append(lengths[1:-1], lengths[-1] + lengths[0])
+    return starts, lengths
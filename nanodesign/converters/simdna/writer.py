@@ -41,6 +41,10 @@ The SimDNA pairs file file format is:
 import itertools
 import logging
 
+import numpy as np
+
+from ...data.base_table import NONE_ID
+
 
 class SimDnaWriter(object):
     """ The SimDnaWriter class writes out a SimDNA pairs file.
@@ -58,10 +62,17 @@ class SimDnaWriter(object):
         """
         self._logger.info("Writing SimDNA pairs file %s " % file_name)
         dna_structure = self.dna_structure
-        dna_structure.compute_aux_data()
         num_bases = len(dna_structure.base_connectivity)
         nm_to_ang = 10.0
 
+        # The strand ID and 1-based strand-relative index of the base paired with each base of the structure,
+        # read from the base table columns where the row of a base is its ID.
+        table = dna_structure.base_table
+        is_paired = table.across != NONE_ID
+        paired_strand_ids = np.where(is_paired, table.strand[table.across], -1).tolist()
+        paired_base_ids = np.where(is_paired, dna_structure.strand_local_index(table.across) + 1, -1).tolist()
+        table_bases = table.bases
+
         with open(file_name, 'w') as outfile:
             outfile.write("%d\n" % num_bases)
             # Create a list of scaffold and staple strands.
@@ -85,19 +96,26 @@ class SimDnaWriter(object):
                 strand_id = strand_map[strand.id]
                 # base_coords = strand.get_base_coords()
 
-                for i in range(0, len(strand.tour)):
-                    base = strand.tour[i]
-                    if base.across is None:
-                        paired_strand_id = -1
-                        paired_base_id = -1
+                coords = (nm_to_ang * np.array([base.nt_coords for base in strand.tour])).reshape(-1, 3).tolist()
+                records = []
+                for i, (base, coord) in enumerate(zip(strand.tour, coords)):
+                    row = base.id
+                    if row < len(table_bases) and table_bases[row] is base:
+                        paired_strand_id = paired_strand_ids[row]
+                        paired_base_id = paired_base_ids[row]
                     else:
+                        # The base is not in the structure base table (e.g. a base of a strand not removed by a
+                        # staple operation) so its paired base is looked up from the base.
                         across_base = base.across
-                        paired_strand_id = across_base.strand
-                        paired_strand = self.dna_structure.strands_map[paired_strand_id]
-                        paired_base_id = paired_strand.get_base_index(
-                            across_base)+1
+                        if across_base is None:
+                            paired_strand_id = -1
+                            paired_base_id = -1
+                        else:
+                            paired_strand_id = across_base.strand
+                            paired_strand = dna_structure.get_strand(paired_strand_id)
+                            paired_base_id = paired_strand.get_base_index(across_base) + 1
 
-                    coord = nm_to_ang * base.nt_coords
                     # base_id = strand.get_base_index(base)+1
-                    outfile.write("%4d %4d %8g %8g %8g %4d %4d\n" %
-                                  (strand_id, i+1, coord[0], coord[1], coord[2], paired_strand_id, paired_base_id))
+                    records.append("%4d %4d %8g %8g %8g %4d %4d\n" %
+                                   (strand_id, i+1, coord[0], coord[1], coord[2], paired_strand_id, paired_base_id))
+                outfile.write("".join(records))
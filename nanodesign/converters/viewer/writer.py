@@ -21,6 +21,7 @@ import logging
 import numpy as np
 from math import pi
 from ..cadnano.common import CadnanoLatticeType
+from ...data.energymodel import energy_model
 
 
 class ViewerWriter(object):
@@ -63,7 +64,8 @@ class ViewerWriter(object):
     def _get_domain_info(self, dna_structure):
         """ Get JSON serialized data for all the domains. """
         domains_info = []
-        for domain in dna_structure.domain_list:
+        melting_temperatures = energy_model.melting_temperatures(dna_structure.domain_list).tolist()
+        for domain, melting_temperature in zip(dna_structure.domain_list, melting_temperatures):
             point1, point2 = domain.get_end_points()
             base_info = [base.id for base in domain.base_list]
             if (domain.strand):
@@ -89,7 +91,7 @@ class ViewerWriter(object):
                     'connected_strand': domain.connected_strand,
                     'connected_domain': domain.connected_domain,
                     # "{:.2f}".format(domain.melting_temperature())
-                    'melting_temperature': domain.melting_temperature()
+                    'melting_temperature': melting_temperature
                     }
             domains_info.append(info)
 
@@ -345,14 +347,14 @@ class ViewerWriter(object):
         crossover_info = []
         sorted_staples = collections.OrderedDict(sorted(staples.items()))
         self._logger.debug("    Staple crossovers: ")
-        pos = sorted_staples.keys()
+        pos = list(sorted_staples.keys())
         self._get_crossover_strand_info(
             start_pos, pos, staples, crossover_info)
 
         # Add scaffold information.
         sorted_scaffolds = collections.OrderedDict(sorted(scaffolds.items()))
         self._logger.debug("    Scaffold crossovers: ")
-        pos = sorted_scaffolds.keys()
+        pos = list(sorted_scaffolds.keys())
         self._get_crossover_strand_info(
             start_pos, pos, scaffolds, crossover_info)
 
@@ -18,6 +18,7 @@ This module is used to store data for a DNA base.
 A list of DnaBase objects, stored in the DnaStructure object, is used to define the connectivity (topology)
 of a DNA structure: bases that are adjacent along a single DNA helix and which base they are paired with (if any).
 """
+from .base_table import NONE_ID, BaseTable
 
 
 class DnaBase(object):
@@ -31,35 +32,210 @@ class DnaBase(object):
             h (int): The ID of the helix the base is in.
             id (int): The base ID.
             is_scaf (bool): If True then this base is in a scaffold strand.
+            node (int): The index of the base coordinates and reference frame into the helix axis arrays.
             num_insertions (int): The number of insertions at this base.
             nt_coords ((3x1 numpy float arrayList[Float]): The base nucleotide coordinates.
             ref_frame ((3x1 numpy float arrayList[Float]): The base helix axis reference frame.
             p (int): The helix position of the base.
+            residue (int): The 1-based position of the base in its strand.
             seq (string): A one character string representing the base sequence nucleotide.
             num_deletions (int): The number of deletions at this base.
             strand (int): The strand ID the base is in.
+            table (BaseTable): The table storing the base data.
             up (VisBase): The base's 5' neighbor.
 
         The base coordinates and reference frame are references to elements of arrays stored in
-        the helix they are associated with.
+        the helix they are associated with, the element given by node. The base nucleotide coordinates
+        reference the element of the helix scaffold or staple nucleotide coordinates at the index of the base
+        in the helix scaffold or staple base list.
+
+        A DnaBase is a view of a row of a BaseTable: all attributes except the ID and geometry are stored in
+        the table columns. Linking bases in different tables (e.g. setting up to a base created with another
+        table) merges the smaller table into the larger one. The table of a structure is given by
+        DnaStructure.base_table.
     """
+    __slots__ = ('id', '_table', '_row', 'nt_coords', 'coordinates', 'ref_frame')
+
+    def __init__(self, id, up=None, down=None, across=None, seq='N', table=None):
+        """ Initialize a DnaBase object.
+
+            Arguments:
+                id (int): The base ID.
+                up (DnaBase): The base's 5' neighbor.
+                down (DnaBase): The base's 3' neighbor.
+                across (DnaBase): The base's Watson-Crick neighbor.
+                seq (string): The base sequence nucleotide.
+                table (BaseTable): The table to add the base row to. If None then the base is added to a new table.
 
-    def __init__(self, id, up=None, down=None, across=None, seq='N'):
+            A base created to be linked to existing bases (e.g. an inserted base) should be added to their table
+            so the tables do not need to be merged.
+        """
         self.id = int(id)
-        self.up = up
-        self.down = down
-        self.across = across
-        self.seq = seq
-        self.strand = None
-        self.domain = None
-        self.num_insertions = 0
-        self.num_deletions = 0
-        self.h = -1
-        self.p = -1
+        if table is None:
+            table = BaseTable()
+        self._table = table
+        self._row = table.add_row(self)
         self.nt_coords = None
         self.coordinates = None
         self.ref_frame = None
-        self.is_scaf = False
+        if up is not None:
+            self.up = up
+        if down is not None:
+            self.down = down
+        if across is not None:
+            self.across = across
+        if seq != 'N':
+            self.seq = seq
+
+    @classmethod
+    def from_table_row(cls, table, row):
+        """ Create a DnaBase viewing an existing table row, the base ID set to the row.
+
+            Arguments:
+                table (BaseTable): The table.
+                row (int): The row of the base.
+        """
+        base = cls.__new__(cls)
+        base.id = row
+        base._table = table
+        base._row = row
+        base.nt_coords = None
+        base.coordinates = None
+        base.ref_frame = None
+        table.bases[row] = base
+        return base
+
+    @property
+    def table(self):
+        return self._table
+
+    def _get_base_row(self, base):
+        """ Get the row of a base linked to this base, merging the tables of the two bases if they differ. """
+        if base is None:
+            return NONE_ID
+        if base._table is not self._table:
+            if len(base._table) < len(self._table):
+                self._table.merge(base._table)
+            else:
+                base._table.merge(self._table)
+        return base._row
+
+    @property
+    def up(self):
+        table = self._table
+        row = table.up.item(self._row)
+        return None if row == NONE_ID else table.bases[row]
+
+    @up.setter
+    def up(self, base):
+        row = self._get_base_row(base)
+        self._table.up[self._row] = row
+
+    @property
+    def down(self):
+        table = self._table
+        row = table.down.item(self._row)
+        return None if row == NONE_ID else table.bases[row]
+
+    @down.setter
+    def down(self, base):
+        row = self._get_base_row(base)
+        self._table.down[self._row] = row
+
+    @property
+    def across(self):
+        table = self._table
+        row = table.across.item(self._row)
+        return None if row == NONE_ID else table.bases[row]
+
+    @across.setter
+    def across(self, base):
+        row = self._get_base_row(base)
+        self._table.across[self._row] = row
+
+    @property
+    def h(self):
+        return self._table.helix.item(self._row)
+
+    @h.setter
+    def h(self, value):
+        self._table.helix[self._row] = value
+
+    @property
+    def p(self):
+        return self._table.pos.item(self._row)
+
+    @p.setter
+    def p(self, value):
+        self._table.pos[self._row] = value
+
+    @property
+    def strand(self):
+        value = self._table.strand.item(self._row)
+        return None if value == NONE_ID else value
+
+    @strand.setter
+    def strand(self, value):
+        self._table.strand[self._row] = NONE_ID if value is None else value
+
+    @property
+    def residue(self):
+        value = self._table.residue.item(self._row)
+        return None if value == NONE_ID else value
+
+    @residue.setter
+    def residue(self, value):
+        self._table.residue[self._row] = NONE_ID if value is None else value
+
+    @property
+    def domain(self):
+        value = self._table.domain.item(self._row)
+        return None if value == NONE_ID else value
+
+    @domain.setter
+    def domain(self, value):
+        self._table.domain[self._row] = NONE_ID if value is None else value
+
+    @property
+    def node(self):
+        value = self._table.node.item(self._row)
+        return None if value == NONE_ID else value
+
+    @node.setter
+    def node(self, value):
+        self._table.node[self._row] = NONE_ID if value is None else value
+
+    @property
+    def num_insertions(self):
+        return self._table.num_insertions.item(self._row)
+
+    @num_insertions.setter
+    def num_insertions(self, value):
+        self._table.num_insertions[self._row] = value
+
+    @property
+    def num_deletions(self):
+        return self._table.num_deletions.item(self._row)
+
+    @num_deletions.setter
+    def num_deletions(self, value):
+        self._table.num_deletions[self._row] = value
+
+    @property
+    def seq(self):
+        return chr(self._table.seq.item(self._row))
+
+    @seq.setter
+    def seq(self, value):
+        self._table.seq[self._row] = ord(value)
+
+    @property
+    def is_scaf(self):
+        return self._table.is_scaf.item(self._row)
+
+    @is_scaf.setter
+    def is_scaf(self, value):
+        self._table.is_scaf[self._row] = value
 
     def remove(self):
         """ Remove the base from the DNA structure.
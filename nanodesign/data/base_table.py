@@ -0,0 +1,231 @@
+# Copyright 2016 Autodesk Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+This module is used to store the base data of a DNA structure in columnar (struct-of-arrays) form.
+
+A BaseTable stores one row per base. Base connectivity (up, down, across) is stored as integer row
+indices rather than object references, with -1 used where a DnaBase attribute is None. This allows
+topology to be processed with whole-array NumPy operations instead of walking the list of DnaBase
+objects.
+
+A DnaBase object is a view of a table row: its attributes are read from and written to the table
+columns, so the table is the only copy of the base data. The base geometry is not stored in the table:
+paired bases share a helix axis node, so the helices own the coordinates and reference frames and the
+bases reference them, which keeps them current when a helix is transformed. The helix and node columns
+locate the geometry of each base; DnaStructure.get_base_geometry() gathers it into Nx3 arrays.
+"""
+import numpy as np
+
+# The value stored in an integer column for a missing base, strand, domain, etc.
+NONE_ID = -1
+
+# The table columns: name, data type and the value of an unset entry.
+COLUMNS = (
+    ('up', np.int32, NONE_ID),
+    ('down', np.int32, NONE_ID),
+    ('across', np.int32, NONE_ID),
+    ('helix', np.int32, NONE_ID),
+    ('pos', np.int32, NONE_ID),
+    ('strand', np.int32, NONE_ID),
+    ('residue', np.int32, NONE_ID),
+    ('domain', np.int32, NONE_ID),
+    ('node', np.int32, NONE_ID),
+    ('num_insertions', np.int32, 0),
+    ('num_deletions', np.int32, 0),
+    ('seq', np.uint8, ord('N')),
+    ('is_scaf', np.bool_, False)
+)
+
+# The columns storing the row of another base.
+BASE_COLUMNS = ('up', 'down', 'across')
+
+
+class BaseTable(object):
+    """ This class stores the data for the bases of a DNA structure as NumPy arrays.
+
+        Attributes:
+            across (NumPy N ndarray[int32]): The row of the base's Watson-Crick neighbor.
+            bases (List[DnaBase]): The DnaBase object viewing each row.
+            domain (NumPy N ndarray[int32]): The domain ID the base is in.
+            down (NumPy N ndarray[int32]): The row of the base's 3' neighbor.
+            helix (NumPy N ndarray[int32]): The ID of the helix the base is in.
+            is_scaf (NumPy N ndarray[bool]): The mask of bases that are in a scaffold strand.
+            node (NumPy N ndarray[int32]): The index of the base's helix axis node into the coordinates and frames
+                of its helix.
+            num_deletions (NumPy N ndarray[int32]): The number of deletions at the base.
+            num_insertions (NumPy N ndarray[int32]): The number of insertions at the base.
+            pos (NumPy N ndarray[int32]): The helix position of the base.
+            residue (NumPy N ndarray[int32]): The 1-based index of the base in its strand, in the order the strand
+                was traced.
+            seq (NumPy N ndarray[uint8]): The ASCII code of the base sequence letter.
+            strand (NumPy N ndarray[int32]): The strand ID the base is in.
+            up (NumPy N ndarray[int32]): The row of the base's 5' neighbor.
+
+        A value of NONE_ID (-1) in an integer column means the corresponding DnaBase attribute is None (e.g. a
+        strand end has no up or down neighbor).
+
+        The table of a DnaStructure has the row of each base equal to its ID. While a structure is being built
+        rows are added one base at a time with add_row(); the columns are stored in buffers that grow by
+        doubling and the column attributes are views of the used part of the buffers.
+    """
+
+    def __init__(self, num_bases=0):
+        """ Initialize a BaseTable object with all entries unset.
+
+            Arguments:
+                num_bases (int): The number of bases in the table.
+        """
+        self.bases = [None] * num_bases
+        self._buffers = {name: np.full(num_bases, value, dtype=dtype) for name, dtype, value in COLUMNS}
+        self._set_size(num_bases)
+
+    def __len__(self):
+        return len(self.bases)
+
+    def _set_size(self, size):
+        """ Set the column attributes to the first size rows of the column buffers. """
+        for name, buffer in self._buffers.items():
+            setattr(self, name, buffer[:size])
+
+    def _reserve(self, size):
+        """ Grow the column buffers so that they can store at least size rows. """
+        capacity = len(self._buffers['up'])
+        if size <= capacity:
+            return
+        capacity = max(size, 2 * capacity, 16)
+        for name, dtype, value in COLUMNS:
+            buffer = np.full(capacity, value, dtype=dtype)
+            buffer[:len(self.bases)] = getattr(self, name)
+            self._buffers[name] = buffer
+
+    def add_row(self, base):
+        """ Add a row for a base with all entries unset.
+
+            Arguments:
+                base (DnaBase): The base viewing the row.
+
+            Returns the index of the new row.
+        """
+        row = len(self.bases)
+        self._reserve(row + 1)
+        self.bases.append(base)
+        self._set_size(row + 1)
+        return row
+
+    def merge(self, table):
+        """ Move the rows of another table to the end of this table.
+
+            Arguments:
+                table (BaseTable): The table to merge. The bases viewing its rows are rebound to this table.
+
+            This is used when bases from different tables are linked. A row of the table whose base has been
+            rebound to another table (see from_bases()) is moved as it is but the base is not rebound to it.
+        """
+        offset = len(self.bases)
+        size = offset + len(table.bases)
+        self._reserve(size)
+        for name, dtype, value in COLUMNS:
+            column = getattr(table, name)
+            if name in BASE_COLUMNS:
+                column = np.where(column == NONE_ID, NONE_ID, column + offset)
+            self._buffers[name][offset:size] = column
+        for row, base in enumerate(table.bases):
+            if base._table is table and base._row == row:
+                base._table = self
+                base._row = row + offset
+        self.bases.extend(table.bases)
+        self._set_size(size)
+        table.bases = []
+        table._set_size(0)
+
+    @classmethod
+    def from_bases(cls, bases):
+        """ Get the table storing a list of DnaBase objects, the base at index i in row i.
+
+            Arguments:
+                bases (List[DnaBase]): The list of bases.
+
+            Returns the BaseTable of the bases.
+
+            If the bases are the rows of a table in order then that table is returned. Otherwise a table is
+            created by gathering the rows of the bases and the bases are rebound to it. A reference to a base
+            that is not in the list is set to NONE_ID. A table whose bases have all been rebound is emptied, so
+            the new table is the only copy of their data. The rows of a table that still has other bases are
+            kept for them.
+        """
+        tables = {}
+        for i, base in enumerate(bases):
+            table = base._table
+            if id(table) not in tables:
+                tables[id(table)] = (table, [], [])
+            tables[id(table)][1].append(base._row)
+            tables[id(table)][2].append(i)
+
+        if len(tables) == 1:
+            table, rows, _ = next(iter(tables.values()))
+            if len(table.bases) == len(bases) and rows == list(range(len(bases))):
+                return table
+
+        new_table = cls(len(bases))
+        indexes_by_base = {id(base): i for i, base in enumerate(bases)}
+        for table, rows, indexes in tables.values():
+            rows = np.array(rows, dtype=np.int64)
+            indexes = np.array(indexes, dtype=np.int64)
+            # A reference is mapped through the base at the referenced row, which may be a stale row of a base
+            # rebound to another table. The extra last entry maps a NONE_ID reference to NONE_ID.
+            row_map = np.array([indexes_by_base.get(id(base), NONE_ID) for base in table.bases] + [NONE_ID],
+                               dtype=np.int64)
+            for name, dtype, value in COLUMNS:
+                column = getattr(table, name)[rows]
+                if name in BASE_COLUMNS:
+                    column = row_map[column]
+                getattr(new_table, name)[indexes] = column
+
+        for row, base in enumerate(bases):
+            base._table = new_table
+            base._row = row
+        new_table.bases = list(bases)
+
+        for table, _, _ in tables.values():
+            if all(base._table is not table for base in table.bases):
+                table.bases = []
+                table._set_size(0)
+        return new_table
+
+    @classmethod
+    def from_columns(cls, columns):
+        """ Create a BaseTable from a dictionary of column arrays.
+
+            Arguments:
+                columns (Dict[NumPy ndarray]): The dictionary that maps a column name to its array. Columns
+                    missing from the dictionary are unset.
+
+            Returns the BaseTable using the given arrays as its column buffers. The DnaBase objects viewing its
+            rows must be added to the bases list.
+        """
+        num_bases = len(next(iter(columns.values()))) if columns else 0
+        table = cls(0)
+        table.bases = [None] * num_bases
+        for name, dtype, value in COLUMNS:
+            if name in columns:
+                table._buffers[name] = columns[name]
+            else:
+                table._buffers[name] = np.full(num_bases, value, dtype=dtype)
+        table._set_size(num_bases)
+        return table
+
+    def get_sequence(self):
+        """ Get the sequence of all bases as a string, ordered by row. """
+        return self.seq.tobytes().decode('ascii')
@@ -21,13 +21,19 @@
 from collections import OrderedDict
 import json
 import logging
+import numpy as np
 
 from ..converters.cadnano.common import CadnanoLatticeType
-from ..converters.cadnano.utils import generate_coordinates
-from .dna_structure_helix import DnaHelixConnection
-from .lattice import Lattice
+from ..converters.cadnano.utils import generate_helices_coordinates
+from .base_table import NONE_ID, BaseTable
+from .dna_structure_helix import DnaHelixConnection, DnaHelixCrossover
+from .lattice import Lattice, LatticeIndex
+from .pair_table import PairTable
+from .stability_report import StabilityReport
 from .strand import DnaStrand
+from .strand_tracer import trace_strands
 from .domain import Domain
+from .domain_segmenter import segment_domains
 
 
 class DnaStructure(object):
@@ -35,16 +41,31 @@ class DnaStructure(object):
 
         Attributes:
             base_connectivity (List[DnaBase]): The list of DnaBase objects for the structure.
+            base_table (BaseTable): The table storing the data of the bases in base_connectivity as NumPy arrays,
+                the base with ID i in row i. The DnaBase objects are views of its rows.
+            design_crossovers (Dict[List[DnaHelixCrossover]]): The dictionary that maps helix IDs to the list of design
+                crossovers of the helix. It is computed when first accessed.
             domain_list (List[Domain]): The list of Domain objects for the structure.
-            id_nt (NumPy Nx2 ndarray[int]): The base IDs for scaffold bases and their paired staple base.
+            domains (List[Domain]): The list of Domain objects for the structure, computed when first accessed.
+            helix_connectivity (Dict[List[DnaHelixConnection]]): The dictionary that maps helix IDs to the list of
+                helices the helix is connected to. It is computed when first accessed.
+            id_nt (NumPy Nx2 ndarray[int]): The base IDs for scaffold bases and their paired staple base, the base_ids
+                column of pair_table.
+            pair_table (PairTable): The base pairs of the structure stored as NumPy arrays. It is created when first
+                accessed and reset when the base connectivity or strands change.
             lattice_type (CadnanoLatticeType): The lattice type the geometry of this structure is derived from.
             lattice (Lattice): The Lattice object used for calculating lattice-dependent data (e.g. neighboring lattice
                 locations).
             parameters (DnaParameters): Stores information for DNA parameters (e.g. helix radius).
+            strand_helix_refs (Dict[Dict[DnaStructureHelix]]): The dictionary that maps strand IDs to the helices
+                referenced by the strand. It is computed when first accessed.
             strands (List[DnaStrand]): The list a DnaStrand objects.
             strands_map (Dict[DnaStrand]): The dictionary that maps strand IDs to DnaStrand objects.
     """
 
+    # The auxiliary data items derived from the base connectivity, computed independently when first accessed.
+    AUX_DATA_ITEMS = ('strand_helix_refs', 'domains', 'helix_connectivity', 'design_crossovers')
+
     def __init__(self, name, base_connectivity, helices, dna_parameters):
         """ Initialize a DnaStructure object.
 
@@ -58,16 +79,41 @@ class DnaStructure(object):
         self.lattice_type = CadnanoLatticeType.none
         self.lattice = None
         self.dna_parameters = dna_parameters
+        self._base_table = None
+        self._pair_table = None
+        self._strand_residue_ranges = None
         self.base_connectivity = base_connectivity
         self.structure_helices_map = dict()
-        self.structure_helices_coord_map = dict()
+        self.structure_helices_coord_map = LatticeIndex()
         self.strands = None
         self.strands_map = dict()
         self.domain_list = []
         self.connector_points = []
         self._logger = logging.getLogger(__name__)
         self._add_structure_helices(helices)
-        self._aux_data_computed = False
+        self._computed_aux_data = set()
+        self._changed_strand_ids = set()
+        self._changed_helix_ids = set()
+
+    @property
+    def base_connectivity(self):
+        """ The list of DnaBase objects for the structure. """
+        return self._base_connectivity
+
+    @base_connectivity.setter
+    def base_connectivity(self, base_connectivity):
+        self._base_connectivity = base_connectivity
+        self._base_table = BaseTable.from_bases(base_connectivity)
+        self._pair_table = None
+
+    @property
+    def base_table(self):
+        """ The BaseTable storing the base connectivity and sequence as NumPy arrays.
+
+            The bases in base_connectivity are views of the table rows, so changes to the bases are changes to
+            the table and the other way around.
+        """
+        return self._base_table
 
     def _add_structure_helices(self, structure_helices):
         """ Add a list of structural helices.
@@ -99,23 +145,181 @@ class DnaStructure(object):
         self.lattice = Lattice.create_lattice(
             lattice_type, self.dna_parameters.helix_distance)
 
+    @property
+    def strand_helix_refs(self):
+        """ The dictionary that maps strand IDs to the helices referenced by the strand. """
+        self._compute_aux_data_item('strand_helix_refs')
+        return {strand.id: strand.helix_list for strand in self.strands}
+
+    @property
+    def domains(self):
+        """ The list of Domain objects for the structure. """
+        self._compute_aux_data_item('domains')
+        return self.domain_list
+
+    @property
+    def helix_connectivity(self):
+        """ The dictionary that maps helix IDs to the list of helices the helix is connected to. """
+        self._compute_aux_data_item('helix_connectivity')
+        return {helix.id: helix.helix_connectivity for helix in self.structure_helices_map.values()}
+
+    @property
+    def design_crossovers(self):
+        """ The dictionary that maps helix IDs to the list of design crossovers of the helix. """
+        self._compute_aux_data_item('design_crossovers')
+        return {helix.id: [crossover for connection in helix.helix_connectivity for crossover in connection.crossovers]
+                for helix in self.structure_helices_map.values()}
+
+    @property
+    def pair_table(self):
+        """ The PairTable storing the base pairs of the structure as NumPy arrays. """
+        if self._pair_table is None:
+            self._pair_table = PairTable.from_structure(self)
+        return self._pair_table
+
+    @property
+    def id_nt(self):
+        """ The NumPy Nx2 ndarray[int] of the base IDs of scaffold bases and their paired staple base. """
+        return self.pair_table.base_ids
+
     def compute_aux_data(self):
         """ Compute auxiliary data.
 
             Compute data derived from the base connectivty: domains, strand/helix and helix/helix connectivty
             relationships, and crossovers. This data is needed for visualization, calculating melting
             temperature and other applications.
+
+            Each item of auxiliary data (see AUX_DATA_ITEMS) is also computed on its own when its property is
+            first accessed, so a writer only computes the data it reads.
+
+            Domains are not recomputed if they have already been set (e.g. read from a binary structure file).
+
+            Once computed, only the data for the strands and helices marked as changed by mark_strands_changed()
+            and mark_helices_changed() is recomputed.
+        """
+        for name in self.AUX_DATA_ITEMS:
+            self._compute_aux_data_item(name)
+
+    def _compute_aux_data_item(self, name):
+        """ Compute an item of auxiliary data if it has not been computed.
+
+            Arguments:
+                name (string): The name of the item, one of AUX_DATA_ITEMS.
+
+            The computed items are first updated for the strands and helices marked as changed.
         """
-        if self._aux_data_computed:
+        if self._changed_strand_ids or self._changed_helix_ids:
+            self._update_aux_data()
+        if name in self._computed_aux_data:
             return
         for strand in self.strands:
             strand.dna_structure = self
-        self.set_strand_helix_references()
-        self._compute_strand_helix_references()
-        self._compute_domains()
-        self._set_helix_connectivity()
-        self._compute_helix_design_crossovers()
-        self._aux_data_computed = True
+        if name == 'strand_helix_refs':
+            self._compute_strand_helix_references()
+        elif name == 'domains':
+            if not self.domain_list:
+                self._compute_domains()
+        elif name == 'helix_connectivity':
+            self._set_helix_connectivity()
+        elif name == 'design_crossovers':
+            self._compute_aux_data_item('helix_connectivity')
+            self._compute_helix_design_crossovers()
+        else:
+            raise ValueError("Unknown auxiliary data item %s." % name)
+        self._computed_aux_data.add(name)
+
+    def mark_strands_changed(self, strands):
+        """ Mark strands whose bases are being changed so that their auxiliary data is recomputed.
+
+            Arguments:
+                strands (List[DnaStrand]): The list of strands to mark.
+
+            This must be called before the bases of the strands are changed or removed. The strands paired to the
+            marked strands and the helices containing their bases are also marked, the domains of paired strands
+            depending on the ends and crossovers of the strands they are paired to.
+        """
+        if not self._computed_aux_data:
+            return
+        for strand in strands:
+            self._changed_strand_ids.add(strand.id)
+            for base in strand.tour:
+                self._changed_helix_ids.add(base.h)
+                if base.across is not None and base.across.strand is not None:
+                    self._changed_strand_ids.add(base.across.strand)
+
+    def mark_helices_changed(self, helices):
+        """ Mark helices whose geometry or bases have changed so that their auxiliary data is recomputed.
+
+            Arguments:
+                helices (List[DnaStructureHelix]): The list of helices to mark.
+        """
+        if not self._computed_aux_data:
+            return
+        for helix in helices:
+            self._changed_helix_ids.add(helix.id)
+
+    def _update_aux_data(self):
+        """ Recompute the auxiliary data for the strands and helices marked as changed.
+
+            Only the items of auxiliary data that have been computed are updated. The domains of the changed
+            strands are recomputed and then all domains are renumbered to keep domain IDs equal to their index
+            in domain_list. The connectivity and crossovers are recomputed for the changed helices and the
+            helices connected to them.
+        """
+        changed_strands = [strand for strand in self.strands if strand.id in self._changed_strand_ids]
+        changed_helices = [self.structure_helices_map[id] for id in self._changed_helix_ids
+                           if id in self.structure_helices_map]
+        self._logger.debug("Update auxiliary data for %d strands and %d helices" % (len(changed_strands),
+                                                                                    len(changed_helices)))
+        self._changed_strand_ids = set()
+        self._changed_helix_ids = set()
+
+        computed = self._computed_aux_data
+        for strand in changed_strands:
+            strand.dna_structure = self
+        if 'strand_helix_refs' in computed:
+            self._compute_strand_helix_references(changed_strands)
+
+        # Recompute the domains of the changed strands using new domain IDs.
+        if 'domains' in computed:
+            for strand in changed_strands:
+                strand.domain_list = []
+            self._segment_strand_domains(changed_strands, len(self.domain_list))
+            self.check_domains(changed_strands)
+            self._renumber_domains()
+
+        # Update the changed helices and the helices connected to them.
+        if 'helix_connectivity' not in computed:
+            return
+        helix_ids = set(helix.id for helix in changed_helices)
+        for helix in changed_helices:
+            helix_ids.update(neighbor.id for neighbor in self.get_neighbor_helices(helix))
+        helices = [helix for helix in self.structure_helices_map.values() if helix.id in helix_ids]
+        self._set_helix_connectivity(helices)
+        if 'design_crossovers' in computed:
+            self._compute_helix_design_crossovers(helices)
+
+    def _renumber_domains(self):
+        """ Recreate domain_list from the strand domains, numbering domains by their index in the list.
+
+            The domain IDs of bases are updated for domains whose ID has changed and the connected strand and domain
+            of all domains are set.
+        """
+        self.domain_list = [domain for strand in self.strands for domain in strand.domain_list]
+        for id, domain in enumerate(self.domain_list):
+            if domain.id == id:
+                continue
+            domain.id = id
+            for base in domain.base_list:
+                base.domain = id
+        self._set_domain_connections(self.domain_list)
+
+    def _reset_aux_data(self):
+        """ Reset the auxiliary data after the strands of the structure have changed. """
+        self.domain_list = []
+        for strand in self.strands:
+            strand.domain_list = []
+        self._computed_aux_data = set()
 
     def create_strands(self):
         """ Create the list of strands connecting contiguous sequences of bases.
@@ -123,56 +327,24 @@ class DnaStructure(object):
             Returns the list of strands (List[DnaStrand]).
         """
         base_connectivity = self.base_connectivity
-        num_bases = len(base_connectivity)
-        strands = []
-        n_strand = 0
-        is_visited = [False]*num_bases
-
-        while (True):
-            try:
-                base_index = is_visited.index(False)
-                curr_base = base_connectivity[base_index]
-            except ValueError:
-                break
-
-            init_base = curr_base
-            # Find the first base in the current strand.
-            while curr_base.up and (curr_base.up.id != init_base.id):
-                curr_base = curr_base.up
-                if (is_visited[curr_base.id]):
-                    return None
-
-            if not curr_base.up:                     # currBase is at the 5'-end of the strand
-                is_circular = False
-            elif curr_base.up.id == init_base.id:    # currBase goes back to the starting point
-                is_circular = True
-                curr_base = init_base
-            else:
-                return None
-
-            # Walk through the current strand.
-            n_residue = 1
-            tour = [curr_base]
-            curr_base.strand = n_strand
-            curr_base.residue = n_residue
-            is_visited[curr_base.id] = True
-            is_scaffold = False
-
-            while ((not is_circular and curr_base.down) or
-                    (is_circular and (curr_base.down.id != init_base.id))):
-                curr_base = curr_base.down
-
-                if (is_visited[curr_base.id]):
-                    return None
+        table = self.base_table
+        traced_strands = trace_strands(table.up, table.down)
+        if traced_strands is None:
+            return None
 
-                if (n_residue == 1):
-                    is_scaffold = curr_base.is_scaf
+        # Set the strand IDs and residues of the bases.
+        if traced_strands:
+            tour_ids = np.concatenate([tour_ids for tour_ids, _ in traced_strands])
+            tour_sizes = [len(tour_ids) for tour_ids, _ in traced_strands]
+            table.strand[tour_ids] = np.repeat(np.arange(len(traced_strands)), tour_sizes)
+            table.residue[tour_ids] = np.arange(1, len(tour_ids) + 1) - np.repeat(np.cumsum(tour_sizes) - tour_sizes,
+                                                                                   tour_sizes)
 
-                n_residue = n_residue + 1
-                tour.append(curr_base)
-                curr_base.strand = n_strand
-                curr_base.residue = n_residue
-                is_visited[curr_base.id] = True
+        strands = []
+        for n_strand, (tour_ids, is_circular) in enumerate(traced_strands):
+            tour = [base_connectivity[id] for id in tour_ids.tolist()]
+            # The strand type is taken from its second base.
+            is_scaffold = tour[1].is_scaf if len(tour) > 1 else False
 
             # Modify the strand if it is circular and the first base crosses over to another helix.
             # The first base is moved to the end of the strand. This will prevent later issues, like
@@ -187,16 +359,110 @@ class DnaStructure(object):
 
             strand = DnaStrand(n_strand, self, is_scaffold, is_circular, tour)
             strands.append(strand)
-            n_strand += 1
 
         self.strands = strands
+        self._pair_table = None
+        self._strand_residue_ranges = None
         return self.strands
     # _def create_strands
 
+    def strand_local_index(self, base_ids):
+        """ Get the index of bases into the tours of their strands.
+
+            Arguments:
+                base_ids (NumPy ndarray[int]): The IDs of the bases.
+
+            Returns a NumPy ndarray[int] of the index of each base into its strand tour, NONE_ID for a base that
+            is not in a strand or for a base ID of NONE_ID.
+
+            The index is computed from the base table strand and residue columns. Residues number the bases of
+            a strand from 1 in the order the strand was traced, which is the tour order except for a circular
+            strand whose first base was moved to the end of its tour.
+        """
+        table = self.base_table
+        base_ids = np.asarray(base_ids, dtype=np.int64)
+        is_valid = base_ids != NONE_ID
+        base_ids = np.where(is_valid, base_ids, 0)
+        strand_ids = table.strand[base_ids]
+        residues = table.residue[base_ids]
+        is_valid &= (strand_ids != NONE_ID) & (residues != NONE_ID)
+        first_residues, sizes = self._get_strand_residue_ranges()
+        strand_ids = np.where(is_valid, strand_ids, 0)
+        index = (residues - first_residues[strand_ids]) % np.maximum(sizes[strand_ids], 1)
+        return np.where(is_valid, index, NONE_ID)
+
+    def get_base_geometry(self):
+        """ Get the geometry of the bases as arrays indexed by base ID.
+
+            Returns a tuple (coordinates, ref_frames, nt_coords) of a NumPy Nx3 ndarray[float] of the base helix
+            axis coordinates, a NumPy Nx3x3 ndarray[float] of the base reference frames and a NumPy Nx3
+            ndarray[float] of the base nucleotide coordinates. The entries of a base without geometry are NaN.
+
+            The base geometry is stored in the structure helices, where paired bases share a helix axis node,
+            and the bases reference it. The arrays are copies gathered from the helices using the base table
+            helix and node columns.
+        """
+        table = self.base_table
+        bases = self.base_connectivity
+        num_bases = len(table)
+        coordinates = np.full((num_bases, 3), np.nan)
+        ref_frames = np.full((num_bases, 3, 3), np.nan)
+
+        # The index of a base node into the helix axis arrays concatenated in helix order is the offset of its
+        # helix plus its node.
+        helices = list(self.structure_helices_map.values())
+        if helices:
+            helix_offsets = np.zeros(max([helix.id for helix in helices]) + 1, dtype=np.int64)
+            helix_offsets[[helix.id for helix in helices]] = np.cumsum(
+                [0] + [len(helix.helix_axis_coords) for helix in helices[:-1]])
+            axis_coords = np.concatenate([helix.helix_axis_coords for helix in helices])
+            axis_frames = np.concatenate([np.moveaxis(helix.helix_axis_frames, 2, 0) for helix in helices])
+            has_node = table.node != NONE_ID
+            index = helix_offsets[table.helix[has_node]] + table.node[has_node]
+            coordinates[has_node] = axis_coords[index]
+            ref_frames[has_node] = axis_frames[index]
+
+        # Add the geometry of bases that is not stored at a helix axis node.
+        for id in np.flatnonzero(table.node == NONE_ID).tolist():
+            if bases[id].coordinates is not None:
+                coordinates[id] = bases[id].coordinates
+            if bases[id].ref_frame is not None:
+                ref_frames[id] = bases[id].ref_frame
+
+        nt_coords = np.array([(np.nan,) * 3 if base.nt_coords is None else base.nt_coords for base in bases],
+                             dtype=float).reshape((num_bases, 3))
+        return coordinates, ref_frames, nt_coords
+
+    def _get_strand_residue_ranges(self):
+        """ Get the residue of the first base of each strand tour and the number of bases in each strand.
+
+            Returns two NumPy ndarray[int] indexed by strand ID.
+        """
+        if self._strand_residue_ranges is None:
+            num_strands = max([strand.id for strand in self.strands], default=-1) + 1
+            first_residues = np.ones(num_strands, dtype=np.int64)
+            sizes = np.zeros(num_strands, dtype=np.int64)
+            for strand in self.strands:
+                if strand.tour and strand.tour[0].residue is not None:
+                    first_residues[strand.id] = strand.tour[0].residue
+                sizes[strand.id] = len(strand.tour)
+            self._strand_residue_ranges = (first_residues, sizes)
+        return self._strand_residue_ranges
+
     def get_domains(self):
-        if (not self.domain_list):
-            self._compute_domains()
-        return self.domain_list
+        return self.domains
+
+    def stability_report(self, temperature_in_K=None):
+        """ Create a report of the thermodynamic stability of the structure domains and strands.
+
+            Arguments:
+                temperature_in_K (float): The temperature in Kelvin used for free energies and domain stability.
+                    If None then the energy model temperature (37 C) is used.
+
+            Returns a StabilityReport with the per-domain energies and melting temperatures and their
+            per-strand aggregates.
+        """
+        return StabilityReport.from_structure(self, temperature_in_K)
 
     def get_strand(self, id):
         """ Get a strand from an id. """
@@ -217,12 +483,25 @@ class DnaStructure(object):
         removed_strands, remaining_strands = self.create_removed_staple_lists(
             retain_staples)
 
+        # Mark the strands and helices whose auxiliary data must be updated.
+        self.mark_strands_changed(removed_strands)
+        if 'domains' in self._computed_aux_data:
+            for strand in removed_strands:
+                for base in strand.tour:
+                    base.domain = None
+
+        self._pair_table = None
+
         #  Remove the strands from the structure.
         self.remove_helices_bases(removed_strands)
 
         # Reset strand data.
         self.strands = remaining_strands
         self.strands_map = dict()
+        if 'domains' not in self._computed_aux_data:
+            self.domain_list = []
+            for strand in self.strands:
+                strand.domain_list = []
 
         if self._logger.getEffectiveLevel() == logging.DEBUG:
             self._logger.debug(
@@ -302,11 +581,14 @@ class DnaStructure(object):
 
         # Add maximal set of staple strands crossovers and generate the helix
         # axis coordinates and frames, and DNA helix nucleotide coordinates.
-        for helix in self.structure_helices_map.values():
+        helices = list(self.structure_helices_map.values())
+        for helix in helices:
             helix.add_maximal_staple_crossovers()
-            axis_coords, axis_frames, scaffold_coords, staple_coords = \
-                generate_coordinates(self.dna_parameters, self.lattice_type, helix.lattice_row, helix.lattice_col,
-                                     helix.lattice_num, helix.scaffold_bases, helix.staple_bases)
+        helices_geometry = generate_helices_coordinates(
+            self.dna_parameters, self.lattice_type,
+            [(helix.lattice_row, helix.lattice_col, helix.lattice_num, helix.scaffold_bases, helix.staple_bases)
+             for helix in helices])
+        for helix, (axis_coords, axis_frames, scaffold_coords, staple_coords) in zip(helices, helices_geometry):
             helix.set_coordinates(axis_coords, axis_frames,
                                   scaffold_coords, staple_coords)
 
@@ -316,6 +598,7 @@ class DnaStructure(object):
         # Create the list of strands from the new base connectivity.
         self.create_strands()
         self.strands_map = dict()
+        self._reset_aux_data()
         self._logger.info("Number of added staples %d" %
                           (len(self.strands)-len(remaining_strands)))
         self._logger.info("Total number of strands %d" % len(self.strands))
@@ -376,16 +659,27 @@ class DnaStructure(object):
 
         return staple_strands
 
+    def create_id_nt(self):
+        """ Create the table of paired bases.
+
+            Returns a NumPy Nx2 ndarray[int] of the base IDs of scaffold bases and their paired staple base,
+            ordered by scaffold base ID.
+        """
+        table = self.base_table
+        scaffold_ids = np.flatnonzero(table.is_scaf & (table.across != NONE_ID))
+        return np.column_stack((scaffold_ids, table.across[scaffold_ids]))
+
     def set_strand_helix_references(self):
         """ Set the helices referenced by each strand. """
-        for strand in self.strands:
-            for base in strand.tour:
-                helix = self.structure_helices_map[base.h]
-                strand.add_helix(helix)
+        self._compute_strand_helix_references()
 
-    def _compute_domains(self):
+    def _compute_domains(self, vectorized=True):
         """ Compute DNA domains from strands.
 
+            Arguments:
+                vectorized (bool): If True then the domains of all strands are found at once from the base table
+                    arrays, otherwise by traversing the bases of each strand.
+
             Domains are computed by traversing the bases in the scaffold and staple strands of a structure.
             Domain are bounded by a single->double or double->single strand transitions, crossovers between
             helices or strand termination.
@@ -398,100 +692,16 @@ class DnaStructure(object):
         domain_id = 0
         self.domain_list = []
 
-        # Set flag for merging domains.
-        merge_domains = True
-        merge_domains = False
-
-        # Iterate over the scaffold and staple strands of a structure.
-        for strand in self.strands:
-            self._logger.debug("")
-            if (strand.is_scaffold):
-                self._logger.debug(
-                    "==================== scaffold strand %d ====================" % strand.id)
-            else:
-                self._logger.debug(
-                    "==================== staple strand %d ====================" % strand.id)
-
-            start_base = strand.tour[0]
-            end_base = strand.tour[-1]
-            self._logger.debug("Strand number of bases: %3d" %
-                               len(strand.tour))
-            self._logger.debug("Strand start: h: %3d  p: %3d" %
-                               (start_base.h, start_base.p))
-            self._logger.debug("Strand end: h: %3d  p: %3d" %
-                               (end_base.h, end_base.p))
-
-            # Initialize the domain base list.
-            base = strand.tour[0]
-            curr_across_sign = 0 if base.across else -1
-            domain_bases = [base]
-
-            # Traverse the bases in a strand and create domains.
-            for i in range(1, len(strand.tour)):
-                base = strand.tour[i]
-                across_sign = 0 if base.across else -1
-                add_curr_base = True
-                # self._logger.debug("Base h %3d  p %3d " % (base.h, base.p))
-                # if (base.up):
-                #    self._logger.debug("    Base up  h %3d  p %3d " % (base.up.h, base.up.p))
-
-                # If no domain bases then just continue after checking for sign change.
-                if len(domain_bases) == 0:
-                    domain_bases.append(base)
-                    if curr_across_sign != across_sign:
-                        curr_across_sign = across_sign
-                    continue
-
-                # Check for a single->double or double->single strand transition.
-                if curr_across_sign != across_sign:
-                    domain_id = self._add_domain(
-                        domain_id, strand, domain_bases, merge_domains, "sign change")
-                    domain_bases = []
-                    curr_across_sign = across_sign
-
-                # Check for a crossover between helices for this base.
-                elif self._check_base_crossover(base):
-                    last_base = domain_bases[-1]
-                    # Make sure the current base is in the same helix.
-                    if base.h == last_base.h:
-                        domain_bases.append(base)
-                        add_curr_base = False
-                    domain_id = self._add_domain(
-                        domain_id, strand, domain_bases, merge_domains, "base crossover")
-                    domain_bases = []
-
-                # Check the base paired to this base for: crossover or termination.
-                elif base.across is not None:
-                    abase = base.across
-                    if self._check_base_crossover(abase):
-                        domain_bases.append(base)
-                        add_curr_base = False
-                        domain_id = self._add_domain(
-                            domain_id, strand, domain_bases, merge_domains, "abase crossover")
-                        domain_bases = []
-                    # If a strand terminates make sure the current base is in the same strand.
-                    elif (abase.down is None) or (abase.up is None):
-                        last_base = domain_bases[-1]
-                        if last_base.across is not None:
-                            last_abase = last_base.across
-                            if abase.strand == last_abase.strand:
-                                domain_bases.append(base)
-                                add_curr_base = False
-                        else:
-                            domain_bases.append(base)
-                            add_curr_base = False
-                        domain_id = self._add_domain(
-                            domain_id, strand, domain_bases, merge_domains, "abase start/end")
-                        domain_bases = []
-
-                # Add the current base to the current list of domain bases.
-                if add_curr_base:
-                    domain_bases.append(base)
+        if vectorized:
+            domain_id = self._segment_strand_domains(self.strands, domain_id)
+        else:
+            # Set flag for merging domains.
+            merge_domains = True
+            merge_domains = False
 
-            # Add a domain for any remaining bases.
-            if len(domain_bases) != 0:
-                domain_id = self._add_domain(
-                    domain_id, strand, domain_bases, merge_domains, "remaining")
+            # Iterate over the scaffold and staple strands of a structure.
+            for strand in self.strands:
+                domain_id = self._compute_strand_domains(strand, domain_id, merge_domains)
 
         self._logger.info("Number of domains computed: %d " %
                           len(self.domain_list))
@@ -500,7 +710,62 @@ class DnaStructure(object):
         self.check_domains()
 
         # Set the strand and domain each domain is connected to.
-        for domain in self.domain_list:
+        self._set_domain_connections(self.domain_list)
+
+    def _segment_strand_domains(self, strands, domain_id):
+        """ Compute the DNA domains of a list of strands from the base table arrays.
+
+            Arguments:
+                strands (List[DnaStrand]): The strands to compute the domains of.
+                domain_id (int): The ID of the first domain created.
+
+            Returns the next domain ID.
+
+            The domain boundaries of all strands are found using segment_domains(), giving the same domains as
+            _compute_strand_domains(). The base table domain IDs are updated in place.
+
+            If the strand tours contain bases that are not in the base connectivity table (e.g. strands could
+            not be recreated after modifying the structure) then domains are computed base by base.
+        """
+        if not strands:
+            return domain_id
+        base_connectivity = self.base_connectivity
+        num_bases = len(base_connectivity)
+        tour_bases = [base for strand in strands for base in strand.tour]
+        tour_ids = [base.id for base in tour_bases]
+        if tour_ids and (max(tour_ids) >= num_bases or [base_connectivity[id] for id in tour_ids] != tour_bases):
+            self._logger.warning("Strands do not match the base connectivity table, compute domains base by base.")
+            for strand in strands:
+                domain_id = self._compute_strand_domains(strand, domain_id, False)
+            return domain_id
+
+        table = self.base_table
+        strand_starts = np.zeros(len(strands) + 1, dtype=np.int64)
+        np.cumsum([len(strand.tour) for strand in strands], out=strand_starts[1:])
+        tour_ids = np.array(tour_ids, dtype=np.int64)
+        domain_starts = segment_domains(tour_ids, strand_starts[:-1], table.up, table.down, table.across,
+                                        table.helix, table.strand)
+        domain_ends = np.append(domain_starts[1:], len(tour_ids))
+        domain_strands = np.searchsorted(strand_starts, domain_starts, side='right') - 1
+
+        first_domain_id = domain_id
+        helices_map = self.structure_helices_map
+        strand_starts = strand_starts.tolist()
+        for start, end, strand_index in zip(domain_starts.tolist(), domain_ends.tolist(), domain_strands.tolist()):
+            strand = strands[strand_index]
+            offset = strand_starts[strand_index]
+            base_list = strand.tour[start - offset:end - offset]
+            domain = Domain(domain_id, helices_map[base_list[0].h], strand, base_list)
+            strand.domain_list.append(domain)
+            self.domain_list.append(domain)
+            domain_id += 1
+
+        table.domain[tour_ids] = np.repeat(np.arange(first_domain_id, domain_id), domain_ends - domain_starts)
+        return domain_id
+
+    def _set_domain_connections(self, domains):
+        """ Set the strand and domain each domain in a list of domains is connected to. """
+        for domain in domains:
             across_base = None
             for base in domain.base_list:
                 if (base.across is not None):
@@ -514,6 +779,108 @@ class DnaStructure(object):
             domain.connected_strand = conn_strand
             domain.connected_domain = conn_dom
 
+    def _compute_strand_domains(self, strand, domain_id, merge_domains):
+        """ Compute the DNA domains of a strand.
+
+            Arguments:
+                strand (DnaStrand): The strand to compute the domains of.
+                domain_id (int): The ID of the first domain created.
+                merge_domains (bool): If True then for circular strands merge the bases from the start of the
+                    strand with those from the end.
+
+            Returns the next domain ID.
+        """
+        self._logger.debug("")
+        if (strand.is_scaffold):
+            self._logger.debug(
+                "==================== scaffold strand %d ====================" % strand.id)
+        else:
+            self._logger.debug(
+                "==================== staple strand %d ====================" % strand.id)
+
+        start_base = strand.tour[0]
+        end_base = strand.tour[-1]
+        self._logger.debug("Strand number of bases: %3d" %
+                           len(strand.tour))
+        self._logger.debug("Strand start: h: %3d  p: %3d" %
+                           (start_base.h, start_base.p))
+        self._logger.debug("Strand end: h: %3d  p: %3d" %
+                           (end_base.h, end_base.p))
+
+        # Initialize the domain base list.
+        base = strand.tour[0]
+        curr_across_sign = 0 if base.across else -1
+        domain_bases = [base]
+
+        # Traverse the bases in a strand and create domains.
+        for i in range(1, len(strand.tour)):
+            base = strand.tour[i]
+            across_sign = 0 if base.across else -1
+            add_curr_base = True
+            # self._logger.debug("Base h %3d  p %3d " % (base.h, base.p))
+            # if (base.up):
+            #    self._logger.debug("    Base up  h %3d  p %3d " % (base.up.h, base.up.p))
+
+            # If no domain bases then just continue after checking for sign change.
+            if len(domain_bases) == 0:
+                domain_bases.append(base)
+                if curr_across_sign != across_sign:
+                    curr_across_sign = across_sign
+                continue
+
+            # Check for a single->double or double->single strand transition.
+            if curr_across_sign != across_sign:
+                domain_id = self._add_domain(
+                    domain_id, strand, domain_bases, merge_domains, "sign change")
+                domain_bases = []
+                curr_across_sign = across_sign
+
+            # Check for a crossover between helices for this base.
+            elif self._check_base_crossover(base):
+                last_base = domain_bases[-1]
+                # Make sure the current base is in the same helix.
+                if base.h == last_base.h:
+                    domain_bases.append(base)
+                    add_curr_base = False
+                domain_id = self._add_domain(
+                    domain_id, strand, domain_bases, merge_domains, "base crossover")
+                domain_bases = []
+
+            # Check the base paired to this base for: crossover or termination.
+            elif base.across is not None:
+                abase = base.across
+                if self._check_base_crossover(abase):
+                    domain_bases.append(base)
+                    add_curr_base = False
+                    domain_id = self._add_domain(
+                        domain_id, strand, domain_bases, merge_domains, "abase crossover")
+                    domain_bases = []
+                # If a strand terminates make sure the current base is in the same strand.
+                elif (abase.down is None) or (abase.up is None):
+                    last_base = domain_bases[-1]
+                    if last_base.across is not None:
+                        last_abase = last_base.across
+                        if abase.strand == last_abase.strand:
+                            domain_bases.append(base)
+                            add_curr_base = False
+                    else:
+                        domain_bases.append(base)
+                        add_curr_base = False
+                    domain_id = self._add_domain(
+                        domain_id, strand, domain_bases, merge_domains, "abase start/end")
+                    domain_bases = []
+
+            # Add the current base to the current list of domain bases.
+            if add_curr_base:
+                domain_bases.append(base)
+
+        # Add a domain for any remaining bases.
+        if len(domain_bases) != 0:
+            domain_id = self._add_domain(
+                domain_id, strand, domain_bases, merge_domains, "remaining")
+
+        return domain_id
+
     def _check_base_crossover(self, base):
         """ Check if there is a crossover to a different helix at the given base.
 
@@ -534,23 +901,25 @@ class DnaStructure(object):
 
         return False
 
-    def check_domains(self):
+    def check_domains(self, strands=None):
         """ Check that the bases in the domains created for a structure are consistent with the bases in the strand
             they are part of.
 
+            Arguments:
+                strands (List[DnaStrand]): The list of strands to check, or None to check all strands.
+
             The combination of the bases in a list of domains for a strand should equal the number of base and follow
             the order of bases in that strand. In addition each domain should only contain bases for a single helix.
         """
         self._logger.debug(
             "============================== check domains ============================== ")
         num_failures = 0
-        for strand in self.strands:
+        debug = self._logger.isEnabledFor(logging.DEBUG)
+        for strand in (self.strands if strands is None else strands):
             self._logger.debug(
                 "-------------------- strand %d -------------------- " % strand.id)
             self._logger.debug("Number of bases %d " % len(strand.tour))
-            strand_bases = ""
-            for base in strand.tour:
-                strand_bases += " " + str(base.id)
+            strand_bases = " " + " ".join([str(base.id) for base in strand.tour])
             self._logger.debug("Bases: %s " % strand_bases)
             domain_list = strand.domain_list
             self._logger.debug("Number of domains: %d" % len(domain_list))
@@ -563,8 +932,9 @@ class DnaStructure(object):
                 self._logger.debug("Domain %d: number of bases: %d" %
                                    (domain.id, len(domain.base_list)))
                 for base in domain.base_list:
-                    self._logger.debug(
-                        "       base id %d  h %d  p %d" % (base.id, base.h, base.p))
+                    if debug:
+                        self._logger.debug(
+                            "       base id %d  h %d  p %d" % (base.id, base.h, base.p))
                     if base.h != helix:
                         helix = base.h
                         helix_list.append(helix)
@@ -719,38 +1089,110 @@ class DnaStructure(object):
 
         return id
 
-    def _compute_strand_helix_references(self):
-        """ Set the virtual helices referenced by each strand. """
-        for strand in self.strands:
+    def _compute_strand_helix_references(self, strands=None):
+        """ Set the virtual helices referenced by strands.
+
+            Arguments:
+                strands (List[DnaStrand]): The list of strands to set the helices of, or None to set them for all
+                    strands. The helices previously referenced by the strands are replaced.
+        """
+        if strands is None:
+            strands = self.strands
+        for strand in strands:
+            strand.helix_list = dict()
             for base in strand.tour:
                 helix = self.structure_helices_map[base.h]
                 strand.add_helix(helix)
 
-    def _set_helix_connectivity(self):
-        """ For each helix set the list of helices it is connected to. """
+    def _set_helix_connectivity(self, helices=None):
+        """ For each helix set the list of helices it is connected to.
+
+            Arguments:
+                helices (List[DnaStructureHelix]): The list of helices to set the connectivity of, or None to set it
+                    for all helices.
+
+            The connected helices are the helices at the neighboring lattice coordinates of a helix, found
+            using structure_helices_coord_map, and are listed in structure_helices_map order.
+        """
         self._logger.debug(
             "[DnaModel::==================== set_vhelix_connectivity==================== ] ")
-        for helix1 in self.structure_helices_map.values():
+        helix_order = {helix.id: i for i, helix in enumerate(self.structure_helices_map.values())}
+        if helices is None:
+            helices = self.structure_helices_map.values()
+        for helix1 in helices:
             self._logger.debug(" ----- vhelix num %d -----" %
                                helix1.lattice_num)
             helix_connectivity = []
-            row = helix1.lattice_row
-            col = helix1.lattice_col
-            for helix2 in self.structure_helices_map.values():
-                if helix1 == helix2:
-                    continue
-                if (abs(row-helix2.lattice_row) + abs(col-helix2.lattice_col) < 2) and \
-                        self.lattice.get_neighbor_index(row, col, helix2.lattice_row, helix2.lattice_col) is not None:
-                    connection = DnaHelixConnection(helix1, helix2)
-                    helix_connectivity.append(connection)
-                    self._logger.debug("connected to %d " % helix2.lattice_num)
+            for helix2 in sorted(self.get_neighbor_helices(helix1), key=lambda helix: helix_order[helix.id]):
+                connection = DnaHelixConnection(helix1, helix2)
+                helix_connectivity.append(connection)
+                self._logger.debug("connected to %d " % helix2.lattice_num)
             helix1.helix_connectivity = helix_connectivity
 
-    def _compute_helix_design_crossovers(self):
-        """ Compute the design cross-overs for all helices.
+    def get_neighbor_helices(self, helix):
+        """ Get the helices at the neighboring lattice coordinates of a helix.
+
+            Arguments:
+                helix (DnaStructureHelix): The helix to get the neighbors of.
+
+            Returns the list of neighboring helices (List[DnaStructureHelix]).
         """
-        for helix in self.structure_helices_map.values():
-            helix.compute_design_crossovers(self)
+        return self.structure_helices_coord_map.get_neighbor_items(self.lattice, helix.lattice_row,
+                                                                   helix.lattice_col)
+
+    def _compute_helix_design_crossovers(self, helices=None):
+        """ Compute the design cross-overs for helices.
+
+            Arguments:
+                helices (List[DnaStructureHelix]): The list of helices to compute the crossovers of, or None to
+                    compute them for all helices.
+
+            The bases whose down or up neighbor is in a different helix are found in a single pass over the
+            base table. A crossover is added to the connection between the helix of the base and the helix of
+            its neighbor. The crossovers of a connection are ordered as the bases in the helix staple and
+            scaffold base lists, with the crossover to the down neighbor of a base before that to its up neighbor.
+        """
+        if helices is None:
+            helices = list(self.structure_helices_map.values())
+        bases = self.base_connectivity
+        table = self.base_table
+
+        # Map (helix number, neighbor helix number) to the connection between the helices.
+        connection_map = {}
+        for helix in helices:
+            for connection in helix.helix_connectivity:
+                connection_map[(helix.lattice_num, connection.to_helix.lattice_num)] = connection
+
+        # Set the order of each base in the helix base lists, bases not in a helix have order NONE_ID.
+        helix_base_ids = [base.id for helix in helices for base_list in (helix.staple_bases, helix.scaffold_bases)
+                          for base in base_list]
+        base_order = np.full(len(table), NONE_ID, dtype=np.int64)
+        base_order[helix_base_ids] = np.arange(len(helix_base_ids))
+
+        # Find the crossover bases and the helix they cross over to.
+        crossover_ids = []
+        crossover_helices = []
+        crossover_keys = []
+        for direction, neighbor_ids in enumerate((table.down, table.up)):
+            ids = np.flatnonzero((neighbor_ids != NONE_ID) & (base_order != NONE_ID))
+            to_helices = table.helix[neighbor_ids[ids]]
+            is_crossover = to_helices != table.helix[ids]
+            ids = ids[is_crossover]
+            crossover_ids.append(ids)
+            crossover_helices.append(to_helices[is_crossover])
+            crossover_keys.append(2 * base_order[ids] + direction)
+        order = np.argsort(np.concatenate(crossover_keys))
+        crossover_ids = np.concatenate(crossover_ids)[order].tolist()
+        crossover_helices = np.concatenate(crossover_helices)[order].tolist()
+
+        for id, to_helix_num in zip(crossover_ids, crossover_helices):
+            base = bases[id]
+            connection = connection_map.get((base.h, to_helix_num))
+            if connection is None:
+                continue
+            strand = self.get_strand(base.strand)
+            crossover = DnaHelixCrossover(connection.from_helix, connection, base, strand)
+            connection.crossovers.append(crossover)
 
     def write(self, file_name, write_json_format):
         """ Write the structure information to a file.
@@ -840,21 +1282,33 @@ class DnaStructure(object):
         """ Write the base information with base connectivity to a file.
             Base information is written to files in JSON and plain text formats.
         """
+        # The base data is read from the columnar base table.
+        table = self.base_table
+        ids = range(len(table))
+        helix = table.helix.tolist()
+        pos = table.pos.tolist()
+        up = table.up.tolist()
+        down = table.down.tolist()
+        across = table.across.tolist()
+        seq = table.get_sequence()
+        strand = table.strand.tolist()
+        is_scaf = table.is_scaf.tolist()
+
         # Write base information in JSON format.
         if write_json_format:
             self._logger.info(
                 "Writing DNA base connectivity in JSON format to file %s." % file_name)
             base_list = []
-            for base in self.base_connectivity:
+            for i in ids:
                 base_info = OrderedDict()
-                base_info['id'] = base.id
-                base_info['helix'] = base.h
-                base_info['pos'] = base.p
-                base_info['up'] = base.up.id if base.up else -1
-                base_info['down'] = base.down.id if base.down else -1
-                base_info['across'] = base.across.id if base.across else -1
-                base_info['sequence'] = base.seq
-                base_info['strand'] = base.strand
+                base_info['id'] = i
+                base_info['helix'] = helix[i]
+                base_info['pos'] = pos[i]
+                base_info['up'] = up[i]
+                base_info['down'] = down[i]
+                base_info['across'] = across[i]
+                base_info['sequence'] = seq[i]
+                base_info['strand'] = strand[i]
                 base_list.append(base_info)
 
             topology = {'bases': base_list}
@@ -869,9 +1323,6 @@ class DnaStructure(object):
         with open(file_name, 'w') as outfile:
             outfile.write(
                 "# id   helix  pos   up   down  across  seq   strand   scaf\n")
-            for base in self.base_connectivity:
-                up = base.up.id if base.up else -1
-                down = base.down.id if base.down else -1
-                across = base.across.id if base.across else -1
-                outfile.write("%4d %5d %5d %5d %5d %5d  %5s  %5d  %5d\n" %
-                              (base.id, base.h, base.p, up, down, across, base.seq, base.strand, base.is_scaf))
+            outfile.write("".join(["%4d %5d %5d %5d %5d %5d  %5s  %5d  %5d\n" %
+                                   (i, helix[i], pos[i], up[i], down[i], across[i], seq[i], strand[i], is_scaf[i])
+                                   for i in ids]))
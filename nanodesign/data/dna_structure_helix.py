@@ -236,7 +236,7 @@ class DnaStructureHelix(object):
         for pos in range(start_pos, end_pos+1):
             has_staple, has_scaffold = self.has_base_pos(pos)
             if (not has_staple) and has_scaffold:
-                base = DnaBase(id)
+                base = DnaBase(id, table=self.scaffold_pos[pos].table)
                 base.p = pos
                 base.h = self.id
                 base.is_scaf = False
@@ -358,51 +358,6 @@ class DnaStructureHelix(object):
                 domain_ids.add(base.domain)
         return list(domain_ids)
 
-    def compute_design_crossovers(self, dna_structure):
-        """ Determine the scaffold and staple crossovers in the designed structure.
-        """
-        self._logger.debug(
-            "=================== compute design cross-overs p helix num %d ===================" % self.lattice_num)
-        self._logger.debug("Helix polarity %s " % self.scaffold_polarity)
-        self._logger.debug("Helix connectivity: %d " %
-                           len(self.helix_connectivity))
-        # strands = dna_structure.strands
-        for connection in self.helix_connectivity:
-            num = connection.to_helix.lattice_num
-            self._logger.debug("Crossover helix num %d" % num)
-            self._logger.debug("Number of staple bases: %d" %
-                               len(self.staple_bases))
-            # last_crossover = None
-            for base_list in [self.staple_bases, self.scaffold_bases]:
-                for base in base_list:
-                    if not base:
-                        continue
-                    self._logger.debug(">>> Base  id %d" % base.id)
-                    if (base.down is not None):
-                        if (base.down.h != base.h) and (base.down.h == num):
-                            self._logger.debug(
-                                "base:%4d  p:%4d  h:%4d" % (base.id, base.p, base.h))
-                            self._logger.debug("  xd:%4d  p:%4d  h:%4d" % (
-                                base.down.id, base.down.p, base.down.h))
-                            strand = dna_structure.get_strand(base.strand)
-                            crossover = DnaHelixCrossover(
-                                self, connection, base, strand)
-                            connection.crossovers.append(crossover)
-
-                    if (base.up is not None):
-                        if (base.up.h != base.h) and (base.up.h == num):
-                            self._logger.debug(
-                                "base:%4d  p:%4d  h:%4d" % (base.id, base.p, base.h))
-                            self._logger.debug("  xu:%4d  p:%4d  h:%4d" % (
-                                base.up.id, base.up.p, base.up.h))
-                            strand = dna_structure.get_strand(base.strand)
-                            crossover = DnaHelixCrossover(
-                                self, connection, base, strand)
-                            connection.crossovers.append(crossover)
-
-            self._logger.debug(">>> added %d crossovers " %
-                               len(connection.crossovers))
-
     def remove_bases(self, base_list):
         """ Remove a list of bases from the helix.
 
@@ -432,6 +387,8 @@ class DnaStructureHelix(object):
             if base.p not in removed_staple_bases:
                 remaining_staple_bases.append(base)
             else:
+                # The base is no longer at a node of the regenerated helix axis arrays.
+                base.node = None
                 base.up = None
                 base.down = None
                 if base.across:
@@ -583,24 +540,38 @@ class DnaStructureHelix(object):
                 num_unique_dist += 1
             last_d = d
 
-        # Create new coordinates and reference frame arrays.
+        # Create new coordinates and reference frame arrays and set the bases geometry to reference them.
         axis_coords = np.zeros((num_unique_dist, 3), dtype=float)
         axis_frames = np.zeros((3, 3, num_unique_dist), dtype=float)
-        num_unique_dist = 0
+        node = -1
         last_d = None
         for entry in sorted_distances:
             d = entry[0]
             base = entry[1]
             if d != last_d:
-                axis_coords[num_unique_dist] = base.coordinates
-                axis_frames[:, :, num_unique_dist] = base.ref_frame
-                num_unique_dist += 1
+                node += 1
+                axis_coords[node] = base.coordinates
+                axis_frames[:, :, node] = base.ref_frame
             last_d = d
+            base.coordinates = axis_coords[node]
+            base.ref_frame = axis_frames[:, :, node]
+            base.node = node
+
+        # Create new nucleotide coordinates arrays ordered as the base lists.
+        self.scaffold_coords = self._regenerate_nt_coords(self.scaffold_bases)
+        self.staple_coords = self._regenerate_nt_coords(self.staple_bases)
 
         self.helix_axis_coords = axis_coords
         self.helix_axis_frames = axis_frames
         self.set_end_coords()
 
+    def _regenerate_nt_coords(self, bases):
+        """ Create the nucleotide coordinates array for a list of bases and set the bases to reference it. """
+        nt_coords = np.array([base.nt_coords for base in bases], dtype=float).reshape((len(bases), 3))
+        for base, coords in zip(bases, nt_coords):
+            base.nt_coords = coords
+        return nt_coords
+
 
 class DnaHelixConnection(object):
     """ This class stores information for a pair of connected helices.
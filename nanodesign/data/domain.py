@@ -20,7 +20,7 @@ or double->single strand transitions, crossovers between helices or strand termi
 """
 __all__ = ["Domain"]
 
-from .energymodel import energy_model, convert_temperature_K_to_C
+from .energymodel import energy_model
 
 
 class Domain(object):
@@ -74,26 +74,10 @@ class Domain(object):
         return point1, point2
 
     def melting_temperature(self):
-        """ Calculate the domain melting temperature. """
-        # If we are not paired, return a nonphysical melting temperature.
-        if self.connected_domain == -1:
-            return -500.0
+        """ Calculate the domain melting temperature.
 
-        # If we have any "N" bases in our sequence, also return a nonphysical melting temperature:
-        if "N" in self.sequence or 'n' in self.sequence:
-            return -501.0
-
-        def rev_complement(seq):
-            comp = {"G": "C", "C": "G",
-                    "A": "T", "T": "A",
-                    "g": "c", "c": "g",
-                    "a": "t", "t": "a",
-                    "N": "N", "n": "n"}
-            rev = []
-            for i in range(len(seq)):
-                rev.append(comp[seq[len(seq)-i-1]])
-            return "".join(rev)
-
-        _, _, dH, dS = energy_model.stack_energy(
-            self.sequence, rev_complement(self.sequence))
-        return convert_temperature_K_to_C(energy_model.melting_temperature(dH, dS))
+            A nonphysical melting temperature is returned if the domain is not paired (-500.0) or
+            if its sequence has "N" bases (-501.0). Use EnergyModel.melting_temperatures() to calculate
+            the melting temperatures for a list of domains.
+        """
+        return float(energy_model.melting_temperatures([self])[0])
@@ -0,0 +1,113 @@
+# Copyright 2016 Autodesk Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+This module is used to divide the strands of a DNA structure into domains.
+
+Strand tours are divided into domains using the integer arrays of a BaseTable. The boundary rules are
+those of the base-by-base traversal in DnaStructure._compute_strand_domains. Walking a tour, each base
+after the first either
+
+    starts a new domain (split before): at a single->double or double->single strand transition, or at
+        a crossover to another helix from a base in a different helix than the previous base, or at the
+        termination of the paired strand where the paired base is in a different strand than the base
+        paired to the previous base.
+
+    ends the current domain (split after): at a crossover from a base in the same helix as the
+        previous base, at a crossover of the paired base, or at the termination of the paired strand
+        where the paired base is in the same strand as the base paired to the previous base.
+
+The base following a split after is added to the next domain without being checked, so in a run of
+consecutive split-after bases only every other base, starting from the first, ends a domain.
+"""
+import numpy as np
+
+from .base_table import NONE_ID
+
+
+def segment_domains(tour_ids, strand_starts, up, down, across, helix, strand):
+    """ Divide strand tours into domains.
+
+        Arguments:
+            tour_ids (NumPy N ndarray[int]): The concatenated base IDs of the strand tours.
+            strand_starts (NumPy ndarray[int]): The index into tour_ids of the first base of each strand.
+            up (NumPy ndarray[int]): The ID of each base's 5' neighbor, -1 if none.
+            down (NumPy ndarray[int]): The ID of each base's 3' neighbor, -1 if none.
+            across (NumPy ndarray[int]): The ID of each base's paired base, -1 if none.
+            helix (NumPy ndarray[int]): The helix number of each base.
+            strand (NumPy ndarray[int]): The strand ID of each base.
+
+        Returns a NumPy ndarray[int] of the index into tour_ids of the first base of each domain.
+    """
+    num_bases = len(tour_ids)
+    if num_bases == 0:
+        return np.zeros(0, dtype=np.int64)
+    is_strand_start = np.zeros(num_bases, dtype=bool)
+    is_strand_start[strand_starts] = True
+    is_crossover_base = _get_crossover_bases(up, down, helix)
+
+    # Get the base data along the tours, with the data of the previous base in the tour.
+    tour_across = across[tour_ids]
+    is_paired = tour_across != NONE_ID
+    paired_ids = np.where(is_paired, tour_across, 0)
+    prev_index = np.maximum(np.arange(num_bases) - 1, 0)
+    prev_across = tour_across[prev_index]
+
+    is_sign_change = is_paired != is_paired[prev_index]
+    is_crossover = is_crossover_base[tour_ids]
+    is_same_helix = helix[tour_ids] == helix[tour_ids[prev_index]]
+    is_paired_crossover = is_paired & is_crossover_base[paired_ids]
+    is_paired_end = is_paired & ((down[paired_ids] == NONE_ID) | (up[paired_ids] == NONE_ID))
+    is_same_paired_strand = (prev_across == NONE_ID) | \
+        (strand[paired_ids] == strand[np.where(prev_across != NONE_ID, prev_across, 0)])
+
+    # Classify each base assuming the current domain has bases; the rules are applied in order.
+    is_checked = ~is_strand_start
+    split_before = np.zeros(num_bases, dtype=bool)
+    split_after = np.zeros(num_bases, dtype=bool)
+    for rule, is_after in ((is_sign_change, None),
+                           (is_crossover, is_same_helix),
+                           (is_paired_crossover, True),
+                           (is_paired_end, is_same_paired_strand)):
+        matched = is_checked & rule
+        if is_after is None:
+            split_before |= matched
+        elif is_after is True:
+            split_after |= matched
+        else:
+            split_after |= matched & is_after
+            split_before |= matched & ~is_after
+        is_checked &= ~rule
+
+    # In a run of split-after bases only every other base ends a domain, and the base following a
+    # domain end is not checked.
+    run_start = split_after & ~np.concatenate(([False], split_after[:-1]))
+    run_start_index = np.maximum.accumulate(np.where(run_start, np.arange(num_bases), 0))
+    ends_domain = split_after & ((np.arange(num_bases) - run_start_index) % 2 == 0)
+    follows_end = np.concatenate(([False], ends_domain[:-1]))
+    starts_domain = is_strand_start | (split_before & ~follows_end) | follows_end
+    return np.flatnonzero(starts_domain)
+
+
+def _get_crossover_bases(up, down, helix):
+    """ Find the bases with a crossover to a different helix, as given by DnaStructure._check_base_crossover.
+
+        A base has a crossover if its 3' neighbor is in a different helix, or if it has a 3' neighbor in the
+        same helix and its 5' neighbor is in a different helix.
+    """
+    has_down = down != NONE_ID
+    has_up = up != NONE_ID
+    down_helix = helix[np.where(has_down, down, 0)]
+    up_helix = helix[np.where(has_up, up, 0)]
+    return has_down & ((down_helix != helix) | (has_up & (up_helix != helix)))
@@ -12,10 +12,12 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-__all__ = ["EnergyModel", "energy_model",
-           "BOLTZMANN_CONSTANT", "convert_temperature_K_to_C"]
+__all__ = ["DomainEnergies", "EnergyModel", "energy_model", "encode_sequences", "make_condition_grid",
+           "BOLTZMANN_CONSTANT", "UNPAIRED_MELTING_TEMPERATURE", "UNKNOWN_SEQUENCE_MELTING_TEMPERATURE",
+           "convert_temperature_K_to_C"]
 
 import math
+import numpy as np
 
 DEFAULT_TEMPERATURE_IN_KELVIN = 37.0 + 273.15
 # 37 degrees C, in Kelvin.
@@ -28,14 +30,50 @@ def convert_temperature_K_to_C(temperature_in_K):
     return temperature_in_K - 273.15
 
 
+UNPAIRED_MELTING_TEMPERATURE = -500.0
+# Nonphysical melting temperature, in degrees C, returned for domains that are not paired.
+
+UNKNOWN_SEQUENCE_MELTING_TEMPERATURE = -501.0
+# Nonphysical melting temperature, in degrees C, returned for domains with "N" bases in their sequence.
+
+_BASE_CODES = np.full(256, 255, dtype=np.uint8)
+# Maps the ASCII code of a base letter to the row/column index of its Watson-Crick pair in the
+#   stack tables (A -> AT = 0, C -> CG = 1, G -> GC = 2, T -> TA = 3), 4 for N, 255 otherwise.
+for _code, _letters in enumerate(("Aa", "Cc", "Gg", "Tt", "Nn")):
+    for _letter in _letters:
+        _BASE_CODES[ord(_letter)] = _code
+_UNKNOWN_BASE_CODE = 4
+
+
+def encode_sequences(sequences):
+    """ Encode a list of base sequences as a single uint8 array of stack table indices.
+
+        Arguments:
+            sequences (List[str]): The base sequences to encode.
+
+        Returns a 2-tuple of the NumPy ndarray[uint8] of the concatenated encoded sequences, and the
+        NumPy ndarray[int] of the index into it of the first base of each sequence.
+    """
+    lengths = np.fromiter((len(seq) for seq in sequences), dtype=np.int64, count=len(sequences))
+    starts = np.zeros(len(sequences), dtype=np.int64)
+    np.cumsum(lengths[:-1], out=starts[1:])
+    text = "".join(sequences).encode("ascii", "replace")
+    codes = _BASE_CODES[np.frombuffer(text, dtype=np.uint8)]
+    if np.any(codes == 255):
+        raise ValueError("Unknown base in sequence.")
+    return codes, starts
+
+
 def str_by_twos(iterable):
     """Iterate over a string by consecutive pairs. Used for stack energy
 calculations and maybe should be local there, but there may be other areas of
 use. Looked for an equivalent function in itertools and didn't find anything
 obvious."""
     iterable = iter(iterable)
-    cur_item = iterable.next()
-    next_item = iterable.next()
+    cur_item = next(iterable, None)
+    next_item = next(iterable, None)
+    if next_item is None:
+        return
     yield cur_item + next_item
     for item in iterable:
         cur_item = next_item
@@ -43,6 +81,59 @@ obvious."""
         yield cur_item + next_item
 
 
+def make_condition_grid(staple_conc, scaffold_conc, sodium_conc, magnesium_conc):
+    """ Create the conditions for all combinations of the given concentrations.
+
+        Arguments:
+            staple_conc (float or array-like): The staple concentrations in M.
+            scaffold_conc (float or array-like): The scaffold concentrations in M.
+            sodium_conc (float or array-like): The monovalent cation concentrations in M.
+            magnesium_conc (float or array-like): The Mg2+ concentrations in M.
+
+        Returns a 4-tuple of NumPy ndarray[float] of the staple, scaffold, sodium and magnesium concentrations
+        of each condition, with the magnesium concentration varying fastest.
+    """
+    grid = np.meshgrid(np.ravel(staple_conc), np.ravel(scaffold_conc), np.ravel(sodium_conc),
+                       np.ravel(magnesium_conc), indexing="ij")
+    return tuple(np.ravel(conc).astype(float) for conc in grid)
+
+
+class DomainEnergies(object):
+    """ This class stores the nearest-neighbor energies computed for a list of domains.
+
+        Attributes:
+            dH (NumPy ndarray[float]): The enthalpy of each domain duplex in kcal/mol.
+            dS (NumPy ndarray[float]): The entropy of each domain duplex in cal/(mol*K).
+            gc_fraction (NumPy ndarray[float]): The fraction of G and C bases in each domain.
+            nonphysical_temperature (NumPy ndarray[float]): The nonphysical melting temperature in degrees C
+                of the domains that have no energies, NaN for the domains that do.
+            num_pairs (NumPy ndarray[int]): The number of base pairs in each domain duplex.
+
+        Arrays are indexed by the position of the domain in the list the energies were computed for.
+    """
+
+    def __init__(self, num_domains):
+        self.dH = np.zeros(num_domains)
+        self.dS = np.zeros(num_domains)
+        self.gc_fraction = np.zeros(num_domains)
+        self.num_pairs = np.zeros(num_domains, dtype=np.int64)
+        self.nonphysical_temperature = np.full(num_domains, np.nan)
+
+    def __len__(self):
+        return len(self.dH)
+
+    @property
+    def is_defined(self):
+        """ The NumPy ndarray[bool] that is True for the domains that have energies. """
+        return np.isnan(self.nonphysical_temperature)
+
+    def free_energies(self, temperature_in_K=DEFAULT_TEMPERATURE_IN_KELVIN):
+        """ Get the free energy dG in kcal/mol of each domain duplex at the given temperature, 0 for the
+            domains without energies.
+        """
+        return self.dH - temperature_in_K * self.dS / 1000.0
+
+
 class EnergyModel(object):
     def __init__(self):
         # TODO: (JMS 4/8/16) Add docstring.
@@ -113,6 +204,11 @@ class EnergyModel(object):
         }
 
         self.temperature_in_K = DEFAULT_TEMPERATURE_IN_KELVIN
+
+        # The Watson-Crick (AT, CG, GC, TA) blocks of the stack tables, used to compute the energies
+        # of fully paired sequences indexed by the codes from encode_sequences().
+        self._wc_stack_dH = np.array(self.stack_dH)[:4, :4]
+        self._wc_stack_dS = np.array(self.stack_dS)[:4, :4]
     # end: def __init__()
 
     def pair_type(self, base_1, base_2):
@@ -181,6 +277,9 @@ class EnergyModel(object):
             self, dH, dS, staple_conc=100e-9, scaffold_conc=10e-9, sodium_conc=1.0, magnesium_conc=20e-3):
         """
         Units: dH is in kcal/mol, dS is in cal/mol (note difference). All concentrations are in M.
+
+        The sodium and magnesium concentrations are not used: the melting temperature is that at 1 M Na+,
+        the conditions of the stack energy tables. Use melting_temperature_sweep() for salt corrected values.
         """
 
         # more details on this derivation will be added to the doc string later.
@@ -192,6 +291,173 @@ class EnergyModel(object):
         denominator = dS/1000.0 + conc_derived_term  # important unit conversion for dS
         return dH / denominator
 
+    def duplex_stack_energies(self, sequences):
+        """ Compute the stack energies of a list of sequences each paired with its reverse complement.
+
+            Arguments:
+                sequences (List[str]): The base sequences, 5' to 3' order, without "N" bases.
+
+            Returns a 2-tuple of NumPy ndarray[float] containing the dH and dS of each sequence, the
+            values computed by stack_energy(sequence, reverse complement of sequence).
+        """
+        codes, starts = encode_sequences(sequences)
+        return self._duplex_stack_energies(codes, starts)
+
+    def _duplex_stack_energies(self, codes, starts):
+        """ Compute the stack energies of encoded sequences each paired with its reverse complement.
+
+            All sequences are encoded into one array and the energies of all their stacks are looked
+            up at once; the stacks spanning two sequences are zeroed and the rest summed per sequence.
+        """
+        num_sequences = len(starts)
+        dH = np.zeros(num_sequences)
+        dS = np.zeros(num_sequences)
+        if np.any(codes == _UNKNOWN_BASE_CODE):
+            raise ValueError("Sequence with unknown bases.")
+        if len(codes) < 2:
+            return dH, dS
+
+        # The stack energy at each base is that of the base and its 3' neighbor, zero at a sequence end.
+        stack_dH = np.zeros(len(codes))
+        stack_dS = np.zeros(len(codes))
+        stack_dH[:-1] = self._wc_stack_dH[codes[:-1], codes[1:]]
+        stack_dS[:-1] = self._wc_stack_dS[codes[:-1], codes[1:]]
+        ends = starts[1:] - 1
+        stack_dH[ends] = 0.0
+        stack_dS[ends] = 0.0
+
+        # Sum the stacks of each non-empty sequence.
+        is_nonempty = np.diff(np.append(starts, len(codes))) != 0
+        dH[is_nonempty] = np.add.reduceat(stack_dH, starts[is_nonempty])
+        dS[is_nonempty] = np.add.reduceat(stack_dS, starts[is_nonempty])
+        return dH, dS
+
+    def domain_energies(self, domains):
+        """ Compute the nearest-neighbor energies of a list of domains.
+
+            Arguments:
+                domains (List[Domain]): The domains to compute the energies for.
+
+            Returns a DomainEnergies object. The energies of a domain are only computed if it is paired and
+            its sequence has no "N" bases; the nonphysical melting temperature of the other domains is set.
+        """
+        energies = DomainEnergies(len(domains))
+        known = []
+        for index, domain in enumerate(domains):
+            if domain.connected_domain == -1:
+                energies.nonphysical_temperature[index] = UNPAIRED_MELTING_TEMPERATURE
+            elif "N" in domain.sequence or "n" in domain.sequence:
+                energies.nonphysical_temperature[index] = UNKNOWN_SEQUENCE_MELTING_TEMPERATURE
+            else:
+                known.append(index)
+        if not known:
+            return energies
+
+        codes, starts = encode_sequences([domains[index].sequence for index in known])
+        energies.dH[known], energies.dS[known] = self._duplex_stack_energies(codes, starts)
+        num_bases = np.diff(np.append(starts, len(codes)))
+        energies.num_pairs[known] = num_bases
+        is_nonempty = num_bases != 0
+        is_gc = (codes == _BASE_CODES[ord("C")]) | (codes == _BASE_CODES[ord("G")])
+        num_gc = np.zeros(len(known))
+        num_gc[is_nonempty] = np.add.reduceat(is_gc, starts[is_nonempty])
+        energies.gc_fraction[known] = np.divide(num_gc, num_bases, out=np.zeros(len(known)), where=is_nonempty)
+        return energies
+
+    def melting_temperatures(self, domains):
+        """ Calculate the melting temperatures of a list of domains.
+
+            Arguments:
+                domains (List[Domain]): The domains to calculate the melting temperatures for.
+
+            Returns a NumPy ndarray[float] of the melting temperature of each domain in degrees C, the
+            values returned by Domain.melting_temperature(): UNPAIRED_MELTING_TEMPERATURE for domains
+            that are not paired and UNKNOWN_SEQUENCE_MELTING_TEMPERATURE for domains with "N" bases.
+        """
+        return self.energies_melting_temperatures(self.domain_energies(domains))
+
+    def energies_melting_temperatures(self, energies):
+        """ Calculate the melting temperatures of domains from their energies.
+
+            Arguments:
+                energies (DomainEnergies): The domain energies, computed using domain_energies().
+
+            Returns a NumPy ndarray[float] of the melting temperature of each domain in degrees C, the
+            nonphysical melting temperature for the domains without energies.
+        """
+        temperatures = energies.nonphysical_temperature.copy()
+        known = energies.is_defined
+        if np.any(known):
+            temperatures[known] = convert_temperature_K_to_C(
+                self.melting_temperature(energies.dH[known], energies.dS[known]))
+        return temperatures
+
+    def melting_temperature_sweep(self, energies, staple_conc=100e-9, scaffold_conc=10e-9, sodium_conc=1.0,
+                                  magnesium_conc=20e-3):
+        """ Calculate the melting temperatures of domains over a set of buffer and strand conditions.
+
+            Arguments:
+                energies (DomainEnergies): The domain energies, computed once using domain_energies().
+                staple_conc (float or array-like): The staple concentrations in M.
+                scaffold_conc (float or array-like): The scaffold concentrations in M.
+                sodium_conc (float or array-like): The monovalent cation concentrations in M.
+                magnesium_conc (float or array-like): The Mg2+ concentrations in M.
+
+            Returns a NumPy DxC ndarray[float] of the melting temperature in degrees C of each of the D
+            domains for each of the C conditions. The concentrations are broadcast together to give one
+            value of each per condition; use make_condition_grid() to sweep all their combinations.
+            Domains without energies have their nonphysical melting temperature for all conditions.
+
+            The melting temperature at 1 M Na+ from the dH and dS is corrected for the salt concentrations
+            using the Owczarzy et al. models:
+                Richard Owczarzy et al., "Effects of sodium ions on DNA duplex oligomers: improved predictions
+                  of melting temperatures", Biochemistry 43 (2004): 3537-3554.
+                Richard Owczarzy et al., "Predicting stability of DNA duplexes in solutions containing
+                  magnesium and monovalent cations", Biochemistry 47 (2008): 5336-5353.
+            The Na+ correction is used when sqrt([Mg2+])/[Na+] < 0.22, otherwise the Mg2+ correction.
+            There is no correction at 1 M Na+ without Mg2+.
+        """
+        conditions = np.broadcast_arrays(staple_conc, scaffold_conc, sodium_conc, magnesium_conc)
+        staple_conc, scaffold_conc, sodium_conc, magnesium_conc = [np.ravel(conc).astype(float) for conc in conditions]
+        eff_staple_conc_at_tm = staple_conc - .5 * scaffold_conc
+        if np.any(eff_staple_conc_at_tm <= 0.0):
+            raise ValueError("The staple concentration must be greater than half the scaffold concentration.")
+        if np.any(sodium_conc < 0.0) or np.any(magnesium_conc < 0.0) or \
+           np.any((sodium_conc == 0.0) & (magnesium_conc == 0.0)):
+            raise ValueError("The salt concentrations must be non-negative and not both zero.")
+
+        temperatures = np.repeat(energies.nonphysical_temperature[:, np.newaxis], len(staple_conc), axis=1)
+        known = energies.is_defined
+        if not np.any(known):
+            return temperatures
+        dH = energies.dH[known, np.newaxis]
+        dS = energies.dS[known, np.newaxis]
+        gc_fraction = energies.gc_fraction[known, np.newaxis]
+        num_pairs = energies.num_pairs[known, np.newaxis]
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            # Melting temperature at 1 M Na+, the conditions of the stack energy tables.
+            inv_temperature = (dS/1000.0 + BOLTZMANN_CONSTANT * np.log(eff_staple_conc_at_tm)) / dH
+            ln_sodium = np.log(np.where(sodium_conc > 0.0, sodium_conc, 1.0))
+            ln_magnesium = np.log(np.where(magnesium_conc > 0.0, magnesium_conc, 1.0))
+            ratio = np.sqrt(magnesium_conc) / sodium_conc
+
+            sodium_correction = (4.29e-5 * gc_fraction - 3.95e-5) * ln_sodium + 9.40e-6 * ln_sodium**2
+
+            # The Mg2+ coefficients a, d and g depend on [Na+] when Na+ and Mg2+ compete.
+            is_mixed = (ratio >= 0.22) & (ratio < 6.0)
+            sqrt_sodium = np.sqrt(sodium_conc)
+            a = np.where(is_mixed, 3.92e-5 * (0.843 - 0.352 * sqrt_sodium * ln_sodium), 3.92e-5)
+            d = np.where(is_mixed, 1.42e-5 * (1.279 - 4.03e-3 * ln_sodium - 8.03e-3 * ln_sodium**2), 1.42e-5)
+            g = np.where(is_mixed, 8.31e-5 * (0.486 - 0.258 * ln_sodium + 5.25e-3 * ln_sodium**3), 8.31e-5)
+            length_term = np.where(num_pairs > 1, 1.0 / (2.0 * (num_pairs - 1)), 0.0)
+            magnesium_correction = a - 9.11e-6 * ln_magnesium + gc_fraction * (6.26e-5 + d * ln_magnesium) + \
+                length_term * (-4.82e-4 + 5.25e-4 * ln_magnesium + g * ln_magnesium**2)
+
+            inv_temperature = inv_temperature + np.where(ratio < 0.22, sodium_correction, magnesium_correction)
+            temperatures[known] = convert_temperature_K_to_C(1.0 / inv_temperature)
+        return temperatures
+
 
 energy_model = EnergyModel()
 
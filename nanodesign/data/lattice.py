@@ -269,3 +269,39 @@ class HoneycombLattice(Lattice):
         else:
             nindex = None
         return nindex
+
+
+class LatticeIndex(dict):
+    """ This class maps lattice (row,col) coordinates to the objects (e.g. helices) placed at them.
+
+        The neighbors of a lattice coordinate are found by looking up the neighboring coordinates given by a
+        lattice get_neighbors() method, so finding the neighbors of an object takes constant time rather than
+        a search over all objects.
+    """
+
+    def get_neighbors(self, lattice, row, col):
+        """ Get the objects at the neighboring lattice coordinates of a given lattice coordinate.
+
+            Arguments:
+                lattice (Lattice): The lattice defining the neighboring coordinates.
+                row (int): The row lattice coordinate.
+                col (int): The column lattice coordinate.
+
+            Returns:
+                neighbors (list): The list of objects at the neighboring lattice coordinates, in the order
+                    given by lattice.get_neighbors(), with None for coordinates that have no object.
+        """
+        return [self.get(coord) for coord in lattice.get_neighbors(row, col)]
+
+    def get_neighbor_items(self, lattice, row, col):
+        """ Get the objects at the neighboring lattice coordinates of a given lattice coordinate.
+
+            Arguments:
+                lattice (Lattice): The lattice defining the neighboring coordinates.
+                row (int): The row lattice coordinate.
+                col (int): The column lattice coordinate.
+
+            Returns:
+                neighbors (list): The list of objects at the neighboring lattice coordinates.
+        """
+        return [item for item in self.get_neighbors(lattice, row, col) if item is not None]
@@ -0,0 +1,78 @@
+# Copyright 2016 Autodesk Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+This module is used to store the Watson-Crick base pairs of a DNA structure in columnar form.
+
+A PairTable stores one row per base pair, ordered by the ID of the pair scaffold base as in the id_nt
+table written to CanDo files. Each row gives the IDs of the paired bases together with the strand data
+and helix axis node the writers need for the pair, so the pairing is derived once from the base table
+and strands and then shared by all writers.
+"""
+import numpy as np
+
+from .base_table import NONE_ID
+
+
+class PairTable(object):
+    """ This class stores the data for all the base pairs of a DNA structure as NumPy arrays.
+
+        Attributes:
+            base_ids (NumPy Nx2 ndarray[int32]): The IDs of the scaffold base and its paired staple base.
+            helix (NumPy N ndarray[int32]): The ID of the helix the pair is in.
+            index (NumPy N ndarray[int32]): The pair index.
+            node (NumPy N ndarray[int32]): The index of the pair helix axis node into the helix axis coordinates.
+            strand_ids (NumPy Nx2 ndarray[int32]): The strand IDs of the paired bases.
+            strand_indices (NumPy Nx2 ndarray[int32]): The indices of the paired bases into their strand tours.
+
+        Rows are indexed by pair index. A value of NONE_ID (-1) means the value is not defined (e.g. the base
+        coordinates do not reference a helix axis node).
+    """
+
+    def __init__(self, num_pairs):
+        """ Initialize a PairTable object with all entries unset.
+
+            Arguments:
+                num_pairs (int): The number of base pairs in the table.
+        """
+        self.index = np.arange(num_pairs, dtype=np.int32)
+        self.base_ids = np.full((num_pairs, 2), NONE_ID, dtype=np.int32)
+        self.strand_ids = np.full((num_pairs, 2), NONE_ID, dtype=np.int32)
+        self.strand_indices = np.full((num_pairs, 2), NONE_ID, dtype=np.int32)
+        self.helix = np.full(num_pairs, NONE_ID, dtype=np.int32)
+        self.node = np.full(num_pairs, NONE_ID, dtype=np.int32)
+
+    def __len__(self):
+        return len(self.index)
+
+    @classmethod
+    def from_structure(cls, dna_structure):
+        """ Create a PairTable from a DNA structure.
+
+            Arguments:
+                dna_structure (DnaStructure): The structure to create the table for.
+
+            Returns the PairTable created from the structure base table, strands and helices.
+        """
+        base_table = dna_structure.base_table
+        id_nt = dna_structure.create_id_nt()
+        table = cls(len(id_nt))
+        if len(table) == 0:
+            return table
+        table.base_ids[:] = id_nt
+        table.strand_ids[:] = base_table.strand[id_nt]
+        table.strand_indices[:] = dna_structure.strand_local_index(id_nt)
+        table.helix[:] = base_table.helix[id_nt[:, 0]]
+        table.node[:] = base_table.node[id_nt[:, 0]]
+        return table
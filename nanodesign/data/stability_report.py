@@ -0,0 +1,165 @@
+# Copyright 2016 Autodesk Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+This module is used to report the thermodynamic stability of the domains and strands of a DNA structure.
+
+The nearest-neighbor energies and melting temperatures of all domains are computed in one batch using
+the energy model. The domain values are then aggregated per strand by grouping the domain rows on the
+index of their strand, giving the minimum domain melting temperature, the longest stable domain and the
+total free energy of each strand. Domains that are not paired or have "N" bases in their sequence have
+no energies and are not included in the strand values.
+"""
+import numpy as np
+
+from .base_table import NONE_ID
+from .energymodel import energy_model, convert_temperature_K_to_C
+
+
+class StabilityReport(object):
+    """ This class stores the thermodynamic stability of the domains and strands of a DNA structure.
+
+        Attributes:
+            domains (NumPy structured ndarray): The domain table, one row per domain with fields
+                id (int): The domain ID.
+                strand (int): The ID of the strand the domain is part of.
+                helix (int): The ID of the helix the domain is contained in.
+                num_bases (int): The number of bases in the domain.
+                dH (float): The domain duplex enthalpy in kcal/mol.
+                dS (float): The domain duplex entropy in cal/(mol*K).
+                dG (float): The domain duplex free energy at the report temperature in kcal/mol.
+                melting_temperature (float): The domain melting temperature in degrees C, a nonphysical value
+                    (e.g. -500.0) if the domain has no energies.
+                is_stable (bool): If True then the domain has energies and melts above the report temperature.
+            strands (NumPy structured ndarray): The strand table, one row per strand with fields
+                id (int): The strand ID.
+                is_scaffold (bool): If True then the strand is a scaffold strand.
+                num_bases (int): The number of bases in the strand.
+                num_domains (int): The number of domains in the strand.
+                num_stable_domains (int): The number of stable domains in the strand.
+                min_melting_temperature (float): The minimum melting temperature of the strand domains with
+                    energies in degrees C, NaN if there are none.
+                longest_stable_domain (int): The number of bases of the longest stable domain, 0 if there are none.
+                dG (float): The total free energy of the strand domains at the report temperature in kcal/mol.
+            temperature (float): The report temperature in degrees C, used for free energies and domain stability.
+    """
+
+    DOMAIN_FIELDS = [('id', np.int32), ('strand', np.int32), ('helix', np.int32), ('num_bases', np.int32),
+                     ('dH', np.float64), ('dS', np.float64), ('dG', np.float64),
+                     ('melting_temperature', np.float64), ('is_stable', np.bool_)]
+
+    STRAND_FIELDS = [('id', np.int32), ('is_scaffold', np.bool_), ('num_bases', np.int32),
+                     ('num_domains', np.int32), ('num_stable_domains', np.int32),
+                     ('min_melting_temperature', np.float64), ('longest_stable_domain', np.int32),
+                     ('dG', np.float64)]
+
+    def __init__(self, num_domains, num_strands, temperature):
+        """ Initialize a StabilityReport object with zeroed tables.
+
+            Arguments:
+                num_domains (int): The number of domains in the report.
+                num_strands (int): The number of strands in the report.
+                temperature (float): The report temperature in degrees C.
+        """
+        self.domains = np.zeros(num_domains, dtype=self.DOMAIN_FIELDS)
+        self.strands = np.zeros(num_strands, dtype=self.STRAND_FIELDS)
+        self.temperature = temperature
+
+    @classmethod
+    def from_structure(cls, dna_structure, temperature_in_K=None):
+        """ Create a StabilityReport for a DNA structure.
+
+            Arguments:
+                dna_structure (DnaStructure): The structure to create the report for.
+                temperature_in_K (float): The report temperature in Kelvin. If None then the energy model
+                    temperature is used.
+
+            Returns the StabilityReport created from the structure domains and strands.
+        """
+        if temperature_in_K is None:
+            temperature_in_K = energy_model.temperature_in_K
+        domains = dna_structure.domains
+        strands = dna_structure.strands
+        report = cls(len(domains), len(strands), convert_temperature_K_to_C(temperature_in_K))
+
+        # Compute the domain energies and melting temperatures in one batch.
+        energies = energy_model.domain_energies(domains)
+        melting_temperatures = energy_model.energies_melting_temperatures(energies)
+        table = report.domains
+        table['id'] = [domain.id for domain in domains]
+        table['strand'] = [NONE_ID if domain.strand is None else domain.strand.id for domain in domains]
+        table['helix'] = [domain.helix.id for domain in domains]
+        table['num_bases'] = [len(domain.base_list) for domain in domains]
+        table['dH'] = energies.dH
+        table['dS'] = energies.dS
+        table['dG'] = energies.free_energies(temperature_in_K)
+        table['melting_temperature'] = melting_temperatures
+        is_defined = energies.is_defined
+        table['is_stable'] = is_defined & (melting_temperatures > report.temperature)
+
+        # Aggregate the domain values per strand, grouping the domain rows on the row of their strand.
+        strand_table = report.strands
+        strand_table['id'] = [strand.id for strand in strands]
+        strand_table['is_scaffold'] = [strand.is_scaffold for strand in strands]
+        strand_table['num_bases'] = [len(strand.tour) for strand in strands]
+        if len(strands) == 0 or len(domains) == 0:
+            strand_table['min_melting_temperature'] = np.nan
+            return report
+        strand_rows = np.full(max(strand_table['id'].max(), table['strand'].max()) + 1, NONE_ID, dtype=np.int64)
+        strand_rows[strand_table['id']] = np.arange(len(strands))
+        rows = np.where(table['strand'] != NONE_ID, strand_rows[table['strand']], NONE_ID)
+        in_strand = rows != NONE_ID
+        rows = rows[in_strand]
+        is_defined = is_defined[in_strand]
+        is_stable = table['is_stable'][in_strand]
+
+        num_strands = len(strands)
+        strand_table['num_domains'] = np.bincount(rows, minlength=num_strands)
+        strand_table['num_stable_domains'] = np.bincount(rows, weights=is_stable, minlength=num_strands)
+        strand_table['dG'] = np.bincount(rows, weights=np.where(is_defined, table['dG'][in_strand], 0.0),
+                                         minlength=num_strands)
+        min_temperatures = np.full(num_strands, np.inf)
+        np.minimum.at(min_temperatures, rows[is_defined], table['melting_temperature'][in_strand][is_defined])
+        min_temperatures[np.isinf(min_temperatures)] = np.nan
+        strand_table['min_melting_temperature'] = min_temperatures
+        longest = np.zeros(num_strands, dtype=np.int32)
+        np.maximum.at(longest, rows[is_stable], table['num_bases'][in_strand][is_stable])
+        strand_table['longest_stable_domain'] = longest
+        return report
+
+    def write_csv(self, file_name, table='strands'):
+        """ Write a report table to a CSV file.
+
+            Arguments:
+                file_name (str): The name of the CSV file to write.
+                table (str): The table to write, 'strands' or 'domains'.
+        """
+        data = self._get_table(table)
+        formats = ['%d' if data.dtype[name].kind in 'iub' else '%.6g' for name in data.dtype.names]
+        with open(file_name, 'w') as outfile:
+            outfile.write(','.join(data.dtype.names) + '\n')
+            if len(data) != 0:
+                np.savetxt(outfile, data, fmt=formats, delimiter=',')
+
+    def save(self, file_name):
+        """ Save the report tables to a NumPy .npz file with arrays 'domains', 'strands' and 'temperature'. """
+        np.savez(file_name, domains=self.domains, strands=self.strands, temperature=self.temperature)
+
+    def _get_table(self, table):
+        """ Get a report table from its name. """
+        if table == 'strands':
+            return self.strands
+        elif table == 'domains':
+            return self.domains
+        raise ValueError("Unknown stability report table '%s'." % table)
@@ -26,8 +26,6 @@ class DnaStrand(object):
     """ The DnaStrand class stores data for a DNA strand.
 
     Attributes:
-        base_id_list (Dict): The location of each strand base within list of base IDs making up the strand.
-            The dictionary maps base IDs to an index into tour[].
         color (List[float]: The strand color in RGB.
         dna_structure (DnaStructure): The DNA structure this strand belongs to.
         domain_list (List[Domain]): The list of domains for this strand.
@@ -59,7 +57,6 @@ class DnaStrand(object):
         self.color = self.create_random_color()
         self.icolor = None
         self.helix_list = dict()
-        self.base_id_list = dict()
         self.dna_structure = dna_structure
         self.domain_list = []
         self.insert_seq = []
@@ -114,13 +111,15 @@ class DnaStrand(object):
 
             Arguments:
                 base (DnaBase): The base to get the index for.
+
+            The index is computed from the base residue, the residue of the first base of the strand
+            being its starting point (see DnaStructure.strand_local_index()).
         """
-        # num_bases = len(self.tour)
-        if (not self.base_id_list):
-            for i, sbase in enumerate(self.tour):
-                self.base_id_list[sbase.id] = i
-        if base.id not in self.base_id_list:
+        index = None
+        if self.tour and base.residue is not None and self.tour[0].residue is not None:
+            index = (base.residue - self.tour[0].residue) % len(self.tour)
+        if index is None or self.tour[index] is not base:
             sys.stderr.write(
                 "[strand::get_base_index] **** WARNING: base %d not found in strand %d.\n" % (base.id, self.id))
             return None
-        return self.base_id_list[base.id]
+        return index
@@ -0,0 +1,194 @@
+# Copyright 2016 Autodesk Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+This module is used to trace the strands of a DNA structure from its base connectivity.
+
+Strands are traced from the integer up (5') and down (3') base ID arrays of a BaseTable. Strands are
+returned in the order of their smallest base ID, which is the order they are found by walking the
+base connectivity from the first unvisited base. A linear strand starts at its 5' end; a circular
+strand starts at its smallest base ID.
+
+Two tracers are provided:
+
+    trace_strands_vectorized: ranks every base within its strand using pointer jumping over the
+        whole up/down arrays. It requires the up and down arrays to be consistent with each other.
+        Pointer jumping makes O(log N) passes over the arrays, so it does O(N log N) work.
+
+    trace_strands_sequential: walks the strands one base at a time, using a cursor that only moves
+        forward to find the next unvisited base. It is used when the arrays are inconsistent.
+"""
+import numpy as np
+
+from .base_table import NONE_ID
+
+
+def trace_strands(up, down):
+    """ Trace the strands defined by base connectivity arrays.
+
+        Arguments:
+            up (NumPy N ndarray[int]): The ID of each base's 5' neighbor, -1 if none.
+            down (NumPy N ndarray[int]): The ID of each base's 3' neighbor, -1 if none.
+
+        Returns a list of (tour, is_circular) tuples, where tour (NumPy ndarray[int]) is the list of base IDs
+        of a strand in 5' to 3' order, or None if the connectivity does not define a valid set of strands.
+    """
+    if _is_consistent(up, down):
+        return trace_strands_vectorized(up, down)
+    return trace_strands_sequential(up, down)
+
+
+def trace_strands_sequential(up, down):
+    """ Trace strands by walking the base connectivity one base at a time.
+
+        Arguments:
+            up (NumPy N ndarray[int]): The ID of each base's 5' neighbor, -1 if none.
+            down (NumPy N ndarray[int]): The ID of each base's 3' neighbor, -1 if none.
+
+        Returns a list of (tour, is_circular) tuples, or None if a base is visited twice.
+
+        Visited bases are never unvisited, so the next unvisited base is found by advancing a cursor
+        rather than searching from the start of the base list. Each base is visited a bounded number
+        of times, giving O(N) tracing overall.
+    """
+    up = [int(i) for i in up]
+    down = [int(i) for i in down]
+    num_bases = len(up)
+    is_visited = bytearray(num_bases)
+    strands = []
+    cursor = 0
+
+    while True:
+        while cursor < num_bases and is_visited[cursor]:
+            cursor += 1
+        if cursor == num_bases:
+            break
+
+        # Find the first base in the current strand.
+        init_base = cursor
+        curr_base = init_base
+        num_steps = 0
+        while up[curr_base] != NONE_ID and up[curr_base] != init_base:
+            curr_base = up[curr_base]
+            num_steps += 1
+            if is_visited[curr_base] or num_steps > num_bases:
+                return None
+
+        is_circular = up[curr_base] != NONE_ID
+        if is_circular:
+            curr_base = init_base
+
+        # Walk through the current strand.
+        tour = [curr_base]
+        is_visited[curr_base] = True
+        while True:
+            curr_base = down[curr_base]
+            if curr_base == NONE_ID or (is_circular and curr_base == init_base):
+                break
+            if is_visited[curr_base]:
+                return None
+            tour.append(curr_base)
+            is_visited[curr_base] = True
+
+        strands.append((np.array(tour, dtype=np.int64), is_circular))
+
+    return strands
+
+
+def trace_strands_vectorized(up, down):
+    """ Trace strands using whole-array operations.
+
+        Arguments:
+            up (NumPy N ndarray[int]): The ID of each base's 5' neighbor, -1 if none.
+            down (NumPy N ndarray[int]): The ID of each base's 3' neighbor, -1 if none.
+
+        Returns a list of (tour, is_circular) tuples.
+
+        The up and down arrays must be consistent (down[up[i]] == i and up[down[i]] == i), so that every
+        strand is either a simple chain or a simple cycle. The position of each base within its strand
+        is found by pointer jumping toward the strand's 5' end. Circular strands are cut at their
+        smallest base ID and ranked the same way.
+
+        Each pointer jumping pass is a whole-array operation and up to log2(N) + 1 passes are made, so
+        the work done is O(N log N), not O(N) as for trace_strands_sequential. The passes are NumPy
+        operations, which makes this faster than the sequential walk for the structure sizes used here.
+    """
+    up = np.asarray(up, dtype=np.int64)
+    down = np.asarray(down, dtype=np.int64)
+    num_bases = len(up)
+    if num_bases == 0:
+        return []
+    ids = np.arange(num_bases)
+
+    head, rank = _rank_bases(up)
+    circular = up[head] != NONE_ID
+
+    # Cut each circular strand at its smallest base ID and rank again.
+    if np.any(circular):
+        next_base = np.where(down != NONE_ID, down, ids)
+        min_id = ids.copy()
+        for _ in range(_num_jumps(num_bases)):
+            min_id = np.minimum(min_id, min_id[next_base])
+            next_base = next_base[next_base]
+        cut_up = up.copy()
+        cut_up[circular & (min_id == ids)] = NONE_ID
+        head, rank = _rank_bases(cut_up)
+
+    # Order strands by their smallest base ID and bases by their rank in the strand.
+    strand_min_id = np.full(num_bases, num_bases, dtype=np.int64)
+    np.minimum.at(strand_min_id, head, ids)
+    strand_key = strand_min_id[head]
+    order = np.lexsort((rank, strand_key))
+    starts = np.flatnonzero(np.diff(strand_key[order])) + 1
+    tours = np.split(order, starts)
+    is_circular = circular[order[np.concatenate(([0], starts))]].tolist()
+    return list(zip(tours, is_circular))
+
+
+def _is_consistent(up, down):
+    """ Check that the up and down arrays point back at each other. """
+    up = np.asarray(up)
+    down = np.asarray(down)
+    ids = np.arange(len(up))
+    has_up = up != NONE_ID
+    has_down = down != NONE_ID
+    return (np.array_equal(down[up[has_up]], ids[has_up]) and
+            np.array_equal(up[down[has_down]], ids[has_down]))
+
+
+def _num_jumps(num_bases):
+    """ Get the number of pointer jumps needed to cover a strand of num_bases bases. """
+    return max(1, int(num_bases).bit_length())
+
+
+def _rank_bases(up):
+    """ Find the 5' end of each base's strand and the base's distance from it.
+
+        Arguments:
+            up (NumPy N ndarray[int]): The ID of each base's 5' neighbor, -1 if none.
+
+        Returns the tuple (head, rank) of NumPy N ndarrays. For a base on a circular strand head[i] is an
+        arbitrary base of the strand with an up neighbor.
+    """
+    ids = np.arange(len(up))
+    has_up = up != NONE_ID
+    head = np.where(has_up, up, ids)
+    rank = has_up.astype(np.int64)
+    for _ in range(_num_jumps(len(up))):
+        next_head = head[head]
+        if np.array_equal(next_head, head):
+            break
+        rank = rank + rank[head]
+        head = next_head
+    return head, rank
@@ -311,8 +311,6 @@ class VisHelix(object):
                 self._logger.debug(
                     "%s Crossover to helix %d at %d " % (stype, to_helix.id, pos))
                 connection = helix_conn_map[to_helix.id]
-                # nindex = lattice.get_neighbor_index(helix.lattice_row, helix.lattice_col,
-                #                                    to_helix.lattice_row, to_helix.lattice_col)
                 direct = connection.direction
                 pt1 = coords
                 pt2 = pt1 + s*direct
@@ -152,7 +152,6 @@ class VisModel(object):
         self.atomic_structure_names.append(VisMenuItem.ALL)
         self.atomic_structure_names.append(VisMenuItem.NONE)
         molecules = self.atomic_structure.generate_structure_ss()
-        # molecules = self.atomic_structure.generate_structure()
         self._logger.info("Number of molecules %d" % (len(molecules)))
         id = 1
         atomic_struct_list = []
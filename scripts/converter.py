@@ -16,14 +16,23 @@
 
 import logging
 import argparse
-from nanodesign.converters.converter import Converter, ConverterFileFormats
+import glob
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from nanodesign.converters.converter import VIEWER_HELIX_DISTANCE, Converter, ConverterFileFormats
 
 
 # Define the map between file formats and the functions that read files in that format.
-converter_read_map = {ConverterFileFormats.CADNANO: "read_cadnano_file"}
+converter_read_map = {
+    ConverterFileFormats.BINARY: "read_structure_file",
+    ConverterFileFormats.CADNANO: "read_cadnano_file",
+}
 
 # Define the map between file formats and the functions that write files in that format.
 converter_write_map = {
+    ConverterFileFormats.BINARY: "write_binary_file",
     ConverterFileFormats.VIEWER: "write_viewer_file",
     ConverterFileFormats.CADNANO: "write_cadnano_file",
     ConverterFileFormats.CANDO: "write_cando_file",
@@ -38,10 +47,29 @@ converter_write_map = {
 def parse_args():
     """Parse command-line arguments."""
     parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "-aw",
+        "--atomicworkers",
+        type=int,
+        help="number of worker processes used to generate the atoms written to pdb and cif files",
+    )
+    parser.add_argument(
+        "-b",
+        "--batch",
+        action="append",
+        help="batch convert the input files matching a glob pattern; can be given more than once",
+    )
+    parser.add_argument(
+        "-c",
+        "--cache",
+        help="read and add DNA structures created from cadnano design files to the conversion cache: true or false "
+        "(default false)",
+    )
+    parser.add_argument("-cd", "--cachedir", help="conversion cache directory")
     parser.add_argument("-dbg", "--debug", help="set modules debugging logger")
     parser.add_argument("-hd", "--helixdist",
                         help="distance between DNA helices")
-    parser.add_argument("-if", "--informat", help="input file format: cadnano")
+    parser.add_argument("-if", "--informat", help="input file format: binary, cadnano")
     parser.add_argument("-i", "--infile", help="input file")
     parser.add_argument("-is", "--inseqfile", help="input sequence file")
     parser.add_argument("-isn", "--inseqname", help="input sequence name")
@@ -50,19 +78,188 @@ def parse_args():
         "--modify",
         help="create DNA structure using the deleted/inserted bases given in a cadnano design file",
     )
+    parser.add_argument(
+        "-mf",
+        "--manifest",
+        help="batch convert the input files listed in a manifest file, one file name per line",
+    )
     parser.add_argument("-o", "--outfile", help="output file")
+    parser.add_argument(
+        "-od",
+        "--outdir",
+        help="batch conversion output directory",
+    )
     parser.add_argument(
         "-of",
         "--outformat",
-        help="output file format: cadnano, viewer, cando, cif, pdb, simdna, structure, topology",
+        help="output file format: binary, cadnano, viewer, cando, cif, pdb, simdna, structure, topology; "
+        + "a comma-separated list of formats for batch conversion",
     )
     parser.add_argument("-s", "--staples", help="staple operations")
+    parser.add_argument(
+        "-st",
+        "--streaming",
+        help="write pdb and cif files one chunk of strands at a time to limit memory use: true or false",
+    )
+    parser.add_argument(
+        "-w", "--workers", type=int, help="number of batch conversion worker processes"
+    )
     parser.add_argument(
         "-x", "--transform", help="apply a transformation to a set of helices"
     )
     return parser.parse_args(), parser.print_help
 
 
+def set_converter_options(converter, args, logger):
+    """Set the converter options given by command-line arguments."""
+    if args.modify:
+        logger.info(
+            "Create a DNA structure using deleted/inserted bases from the caDNAno design file."
+        )
+        converter.modify = args.modify.lower() == "true"
+
+    if args.streaming:
+        converter.streaming = args.streaming.lower() == "true"
+
+    if args.atomicworkers:
+        converter.atomic_workers = args.atomicworkers
+
+    if args.cache:
+        converter.use_cache = args.cache.lower() == "true"
+
+    if args.cachedir:
+        converter.cache.directory = args.cachedir
+
+    if args.helixdist:
+        converter.dna_parameters.helix_distance = float(args.helixdist)
+        logger.info(
+            "Set the distance between adjacent helices to %g"
+            % converter.dna_parameters.helix_distance
+        )
+
+
+def get_batch_files(args):
+    """Get the list of input files to batch convert from the glob patterns and manifest file arguments."""
+    file_names = []
+    for pattern in args.batch or []:
+        file_names.extend(sorted(glob.glob(pattern)))
+    if args.manifest:
+        manifest_dir = os.path.dirname(args.manifest)
+        with open(args.manifest) as manifest:
+            for line in manifest:
+                line = line.strip()
+                if line and not line.startswith("#"):
+                    file_names.append(os.path.join(manifest_dir, line))
+    # Remove duplicate file names, keeping the first.
+    return list(dict.fromkeys(file_names))
+
+
+def convert_batch_file(args, file_name, outformats):
+    """Convert an input file to a list of output file formats.
+
+    Arguments:
+        args (argparse.Namespace): The command-line arguments.
+        file_name (String): The name of the input file.
+        outformats (List[String]): The output file formats.
+
+    Returns a list of (step, output file name, seconds, error message) tuples, where step is "read" or an
+    output file format and error message is None if the step succeeded.
+
+    The input file is read once and the structure is written to each output format using
+    Converter.write_many().
+    """
+    logger = logging.getLogger("nanodesign.converter")
+    name = os.path.splitext(os.path.basename(file_name))[0]
+    outdir = args.outdir if args.outdir else "."
+    results = []
+
+    converter = Converter()
+    converter.infile = file_name
+    converter.informat = args.informat
+    set_converter_options(converter, args, logger)
+
+    start_time = time.time()
+    try:
+        read_function = getattr(converter, converter_read_map[args.informat])
+        read_function(file_name, args.inseqfile, args.inseqname)
+        if args.staples:
+            converter.perform_staple_operations(args.staples)
+        if args.transform:
+            converter.transform_structure(args.transform)
+    except (Exception, SystemExit) as error:
+        results.append(("read", None, time.time() - start_time, "%s: %s" % (type(error).__name__, error)))
+        return results
+    results.append(("read", None, time.time() - start_time, None))
+
+    # Write the structure to all formats, computing the data shared by the writers once.
+    prefix = os.path.join(outdir, name)
+    start_time = time.time()
+    try:
+        results.extend(converter.write_many(outformats, prefix, stop_on_error=False))
+    except (Exception, SystemExit) as error:
+        error_message = "%s: %s" % (type(error).__name__, error)
+        results.extend((outformat, prefix + ConverterFileFormats.file_suffixes[outformat],
+                        time.time() - start_time, error_message) for outformat in outformats)
+
+    return results
+
+
+def run_batch(args, print_help):
+    """Convert a batch of input files using a pool of worker processes.
+
+    Returns the number of input files that failed to convert.
+    """
+    logger = logging.getLogger("nanodesign.converter")
+    file_names = get_batch_files(args)
+    outformats = [outformat.strip() for outformat in (args.outformat or "").split(",") if outformat.strip()]
+    error_flag = False
+
+    if not file_names:
+        logger.error("No batch input files found.")
+        error_flag = True
+    if args.informat not in converter_read_map:
+        logger.error("Unknown input file format given: %s" % args.informat)
+        error_flag = True
+    if not outformats:
+        logger.error("No output file format given.")
+        error_flag = True
+    for outformat in outformats:
+        if outformat not in converter_write_map:
+            logger.error("Unknown output file format given '%s'" % outformat)
+            error_flag = True
+    if error_flag:
+        print_help()
+        return 1
+
+    if args.outdir and not os.path.isdir(args.outdir):
+        os.makedirs(args.outdir)
+    num_workers = args.workers if args.workers else os.cpu_count()
+    logger.info("Batch convert %d files to %s using %d workers" % (len(file_names), ",".join(outformats),
+                                                                    num_workers))
+
+    num_failed = 0
+    start_time = time.time()
+    with ProcessPoolExecutor(max_workers=num_workers) as executor:
+        futures = {executor.submit(convert_batch_file, args, file_name, outformats): file_name
+                   for file_name in file_names}
+        for future in as_completed(futures):
+            file_name = futures[future]
+            try:
+                results = future.result()
+            except Exception as error:
+                results = [("convert", None, 0.0, "%s: %s" % (type(error).__name__, error))]
+            failed = False
+            for step, outfile, seconds, error_message in results:
+                status = "ok" if error_message is None else "FAILED " + error_message
+                print("%-40s %-9s %9.3f s  %s" % (file_name, step, seconds, status))
+                failed = failed or error_message is not None
+            num_failed += failed
+
+    print("Converted %d of %d files in %.3f s" % (len(file_names) - num_failed, len(file_names),
+                                                time.time() - start_time))
+    return num_failed
+
+
 def main():
     logger = logging.getLogger("nanodesign.converter")
     converter = Converter()
@@ -74,6 +271,11 @@ def main():
     if args.debug:
         converter.set_module_loggers(args.debug)
 
+    if args.batch or args.manifest:
+        if run_batch(args, print_help):
+            sys.exit(1)
+        return
+
     if args.infile is None:
         logger.error("No input file name given.")
         error_flag = True
@@ -91,18 +293,7 @@ def main():
         logger.info("Input file format %s" % args.informat)
         converter.informat = args.informat
 
-    if args.modify:
-        logger.info(
-            "Create a DNA structure using deleted/inserted bases from the caDNAno design file."
-        )
-        converter.modify = args.modify.lower() == "true"
-
-    if args.helixdist:
-        converter.dna_parameters.helix_distance = float(args.helixdist)
-        logger.info(
-            "Set the distance between adjacent helices to %g"
-            % converter.dna_parameters.helix_distance
-        )
+    set_converter_options(converter, args, logger)
 
     if args.outfile is None:
         logger.error("No output file name given.")
@@ -120,7 +311,7 @@ def main():
         logger.info("Output file format %s" % args.outformat)
         # Make the helix distance a bit larger to better visualization.
         if args.outformat == ConverterFileFormats.VIEWER:
-            converter.dna_parameters.helix_distance = 2.50
+            converter.dna_parameters.helix_distance = VIEWER_HELIX_DISTANCE
 
     if error_flag:
         print_help()
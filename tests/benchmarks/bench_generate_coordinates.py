@@ -0,0 +1,149 @@
+#!/usr/bin/env python
+# Copyright 2016 Autodesk Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Benchmark helix geometry generation on the tests/samples designs.
+
+This compares the per-base loop formerly used by generate_coordinates() with the batched whole-array
+implementations, generating the geometry one helix at a time and for all helices at once. The geometry
+produced by each implementation is checked against the loop.
+
+Usage:
+    python bench_generate_coordinates.py [-n REPEATS] [design.json ...]
+"""
+import argparse
+import glob
+import logging
+import os
+import sys
+import timeit
+from math import cos, sin
+
+import numpy as np
+
+tests_path = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(tests_path))
+
+from nanodesign.converters.converter import Converter
+from nanodesign.converters.cadnano.utils import (deg2rad, generate_coordinates, generate_helices_coordinates,
+                                                 get_start_coordinates_angle)
+
+
+def loop_generate_coordinates(dna_parameters, lattice_type, row, col, helix_num, scaffold_bases, staple_bases):
+    """ The per-base loop implementation of generate_coordinates(). """
+    r_helix = dna_parameters.helix_radius
+    dist_bp = dna_parameters.base_pair_rise
+    ang_bp = dna_parameters.base_pair_twist_angle
+    ang_minor = dna_parameters.minor_groove_angle
+    scaf_local = r_helix * np.array([cos(deg2rad(180 - ang_minor / 2)), sin(deg2rad(180 - ang_minor / 2)), 0.0])
+    stap_local = r_helix * np.array([cos(deg2rad(180 + ang_minor / 2)), sin(deg2rad(180 + ang_minor / 2)), 0.0])
+    init_coord, init_ang = get_start_coordinates_angle(dna_parameters, lattice_type, row, col, helix_num)
+    if helix_num % 2 == 0:
+        e3 = np.array([0, 1, 0], dtype=float)
+    else:
+        e3 = np.array([0, -1, 0], dtype=float)
+
+    base_positions = set()
+    for base in scaffold_bases:
+        base_positions.add(base.p)
+    for base in staple_bases:
+        base_positions.add(base.p)
+
+    num_base_positions = len(base_positions)
+    axis_coords = np.zeros((num_base_positions, 3), dtype=float)
+    axis_frames = np.zeros((3, 3, num_base_positions), dtype=float)
+    pos_map = {}
+    for i, p in enumerate(sorted(base_positions)):
+        pos_map[p] = i
+        axis_coords[i, :] = init_coord + np.array([0, dist_bp * p, 0])
+        angle = init_ang + ang_bp * p
+        e2 = np.array([cos(-deg2rad(angle)), 0, sin(-deg2rad(angle))])
+        e1 = np.cross(e2, e3)
+        axis_frames[:, :, i] = np.array([e1, e2, e3]).transpose()
+
+    nt_coords = []
+    for bases, local in ((scaffold_bases, scaf_local), (staple_bases, stap_local)):
+        coords = np.zeros((len(bases), 3), dtype=float)
+        for i, base in enumerate(bases):
+            j = pos_map[base.p]
+            base.coordinates = axis_coords[j]
+            base.ref_frame = axis_frames[:, :, j]
+            coords[i, :] = axis_coords[j, :] + np.dot(axis_frames[:, :, j], local)
+            base.nt_coords = coords[i]
+        nt_coords.append(coords)
+
+    return axis_coords, axis_frames, nt_coords[0], nt_coords[1]
+
+
+def load_helices(file_name):
+    """ Load a caDNAno design and return its DNA parameters, lattice type and helix data. """
+    converter = Converter()
+    converter.modify = False
+    converter.read_cadnano_file(file_name, None, None)
+    dna_structure = converter.dna_structure
+    helices = [(helix.lattice_row, helix.lattice_col, helix.lattice_num, helix.scaffold_bases, helix.staple_bases)
+               for helix in dna_structure.structure_helices_map.values()]
+    return dna_structure.dna_parameters, dna_structure.lattice_type, helices
+
+
+def max_difference(geometry1, geometry2):
+    """ Get the maximum absolute difference between two lists of helix geometry. """
+    diff = 0.0
+    for helix1, helix2 in zip(geometry1, geometry2):
+        for array1, array2 in zip(helix1, helix2):
+            if array1.size:
+                diff = max(diff, np.max(np.abs(array1 - array2)))
+    return diff
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("-n", "--repeats", type=int, default=5, help="number of timing repeats")
+    parser.add_argument("files", nargs="*", help="caDNAno design files (default: tests/samples/*.json)")
+    args = parser.parse_args()
+    logging.getLogger("nanodesign").setLevel(logging.ERROR)
+
+    files = args.files or sorted(glob.glob(os.path.join(tests_path, "samples", "*.json")))
+    print("%-36s %7s %7s %10s %10s %10s %8s %9s" % ("design", "helices", "bases", "loop (ms)", "helix (ms)",
+                                                    "all (ms)", "speedup", "max diff"))
+    total_loop = total_all = 0.0
+    for file_name in files:
+        dna_parameters, lattice_type, helices = load_helices(file_name)
+        num_bases = sum(len(h[3]) + len(h[4]) for h in helices)
+
+        def run_loop():
+            return [loop_generate_coordinates(dna_parameters, lattice_type, *helix) for helix in helices]
+
+        def run_helix():
+            return [generate_coordinates(dna_parameters, lattice_type, *helix) for helix in helices]
+
+        def run_all():
+            return generate_helices_coordinates(dna_parameters, lattice_type, helices)
+
+        diff = max(max_difference(run_loop(), run_helix()), max_difference(run_loop(), run_all()))
+        loop_time = min(timeit.repeat(run_loop, number=1, repeat=args.repeats)) * 1000
+        helix_time = min(timeit.repeat(run_helix, number=1, repeat=args.repeats)) * 1000
+        all_time = min(timeit.repeat(run_all, number=1, repeat=args.repeats)) * 1000
+        total_loop += loop_time
+        total_all += all_time
+        print("%-36s %7d %7d %10.2f %10.2f %10.2f %7.1fx %9.2g" % (os.path.basename(file_name), len(helices),
+              num_bases, loop_time, helix_time, all_time, loop_time / all_time, diff))
+
+    print("%-36s %7s %7s %10.2f %10s %10.2f %7.1fx" % ("total", "", "", total_loop, "", total_all,
+                                                       total_loop / total_all))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,123 @@
+#!/usr/bin/env python
+# Copyright 2016 Autodesk Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Benchmark DnaStructure.stability_report() on caDNAno designs.
+
+The report is timed on a freshly read structure, so the time includes computing the domains, and again
+with the domains already computed. It is compared with a per-domain loop aggregating the values returned
+by Domain.melting_temperature() and EnergyModel.stack_energy(), and the strand values of the two are
+checked to agree. The default design, pointer.json, has a 7250 base scaffold; the benchmark fails if the
+report on a fresh structure takes longer than the time limit.
+
+Usage:
+    python bench_stability_report.py [-n REPEATS] [-l LIMIT] [design.json ...]
+"""
+import argparse
+import logging
+import os
+import sys
+import timeit
+
+import numpy as np
+
+tests_path = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(tests_path))
+
+from nanodesign.converters.converter import Converter
+from nanodesign.data.energymodel import energy_model
+
+
+def read_structure(file_name):
+    """ Read a caDNAno design with the M13mp18 scaffold sequence and return its DNA structure. """
+    converter = Converter()
+    converter.read_cadnano_file(file_name, None, "M13mp18")
+    return converter.dna_structure
+
+
+def loop_stability_report(dna_structure):
+    """ Aggregate domain thermodynamics per strand one domain at a time. """
+    complement = {"A": "T", "C": "G", "G": "C", "T": "A", "a": "t", "c": "g", "g": "c", "t": "a"}
+    temperature = energy_model.temperature_in_K - 273.15
+    strands = {}
+    for strand in dna_structure.strands:
+        min_temperature = np.nan
+        longest = 0
+        total_dG = 0.0
+        for domain in strand.domain_list:
+            melting_temperature = domain.melting_temperature()
+            if melting_temperature in (-500.0, -501.0):
+                continue
+            _, _, dH, dS = energy_model.stack_energy(domain.sequence,
+                                                     "".join(complement[b] for b in reversed(domain.sequence)))
+            total_dG += dH - energy_model.temperature_in_K * dS / 1000.0
+            min_temperature = np.fmin(min_temperature, melting_temperature)
+            if melting_temperature > temperature:
+                longest = max(longest, len(domain.base_list))
+        strands[strand.id] = (min_temperature, longest, total_dG)
+    return strands
+
+
+def max_difference(report, strands):
+    """ Get the maximum absolute difference between the report strand values and the loop values. """
+    diff = 0.0
+    for row in report.strands:
+        values = np.array(strands[int(row['id'])])
+        report_values = np.array([row['min_melting_temperature'], row['longest_stable_domain'], row['dG']])
+        diff = max(diff, np.nanmax(np.abs(values - report_values), initial=0.0))
+    return diff
+
+
+def time_fresh_report(file_name, repeats):
+    """ Get the minimum time to create the report for a freshly read structure, including its domains. """
+    times = []
+    for _ in range(repeats):
+        dna_structure = read_structure(file_name)
+        times.append(timeit.timeit(dna_structure.stability_report, number=1))
+    return min(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("-n", "--repeats", type=int, default=5, help="number of timing repeats")
+    parser.add_argument("-l", "--limit", type=float, default=1.0, help="time limit in seconds for a fresh report")
+    parser.add_argument("files", nargs="*", help="caDNAno design files (default: tests/samples/pointer.json)")
+    args = parser.parse_args()
+    logging.getLogger("nanodesign").setLevel(logging.ERROR)
+
+    files = args.files or [os.path.join(tests_path, "samples", "pointer.json")]
+    print("%-36s %7s %7s %8s %10s %11s %10s %8s %9s" % ("design", "bases", "domains", "strands", "fresh (ms)",
+                                                        "cached (ms)", "loop (ms)", "speedup", "max diff"))
+    failed = False
+    for file_name in files:
+        dna_structure = read_structure(file_name)
+        report = dna_structure.stability_report()
+        diff = max_difference(report, loop_stability_report(dna_structure))
+        fresh_time = time_fresh_report(file_name, args.repeats)
+        cached_time = min(timeit.repeat(dna_structure.stability_report, number=1, repeat=args.repeats))
+        loop_time = min(timeit.repeat(lambda: loop_stability_report(dna_structure), number=1, repeat=args.repeats))
+        failed |= fresh_time > args.limit
+        print("%-36s %7d %7d %8d %10.2f %11.2f %10.2f %7.1fx %9.2g" % (os.path.basename(file_name),
+              len(dna_structure.base_connectivity), len(report.domains), len(report.strands), fresh_time * 1000,
+              cached_time * 1000, loop_time * 1000, loop_time / cached_time, diff))
+
+    if failed:
+        print("FAILED: a fresh report took longer than %g s" % args.limit)
+        sys.exit(1)
+    print("All fresh reports took less than %g s" % args.limit)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,33 @@
+# Copyright 2016 Autodesk Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+""" Make the nanodesign package importable by the tests without installing it.
+
+The repository root is added to sys.path for the tests and to PYTHONPATH for the scripts the tests run as
+subprocesses.
+"""
+import os
+import sys
+
+base_path = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+if base_path not in sys.path:
+    sys.path.insert(0, base_path)
+
+python_path = os.environ.get('PYTHONPATH')
+if python_path:
+    if base_path not in python_path.split(os.pathsep):
+        os.environ['PYTHONPATH'] = os.pathsep.join([base_path, python_path])
+else:
+    os.environ['PYTHONPATH'] = base_path
@@ -15,8 +15,27 @@
 import pytest
 import subprocess
 
+import functools
+import json
+import math
 import os.path
 import hashlib
+import random
+import numpy
+
+from nanodesign.converters.cadnano import reader as cadnano_reader
+from nanodesign.converters.cadnano.common import CadnanoStrandType
+from nanodesign.converters.converter import VIEWER_HELIX_DISTANCE, Converter
+from nanodesign.converters.pdbcif.atomic_structure import AtomicStructure, AtomTemplates, get_atom_templates
+from nanodesign.converters.pdbcif.cif_writer import CifWriter
+from nanodesign.converters.pdbcif.pdb_writer import PdbWriter
+from nanodesign.converters.pdbcif.pdb_reader import PdbAtomTableReader, PdbReader
+from nanodesign.data.base import DnaBase
+from nanodesign.data.base_table import BaseTable
+from nanodesign.data.energymodel import (energy_model, convert_temperature_K_to_C, make_condition_grid, BOLTZMANN_CONSTANT,
+                                         DomainEnergies)
+from nanodesign.data.lattice import HoneycombLattice, LatticeIndex, SquareLattice
+from nanodesign.data.strand_tracer import trace_strands_sequential, trace_strands_vectorized, _is_consistent
 
 ###################
 # Setup path data #
@@ -113,10 +132,11 @@ def basic_converter_hash(sample_file):
 # Tests #
 #########
 
-def test_convert_basic(sample_file, basic_converter_hash):
+def test_convert_basic(sample_file, basic_converter_hash, tmpdir):
     converter_file = os.path.join(scripts_path, 'converter.py')
+    outfile = str(tmpdir.join('my_sample_viewer.json'))
     result = subprocess.call([converter_file, "--infile", sample_file, "--informat", "cadnano", "--inseqname",
-                              "M13mp18", "--outfile", "my_sample_viewer.json", "--outformat", "viewer"],
+                              "M13mp18", "--outfile", outfile, "--outformat", "viewer"],
                              stdout=None, stderr=None)
     # First way it could fail is if the call did not succeed, e.g. some error while executing.
     assert result == 0
@@ -126,27 +146,732 @@ def test_convert_basic(sample_file, basic_converter_hash):
     # result = result.rstrip('\n')
     # assert result == md5_hash
 
-    result = fast_hash_file('my_sample_viewer.json')
+    result = fast_hash_file(outfile)
     add_to_hashfile(current_tests_hashfile, sample_file,
                     'converter_basic', result)
     assert result == basic_converter_hash, "Hash value mismatch."
 
 
-def test_convert_modify():
+def test_convert_modify(tmpdir):
     filename = os.path.join(samples_path, 'flat_sheet.json')
     converter_file = os.path.join(scripts_path, 'converter.py')
+    outfile = str(tmpdir.join('my_sample_viewer.json'))
     result = subprocess.call([converter_file, "--infile", filename, "--informat", "cadnano", "--inseqname", "M13mp18",
-                              "--modify", "true", "--outfile", "my_sample_viewer.json", "--outformat", "viewer"],
+                              "--modify", "true", "--outfile", outfile, "--outformat", "viewer"],
                              stdout=None, stderr=None)
     # First way it could fail is if the call did not succeed, e.g. some error while executing.
     assert result == 0
 
-    result = fast_hash_file('my_sample_viewer.json')
+    result = fast_hash_file(outfile)
     add_to_hashfile(current_tests_hashfile, filename,
                     'converter_modify', result)
     assert result == master_hashfile['flat_sheet.json']['converter_modify'], "Hash value mismatch."
 
 
+def test_convert_binary(tmpdir):
+    filename = os.path.join(samples_path, 'flat_sheet.json')
+    converter_file = os.path.join(scripts_path, 'converter.py')
+    topology_file = str(tmpdir.join('my_sample_topology.json'))
+    binary_file = str(tmpdir.join('my_sample.nds'))
+    binary_topology_file = str(tmpdir.join('my_sample_binary_topology.json'))
+    result = subprocess.call([converter_file, "--infile", filename, "--informat", "cadnano", "--inseqname", "M13mp18",
+                              "--outfile", topology_file, "--outformat", "topology"],
+                             stdout=None, stderr=None)
+    assert result == 0
+    result = subprocess.call([converter_file, "--infile", filename, "--informat", "cadnano", "--inseqname", "M13mp18",
+                              "--outfile", binary_file, "--outformat", "binary"],
+                             stdout=None, stderr=None)
+    assert result == 0
+    result = subprocess.call([converter_file, "--infile", binary_file, "--informat", "binary",
+                              "--outfile", binary_topology_file, "--outformat", "topology"],
+                             stdout=None, stderr=None)
+    assert result == 0
+
+    # The structure read from the binary file must give the same output as the structure it was written from.
+    assert fast_hash_file(binary_topology_file) == fast_hash_file(topology_file)
+
+
+@pytest.mark.parametrize("use_orjson", [False, True])
+def test_cadnano_strand_blocks(use_orjson, monkeypatch):
+    """ The caDNAno bases created from the strand blocks must be those of the design file. """
+    filename = os.path.join(samples_path, 'hc-test-1.json')
+    if use_orjson:
+        pytest.importorskip('orjson')
+    else:
+        monkeypatch.setattr(cadnano_reader, 'orjson', None)
+    with open(filename) as f:
+        json_helices = {json_helix['num']: json_helix for json_helix in json.load(f)['vstrands']}
+    design = cadnano_reader.CadnanoReader().read_json(filename)
+    assert len(design.helices) > 0
+
+    def get_tuples(strands):
+        return [[base.initial_strand, base.initial_base, base.final_strand, base.final_base] for base in strands]
+
+    for helix in design.helices:
+        json_helix = json_helices[helix.num]
+        for strand_type, name in ((CadnanoStrandType.SCAFFOLD, 'scaf'), (CadnanoStrandType.STAPLE, 'stap')):
+            positions, block = helix.get_strand_block(strand_type)
+            assert [json_helix[name][pos] for pos in positions.tolist()] == block.tolist()
+            assert all(json_helix[name][pos] == [-1, -1, -1, -1] for pos in set(range(len(json_helix[name]))) -
+                       set(positions.tolist()))
+        assert get_tuples(helix.scaffold_strands) == json_helix['scaf']
+        assert get_tuples(helix.staple_strands) == json_helix['stap']
+
+    # Changes made to the bases once they are created must be in the strand blocks.
+    helix = design.helices[0]
+    positions, _ = helix.get_strand_block(CadnanoStrandType.STAPLE)
+    empty_pos = min(set(range(len(helix.staple_strands))) - set(positions.tolist()))
+    helix.staple_strands[empty_pos].initial_strand = helix.num
+    helix.staple_strands[empty_pos].initial_base = empty_pos + 1
+    cleared_pos = positions.tolist()[0]
+    base = helix.staple_strands[cleared_pos]
+    base.initial_strand = base.initial_base = base.final_strand = base.final_base = -1
+    positions, block = helix.get_strand_block(CadnanoStrandType.STAPLE)
+    expected = get_tuples(helix.staple_strands)
+    assert [expected[pos] for pos in positions.tolist()] == block.tolist()
+    assert empty_pos in positions.tolist()
+    assert block[positions.tolist().index(empty_pos)].tolist() == [helix.num, empty_pos + 1, -1, -1]
+    assert cleared_pos not in positions.tolist()
+
+
+def test_convert_batch(tmpdir):
+    """ Batch conversion must write every format of every input file and report a bad input file. """
+    converter_file = os.path.join(scripts_path, 'converter.py')
+    sample_names = ['fourhelix', 'hc-test-1']
+    input_dir = tmpdir.mkdir('input')
+    for name in sample_names:
+        with open(os.path.join(samples_path, name + '.json')) as f:
+            input_dir.join(name + '.json').write(f.read())
+    input_dir.join('bad.json').write('{"vstrands": [')
+    output_dir = tmpdir.join('output')
+    process = subprocess.run([converter_file, "--batch", str(input_dir.join('*.json')), "--informat", "cadnano",
+                              "--inseqname", "M13mp18", "--outformat", "topology,cando,viewer", "--outdir", str(output_dir),
+                              "--workers", "2"],
+                             stdout=subprocess.PIPE, universal_newlines=True)
+    # The bad input file makes the script fail after the other files have been converted.
+    assert process.returncode == 1
+
+    report = [line.split() for line in process.stdout.splitlines()]
+    assert report[-1][:5] == ['Converted', '2', 'of', '3', 'files']
+    file_reports = {}
+    for line in report[:-1]:
+        file_reports.setdefault(os.path.basename(line[0]), []).append((line[1], line[4]))
+    assert sorted(file_reports['bad.json']) == [('read', 'FAILED')]
+    for name in sample_names:
+        assert sorted(file_reports[name + '.json']) == [('cando', 'ok'), ('read', 'ok'), ('topology', 'ok'),
+                                                        ('viewer', 'ok')]
+
+        converter = Converter()
+        converter.read_cadnano_file(os.path.join(samples_path, name + '.json'), None, "M13mp18")
+        for suffix, write_function in (('.cndo', converter.write_cando_file),
+                                       ('_topology.json', converter.write_topology_file)):
+            outfile = str(tmpdir.join(name + suffix))
+            write_function(outfile)
+            assert fast_hash_file(str(output_dir.join(name + suffix))) == fast_hash_file(outfile)
+    assert not output_dir.join('bad.cndo').exists()
+
+
+@pytest.mark.parametrize("outformat, suffix", [("cando", "cndo"), ("pdb", "pdb"), ("simdna", "dat"),
+                                               ("structure", "json")])
+def test_convert_binary_geometry(outformat, suffix, tmpdir):
+    """ A structure read from a binary file must write the same geometry as the structure it was written from. """
+    filename = os.path.join(samples_path, 'flat_sheet.json')
+    binary_file = str(tmpdir.join('my_sample.nds'))
+    hashes = []
+    for modify in (False, True):
+        converter = Converter()
+        converter.modify = modify
+        converter.read_cadnano_file(filename, None, "M13mp18")
+        converter.write_binary_file(binary_file)
+        binary_converter = Converter()
+        binary_converter.read_structure_file(binary_file, None, None)
+        for name, write_converter in (('my_sample', converter), ('my_sample_binary', binary_converter)):
+            outfile = str(tmpdir.join('%s.%s' % (name, suffix)))
+            getattr(write_converter, 'write_%s_file' % outformat)(outfile)
+            hashes.append(fast_hash_file(outfile))
+    assert hashes[0] == hashes[1] == master_hashfile['flat_sheet.json']['converter_' + outformat]
+    assert hashes[2] == hashes[3]
+
+
+
+def test_convert_binary_delete_staples(tmpdir):
+    """ A structure with deleted staples read from a binary file must write the same geometry. """
+    filename = os.path.join(samples_path, 'fourhelix.json')
+    converter = Converter()
+    converter.read_cadnano_file(filename, None, "M13mp18")
+    converter.perform_staple_operations("delete")
+    binary_file = str(tmpdir.join('my_sample.nds'))
+    converter.write_binary_file(binary_file)
+    binary_converter = Converter()
+    binary_converter.read_structure_file(binary_file, None, None)
+    hashes = []
+    for name, write_converter in (('my_sample', converter), ('my_sample_binary', binary_converter)):
+        outfile = str(tmpdir.join('%s.cndo' % name))
+        write_converter.write_cando_file(outfile)
+        hashes.append(fast_hash_file(outfile))
+    assert hashes[0] == hashes[1]
+
+
+@pytest.mark.parametrize("sample_name", ["fourhelix.json", "flat_sheet.json", "Barrel_cadnano.json"])
+def test_simdna_maximal_set(sample_name, tmpdir):
+    """ Staple bases created by the maximal_set operation must be written paired with the scaffold. """
+    converter = Converter()
+    converter.read_cadnano_file(os.path.join(samples_path, sample_name), None, "M13mp18")
+    converter.perform_staple_operations("maximal_set")
+    outfile = str(tmpdir.join('my_sample.dat'))
+    converter.write_simdna_file(outfile)
+    assert fast_hash_file(outfile) == master_hashfile[sample_name]['converter_simdna_maximal_set']
+
+def test_conversion_cache(tmpdir):
+    """ A structure must be read from the cache, and a cache file that can't be read must be replaced. """
+    filename = os.path.join(samples_path, 'fourhelix.json')
+    cache_dir = tmpdir.mkdir('cache')
+    topology_file = str(tmpdir.join('topology.json'))
+    topologies = []
+    for truncate in (False, False, True):
+        if truncate:
+            for cache_file in cache_dir.listdir():
+                with open(str(cache_file), 'r+b') as f:
+                    f.truncate(10)
+        converter = Converter()
+        converter.use_cache = True
+        converter.cache.directory = str(cache_dir)
+        converter.read_cadnano_file(filename, None, "M13mp18")
+        converter.write_topology_file(topology_file)
+        with open(topology_file) as f:
+            topologies.append(f.read())
+        assert len(cache_dir.listdir()) == 1
+        assert cache_dir.listdir()[0].size() > 10
+        assert len(converter.cadnano_design.helices) == 4
+    assert topologies[0] == topologies[1] == topologies[2]
+
+
+def test_conversion_cache_write_error(tmpdir, monkeypatch):
+    """ A cache file that can't be written must not stop a conversion or leave a partial file. """
+    def write(self, file_name):
+        with open(file_name, 'wb') as f:
+            f.write(b'partial')
+        raise ValueError("write failed")
+
+    monkeypatch.setattr('nanodesign.converters.binary.writer.BinaryStructureWriter.write', write)
+    cache_dir = tmpdir.mkdir('cache')
+    converter = Converter()
+    converter.use_cache = True
+    converter.cache.directory = str(cache_dir)
+    converter.read_cadnano_file(os.path.join(samples_path, 'fourhelix.json'), None, "M13mp18")
+    assert len(converter.dna_structure.strands) > 0
+    assert cache_dir.listdir() == []
+
+
+@pytest.mark.parametrize("max_workers", [1, 4])
+def test_write_many(max_workers, tmpdir):
+    """ Files written by write_many() must be the same as those written one format at a time. """
+    filename = os.path.join(samples_path, 'fourhelix.json')
+    formats = ["binary", "cadnano", "cando", "cif", "pdb", "simdna", "structure", "topology"]
+    converter = Converter()
+    converter.infile, converter.informat = filename, "cadnano"
+    converter.read_cadnano_file(filename, None, "M13mp18")
+    results = converter.write_many(formats, str(tmpdir.join('sample')), max_workers=max_workers)
+    assert [(file_format, error_message) for file_format, _, _, error_message in results] == \
+        [(file_format, None) for file_format in formats]
+
+    single_dir = tmpdir.mkdir('single')
+    single_converter = Converter()
+    single_converter.infile, single_converter.informat = filename, "cadnano"
+    single_converter.read_cadnano_file(filename, None, "M13mp18")
+    for file_format, file_name, _, _ in results:
+        single_file_name = str(single_dir.join(os.path.basename(file_name)))
+        getattr(single_converter, 'write_%s_file' % file_format)(single_file_name)
+        assert fast_hash_file(file_name) == fast_hash_file(single_file_name), file_format
+
+
+@pytest.mark.parametrize("staples", [None, "maximal_set"])
+def test_write_many_viewer(staples, tmpdir):
+    """ A viewer file written by write_many() must be the same as one written from a structure read using the
+        viewer helix distance.
+    """
+    filename = os.path.join(samples_path, 'fourhelix.json')
+    transform = "helices(0,1):rotate(0,0,90),translate(1,2,3)"
+
+    def read(converter):
+        converter.read_cadnano_file(filename, None, "M13mp18")
+        if staples:
+            converter.perform_staple_operations(staples)
+        converter.transform_structure(transform)
+
+    # Strands are given random colors, so the random generator is seeded the same way before each viewer
+    # structure is created.
+    converter = Converter()
+    read(converter)
+    random.seed(1)
+    results = converter.write_many(["cando", "viewer"], str(tmpdir.join('sample')), max_workers=2)
+    assert [error_message for _, _, _, error_message in results] == [None, None]
+    cando_file = str(tmpdir.join('single.cndo'))
+    converter.write_cando_file(cando_file)
+    assert fast_hash_file(results[0][1]) == fast_hash_file(cando_file)
+
+    viewer_converter = Converter()
+    viewer_converter.dna_parameters.helix_distance = VIEWER_HELIX_DISTANCE
+    random.seed(1)
+    read(viewer_converter)
+    viewer_file = str(tmpdir.join('single_viewer.json'))
+    viewer_converter.write_viewer_file(viewer_file)
+    assert fast_hash_file(results[1][1]) == fast_hash_file(viewer_file)
+
+def test_write_many_errors(tmpdir, monkeypatch):
+    """ An error writing a file must be returned without stopping the other files being written. """
+    filename = os.path.join(samples_path, 'fourhelix.json')
+    converter = Converter()
+    converter.read_cadnano_file(filename, None, "M13mp18")
+
+    def write_simdna_file(file_name):
+        raise IOError("simdna failed")
+
+    monkeypatch.setattr(converter, 'write_simdna_file', write_simdna_file)
+    with pytest.raises(IOError):
+        converter.write_many(["simdna", "topology"], str(tmpdir.join('stop')), max_workers=2)
+
+    results = converter.write_many(["cando", "simdna", "topology"], str(tmpdir.join('sample')), max_workers=2,
+                                   stop_on_error=False)
+    assert [error_message for _, _, _, error_message in results] == [None, "OSError: simdna failed", None]
+    assert not os.path.exists(results[1][1])
+    single_dir = tmpdir.mkdir('single')
+    single_converter = Converter()
+    single_converter.read_cadnano_file(filename, None, "M13mp18")
+    for file_format, file_name, _, _ in (results[0], results[2]):
+        single_file_name = str(single_dir.join(os.path.basename(file_name)))
+        getattr(single_converter, 'write_%s_file' % file_format)(single_file_name)
+        assert fast_hash_file(file_name) == fast_hash_file(single_file_name), file_format
+
+
+def _get_domains_data(dna_structure):
+    domains = [(domain.id, domain.helix.id, domain.strand.id, [base.id for base in domain.base_list],
+                domain.connected_strand, domain.connected_domain) for domain in dna_structure.domain_list]
+    base_domains = [base.domain for base in dna_structure.base_connectivity]
+    return domains, base_domains, dna_structure.base_table.domain.tolist()
+
+
+@pytest.mark.parametrize("modify", [False, True])
+@pytest.mark.parametrize("sample_name", sorted(name for name in os.listdir(samples_path) if name.endswith('.json')))
+def test_compute_domains_vectorized(sample_name, modify):
+    """ The domains computed from the base table arrays must be the same as those computed base by base. """
+    converter = Converter()
+    converter.modify = modify
+    converter.read_cadnano_file(os.path.join(samples_path, sample_name), None, "M13mp18")
+    dna_structure = converter.dna_structure
+
+    domains_data = []
+    for vectorized in (False, True):
+        for strand in dna_structure.strands:
+            strand.domain_list = []
+        dna_structure._compute_domains(vectorized=vectorized)
+        domains_data.append(_get_domains_data(dna_structure))
+    assert domains_data[0] == domains_data[1]
+
+
+def _get_traced_strands_data(traced_strands, num_bases):
+    residues = numpy.zeros(num_bases, dtype=numpy.int64)
+    for tour, _ in traced_strands:
+        residues[tour] = numpy.arange(1, len(tour) + 1)
+    strands = [(tour.tolist(), is_circular, int(tour[0])) for tour, is_circular in traced_strands]
+    return strands, residues.tolist()
+
+
+@pytest.mark.parametrize("modify", [False, True])
+@pytest.mark.parametrize("sample_name", sorted(name for name in os.listdir(samples_path) if name.endswith('.json')))
+def test_trace_strands_vectorized(sample_name, modify):
+    """ The strands traced using pointer jumping must be the same as those traced base by base. """
+    converter = Converter()
+    converter.modify = modify
+    converter.read_cadnano_file(os.path.join(samples_path, sample_name), None, "M13mp18")
+    dna_structure = converter.dna_structure
+    table = dna_structure.base_table
+    num_bases = len(table.up)
+
+    assert _is_consistent(table.up, table.down)
+    strands_data = [_get_traced_strands_data(trace(table.up, table.down), num_bases)
+                    for trace in (trace_strands_sequential, trace_strands_vectorized)]
+    assert strands_data[0] == strands_data[1]
+    assert strands_data[1][1] == [base.residue for base in dna_structure.base_connectivity]
+
+
+@pytest.mark.parametrize("lattice", [SquareLattice(1.0), HoneycombLattice(1.0)])
+def test_lattice_index_neighbors(lattice):
+    """ The neighbors found with a LatticeIndex must be those found by checking all pairs of coordinates. """
+    coords = [(row, col) for row in range(5) for col in range(6) if (row * 7 + col) % 4 != 0]
+    index = LatticeIndex((coord, 'item%d.%d' % coord) for coord in coords)
+    for row, col in coords:
+        neighbors = index.get_neighbors(lattice, row, col)
+        assert len(neighbors) == lattice.number_of_neighbors
+        assert neighbors == [index.get(coord) for coord in lattice.get_neighbors(row, col)]
+        expected = [index[(nrow, ncol)] for nrow, ncol in coords if (nrow, ncol) != (row, col) and
+                    abs(nrow - row) + abs(ncol - col) < 2 and
+                    lattice.get_neighbor_index(row, col, nrow, ncol) is not None]
+        assert sorted(index.get_neighbor_items(lattice, row, col)) == sorted(expected)
+        assert index.get_neighbor_items(lattice, row, col) == [item for item in neighbors if item is not None]
+
+
+def test_base_table_views():
+    """ The bases of a structure must be views of its base table rows, so editing either changes both. """
+    converter = Converter()
+    converter.modify = True
+    converter.read_cadnano_file(os.path.join(samples_path, "Nature09_squarenut_no_joins.json"), None, "M13mp18")
+    dna_structure = converter.dna_structure
+    bases = dna_structure.base_connectivity
+    table = dna_structure.base_table
+
+    def _ids(objs):
+        return [-1 if obj is None else obj.id for obj in objs]
+
+    assert [base.id for base in bases] == list(range(len(table)))
+    assert table.bases == bases
+    assert _ids([base.up for base in bases]) == table.up.tolist()
+    assert _ids([base.down for base in bases]) == table.down.tolist()
+    assert _ids([base.across for base in bases]) == table.across.tolist()
+    assert [base.h for base in bases] == table.helix.tolist()
+    assert "".join(base.seq for base in bases) == table.get_sequence()
+
+    base = bases[0]
+    base.seq = 'G'
+    base.up = bases[1]
+    assert table.get_sequence()[0] == 'G' and table.up[0] == 1
+    table.down[0] = 2
+    assert base.down is bases[2]
+    assert dna_structure.base_table is table
+
+
+def test_base_table_from_bases():
+    """ Bases gathered into a new table must not be rebound to the stale rows of their old table. """
+    old_table = BaseTable()
+    bases = [DnaBase(i, table=old_table) for i in range(4)]
+    for base, down in zip(bases, bases[1:]):
+        base.down = down
+        down.up = base
+    bases[0].across = bases[3]
+
+    # The old table still has a base so it keeps its rows.
+    table = BaseTable.from_bases(bases[:3])
+    assert len(old_table) == 4 and bases[3].table is old_table
+    assert bases[3].up is bases[2] and bases[2].down is None
+    bases[0].seq = 'G'
+
+    # Linking a base added to the old table merges the old table into the larger new table without rebinding
+    # the bases of its stale rows.
+    other_bases = [DnaBase(i, table=table) for i in range(5, 8)]
+    new_base = DnaBase(4, table=old_table)
+    new_base.across = bases[1]
+    assert [base.table for base in bases[:3] + [new_base]] == [table] * 4
+    assert bases[0].seq == 'G' and bases[0].across is None and new_base.across is bases[1]
+
+    # A table whose bases have all been rebound is emptied.
+    all_bases = bases + [new_base] + other_bases
+    new_table = BaseTable.from_bases(list(reversed(all_bases)))
+    assert len(table) == 0 and len(old_table) == 0 and len(new_table) == 8
+    assert all(base.table is new_table for base in all_bases)
+    assert bases[0].seq == 'G' and bases[3].up is bases[2] and new_base.across is bases[1]
+
+
+@pytest.mark.parametrize("staples", [None, "delete", "maximal_set"])
+@pytest.mark.parametrize("sample_name", ["fourhelix.json", "flat_sheet.json", "Nature09_squarenut_no_joins.json"])
+def test_base_geometry(sample_name, staples):
+    """ The base geometry gathered from the helices must be the same as the geometry of each base. """
+    converter = Converter()
+    converter.modify = True
+    converter.read_cadnano_file(os.path.join(samples_path, sample_name), None, "M13mp18")
+    if staples:
+        converter.perform_staple_operations(staples)
+    bases = converter.dna_structure.base_connectivity
+
+    coordinates, ref_frames, nt_coords = converter.dna_structure.get_base_geometry()
+    numpy.testing.assert_array_equal(coordinates, [base.coordinates for base in bases])
+    numpy.testing.assert_array_equal(ref_frames, [base.ref_frame for base in bases])
+    numpy.testing.assert_array_equal(nt_coords, [base.nt_coords for base in bases])
+
+
+def _get_aux_data(dna_structure):
+    connections = []
+    for helix_id, helix_connectivity in sorted(dna_structure.helix_connectivity.items()):
+        connections.append((helix_id, [(connection.to_helix.id, connection.direction.tolist(),
+                                        [(crossover.crossover_base.id, crossover.strand.id)
+                                         for crossover in connection.crossovers])
+                                       for connection in helix_connectivity]))
+    strand_helices = [(strand_id, sorted(helix_list)) for strand_id, helix_list in
+                      sorted(dna_structure.strand_helix_refs.items())]
+    return _get_domains_data(dna_structure), connections, strand_helices
+
+
+def test_update_aux_data():
+    """ The auxiliary data updated after editing a structure must be the same as that computed after the edits. """
+    filename = os.path.join(samples_path, "fourhelix.json")
+    transform = "helices(0,1):rotate(90,0,0),translate(1,2,3)"
+    aux_data = []
+    for compute_before_edit in (True, False):
+        converter = Converter()
+        converter.read_cadnano_file(filename, None, "M13mp18")
+        dna_structure = converter.dna_structure
+        if compute_before_edit:
+            dna_structure.compute_aux_data()
+        dna_structure.remove_staples([1, 3, 5])
+        converter.transform_structure(transform)
+        dna_structure.compute_aux_data()
+        aux_data.append(_get_aux_data(dna_structure))
+    assert aux_data[0][0] == aux_data[1][0]
+    assert aux_data[0][2] == aux_data[1][2]
+    for connections0, connections1 in zip(aux_data[0][1], aux_data[1][1]):
+        assert connections0[0] == connections1[0]
+        assert [(id, crossovers) for id, _, crossovers in connections0[1]] == \
+            [(id, crossovers) for id, _, crossovers in connections1[1]]
+        for (_, direction0, _), (_, direction1, _) in zip(connections0[1], connections1[1]):
+            assert numpy.allclose(direction0, direction1)
+
+
+def test_melting_temperatures():
+    """ The domain melting temperatures computed in one batch must match those computed stack by stack. """
+    converter = Converter()
+    converter.read_cadnano_file(os.path.join(samples_path, "Nature09_squarenut_no_joins.json"), None, "M13mp18")
+    domains = converter.dna_structure.domains
+    temperatures = energy_model.melting_temperatures(domains)
+    assert len(temperatures) == len(domains)
+
+    complement = {"A": "T", "C": "G", "G": "C", "T": "A"}
+    for domain, temperature in zip(domains, temperatures):
+        if domain.connected_domain == -1:
+            assert temperature == -500.0
+            continue
+        _, _, dH, dS = energy_model.stack_energy(domain.sequence, "".join(complement[letter.upper()]
+                                                                          for letter in reversed(domain.sequence)))
+        assert temperature == pytest.approx(convert_temperature_K_to_C(energy_model.melting_temperature(dH, dS)))
+
+
+def test_melting_temperature_sweep():
+    """ The salt corrected melting temperatures must reduce to the uncorrected ones at 1 M Na+ without Mg2+. """
+    converter = Converter()
+    converter.read_cadnano_file(os.path.join(samples_path, "Nature09_squarenut_no_joins.json"), None, "M13mp18")
+    domains = converter.dna_structure.domains
+    energies = energy_model.domain_energies(domains)
+    sodium_conc = [0.01, 0.1, 1.0]
+    temperatures = energy_model.melting_temperature_sweep(energies, sodium_conc=sodium_conc, magnesium_conc=0.0)
+    assert temperatures.shape == (len(domains), len(sodium_conc))
+    assert temperatures[:, 2] == pytest.approx(energy_model.melting_temperatures(domains))
+
+    # Domains long enough to be stable melt at higher temperatures in higher salt.
+    stable = energies.is_defined & (energies.num_pairs >= 8)
+    assert (numpy.diff(temperatures[stable], axis=1) > 0).all()
+
+
+def _owczarzy_melting_temperature(dH, dS, num_pairs, gc_fraction, staple_conc, scaffold_conc, sodium_conc,
+                                  magnesium_conc):
+    """ Compute the salt corrected melting temperature of one duplex using Owczarzy et al. (2008), eqs. 16-18. """
+    inv_temperature = (dS / 1000.0 + BOLTZMANN_CONSTANT * math.log(staple_conc - 0.5 * scaffold_conc)) / dH
+    ratio = math.sqrt(magnesium_conc) / sodium_conc if sodium_conc > 0.0 else float('inf')
+    if ratio < 0.22:
+        ln_sodium = math.log(sodium_conc)
+        return convert_temperature_K_to_C(
+            1.0 / (inv_temperature + (4.29e-5 * gc_fraction - 3.95e-5) * ln_sodium + 9.40e-6 * ln_sodium**2))
+    a, b, c, d, e, f, g = 3.92e-5, 9.11e-6, 6.26e-5, 1.42e-5, 4.82e-4, 5.25e-4, 8.31e-5
+    if ratio < 6.0:
+        ln_sodium = math.log(sodium_conc)
+        a *= 0.843 - 0.352 * math.sqrt(sodium_conc) * ln_sodium
+        d *= 1.279 - 4.03e-3 * ln_sodium - 8.03e-3 * ln_sodium**2
+        g *= 0.486 - 0.258 * ln_sodium + 5.25e-3 * ln_sodium**3
+    ln_magnesium = math.log(magnesium_conc)
+    inv_temperature += a - b * ln_magnesium + gc_fraction * (c + d * ln_magnesium) + \
+        (-e + f * ln_magnesium + g * ln_magnesium**2) / (2.0 * (num_pairs - 1))
+    return convert_temperature_K_to_C(1.0 / inv_temperature)
+
+
+def test_melting_temperature_sweep_magnesium():
+    """ The Mg2+ only and mixed Na+/Mg2+ melting temperatures must be those of the Owczarzy et al. model. """
+    sequences = ["GCATGCTACGGATCAT", "ATTATGCAAT"]
+    energies = DomainEnergies(len(sequences))
+    energies.dH[:], energies.dS[:] = energy_model.duplex_stack_energies(sequences)
+    energies.num_pairs[:] = [len(sequence) for sequence in sequences]
+    energies.gc_fraction[:] = [(sequence.count("G") + sequence.count("C")) / len(sequence) for sequence in sequences]
+    energies.nonphysical_temperature[:] = numpy.nan
+
+    # Na+ only, mixed (sqrt([Mg2+])/[Na+] in [0.22, 6)) and Mg2+ dominated (sqrt([Mg2+])/[Na+] >= 6) conditions.
+    conditions = make_condition_grid([100e-9, 1e-6], 10e-9, [0.001, 0.05, 1.0], [0.0, 2e-3, 20e-3])
+    ratios = numpy.sqrt(conditions[3]) / conditions[2]
+    assert ((ratios >= 0.22) & (ratios < 6.0)).any() and (ratios >= 6.0).any() and (ratios < 0.22).any()
+    temperatures = energy_model.melting_temperature_sweep(energies, *conditions)
+    assert temperatures.shape == (len(sequences), 2 * 1 * 3 * 3)
+    for i in range(len(sequences)):
+        for j, condition in enumerate(zip(*conditions)):
+            assert temperatures[i, j] == pytest.approx(_owczarzy_melting_temperature(
+                energies.dH[i], energies.dS[i], energies.num_pairs[i], energies.gc_fraction[i], *condition))
+
+    # Mg2+ without monovalent cations.
+    magnesium_conc = [1e-3, 10e-3, 100e-3]
+    temperatures = energy_model.melting_temperature_sweep(energies, sodium_conc=0.0, magnesium_conc=magnesium_conc)
+    assert temperatures.shape == (len(sequences), len(magnesium_conc))
+    for i in range(len(sequences)):
+        for j, conc in enumerate(magnesium_conc):
+            assert temperatures[i, j] == pytest.approx(_owczarzy_melting_temperature(
+                energies.dH[i], energies.dS[i], energies.num_pairs[i], energies.gc_fraction[i], 100e-9, 10e-9, 0.0,
+                conc))
+    assert (numpy.diff(temperatures, axis=1) > 0).all()
+
+    # Reference values for 1 uM of the 16-mer duplex in 2 mM Mg2+ alone and with 50 mM Na+.
+    temperatures = energy_model.melting_temperature_sweep(energies, staple_conc=1e-6, scaffold_conc=0.0,
+                                                          sodium_conc=[0.0, 0.05], magnesium_conc=2e-3)
+    assert temperatures[0].tolist() == pytest.approx([65.05, 64.36], abs=0.01)
+
+
+def test_stability_report(tmpdir):
+    """ The per-strand values of the stability report must aggregate the values of the strand domains. """
+    converter = Converter()
+    converter.read_cadnano_file(os.path.join(samples_path, "Nature09_squarenut_no_joins.json"), None, "M13mp18")
+    dna_structure = converter.dna_structure
+    report = dna_structure.stability_report()
+    assert len(report.strands) == len(dna_structure.strands)
+
+    for row, strand in zip(report.strands, dna_structure.strands):
+        temperatures = [domain.melting_temperature() for domain in strand.domain_list]
+        temperatures = [temperature for temperature in temperatures if temperature > -500.0]
+        assert row['id'] == strand.id
+        assert row['num_domains'] == len(strand.domain_list)
+        assert row['min_melting_temperature'] == pytest.approx(min(temperatures))
+
+    file_name = str(tmpdir.join("strands.csv"))
+    report.write_csv(file_name)
+    data = numpy.genfromtxt(file_name, delimiter=',', names=True)
+    assert data['longest_stable_domain'].tolist() == report.strands['longest_stable_domain'].tolist()
+
+
+def test_atomic_coordinates():
+    """ The atomic structure coordinates must be those of the molecule atoms. """
+    converter = Converter()
+    converter.read_cadnano_file(os.path.join(samples_path, "fourhelix.json"), None, "M13mp18")
+    atomic_structure = AtomicStructure(converter.dna_structure)
+    coords = atomic_structure.coordinates()
+    molecules = atomic_structure.generate_structure_ss()
+    assert coords.tolist() == [atom.coords.tolist() for molecule in molecules for atom in molecule.atoms]
+
+    xmin, xmax, ymin, ymax, zmin, zmax = atomic_structure.get_extent()
+    assert [xmin, ymin, zmin] == coords.min(axis=0).tolist()
+    assert [xmax, ymax, zmax] == coords.max(axis=0).tolist()
+
+
+def test_streaming_writers(tmpdir, monkeypatch):
+    """ Streaming PDB and CIF files must store the same atoms as files written from the whole atom table. """
+    # Generate the atoms in several chunks.
+    monkeypatch.setattr(AtomicStructure, 'generate_atom_tables',
+                        functools.partialmethod(AtomicStructure.generate_atom_tables, max_chunk_bases=50))
+    filename = os.path.join(samples_path, "fourhelix.json")
+    converter = Converter()
+    converter.read_cadnano_file(filename, None, "M13mp18")
+    dna_structure = converter.dna_structure
+
+    cif_files = []
+    for streaming in (False, True):
+        cif_file = str(tmpdir.join('streaming_%s.cif' % streaming))
+        CifWriter(dna_structure, streaming, AtomicStructure(dna_structure)).write(cif_file, filename, "cadnano")
+        cif_files.append(cif_file)
+    assert fast_hash_file(cif_files[0]) == fast_hash_file(cif_files[1])
+
+    # Streaming PDB coordinates are shifted by a bound on the extent rather than the extent.
+    atom_tables = []
+    for streaming in (False, True):
+        pdb_file = str(tmpdir.join('streaming_%s.pdb' % streaming))
+        PdbWriter(dna_structure, streaming, AtomicStructure(dna_structure)).write(pdb_file)
+        atom_tables.append(PdbAtomTableReader().read(pdb_file))
+    assert [model for model, _ in atom_tables[0]] == [model for model, _ in atom_tables[1]]
+    atomic_structure = AtomicStructure(dna_structure)
+    shift = numpy.array(atomic_structure.get_extent()[0::2]) - numpy.array(atomic_structure.get_extent_bound()[0::2])
+    assert (shift > 0).all()
+    for (_, table), (_, streaming_table) in zip(*atom_tables):
+        assert streaming_table.names.tolist() == table.names.tolist()
+        assert streaming_table.res_seq.tolist() == table.res_seq.tolist()
+        assert streaming_table.serial.tolist() == table.serial.tolist()
+        assert streaming_table.molecule_offsets.tolist() == table.molecule_offsets.tolist()
+        assert numpy.allclose(streaming_table.coords - shift, table.coords, rtol=0.0, atol=2e-3)
+
+
+def test_atomic_workers():
+    """ The atoms generated using worker processes must be the same as those generated in one process. """
+    converter = Converter()
+    converter.read_cadnano_file(os.path.join(samples_path, "fourhelix.json"), None, "M13mp18")
+    atom_table = AtomicStructure(converter.dna_structure).get_atom_table()
+    worker_atom_table = AtomicStructure(converter.dna_structure, max_workers=2).get_atom_table()
+    assert worker_atom_table.coords.tobytes() == atom_table.coords.tobytes()
+    assert worker_atom_table.names.tolist() == atom_table.names.tolist()
+    assert worker_atom_table.res_seq.tolist() == atom_table.res_seq.tolist()
+    assert worker_atom_table.molecule_offsets.tolist() == atom_table.molecule_offsets.tolist()
+
+
+def test_atom_templates(tmpdir):
+    """ The base templates must be shared by all atomic structures and be the same when saved and loaded. """
+    converter = Converter()
+    converter.read_cadnano_file(os.path.join(samples_path, "fourhelix.json"), None, "M13mp18")
+    templates = AtomicStructure(converter.dna_structure)._get_templates()
+    assert templates is get_atom_templates()
+    assert templates is AtomicStructure(converter.dna_structure)._get_templates()
+
+    file_name = str(tmpdir.join("atom_templates.npz"))
+    templates.save(file_name)
+    loaded_templates = AtomTemplates.load(file_name)
+    assert loaded_templates.coords.tobytes() == templates.coords.tobytes()
+    assert loaded_templates.names.tolist() == templates.names.tolist()
+    assert loaded_templates.offsets.tolist() == templates.offsets.tolist()
+
+
+def test_pdb_atom_table_reader(tmpdir):
+    """ The atoms read into atom tables must be those read as Atom objects, split into models and molecules. """
+    converter = Converter()
+    converter.infile = os.path.join(samples_path, "fourhelix.json")
+    converter.read_cadnano_file(converter.infile, None, "M13mp18")
+    file_name = str(tmpdir.join("fourhelix.pdb"))
+    converter.write_pdb_file(file_name)
+
+    reader = PdbReader()
+    reader.read(file_name)
+    atoms = reader.molecules[0].atoms
+    tables = PdbAtomTableReader().read(file_name)
+    assert [model_num for model_num, _ in tables] == [1]
+    atom_table = tables[0][1]
+    assert len(atom_table.molecule_ids) == len(converter.dna_structure.strands)
+    assert atom_table.names.tolist() == [atom.name for atom in atoms]
+    assert atom_table.serial.tolist() == [atom.id for atom in atoms]
+    assert atom_table.coords.tolist() == [atom.coords.tolist() for atom in atoms]
+
+    # Chunks must give the same atoms, with molecules split between chunks keeping their IDs.
+    chunks = list(PdbAtomTableReader(chunk_bytes=10000).read_chunks(file_name))
+    assert len(chunks) > 1
+    assert numpy.concatenate([table.coords for _, table in chunks]).tolist() == atom_table.coords.tolist()
+    assert ([table.molecule_ids[index] for _, table in chunks for index in table.chain_index.tolist()] ==
+            [atom_table.molecule_ids[index] for index in atom_table.chain_index.tolist()])
+
+    file_name = str(tmpdir.join("models.pdb"))
+    with open(file_name, "w") as pdb_file:
+        pdb_file.write("MODEL        1\n"
+                       "ATOM      1  P    DA A   1       1.000   2.000   3.000  1.00  0.00           P\n"
+                       "ATOM      2  P    DA B   2       4.000   5.000   6.000\n"
+                       "TER\n"
+                       "HETATM    3  O   HOH B   3       7.000   8.000   9.000  1.00  0.00           O  \n"
+                       "ENDMDL\n"
+                       "MODEL        2\n"
+                       "ATOM      1  P    DA A   1      -1.000  -2.000  -3.000  1.00  0.00           P  \n"
+                       "ENDMDL\n")
+    tables = PdbAtomTableReader().read(file_name)
+    assert [model_num for model_num, _ in tables] == [1, 2]
+    assert tables[0][1].chain_ids == ['A', 'B', 'B']
+    assert tables[0][1].molecule_ids == [1, 2, 3]
+    assert tables[0][1].res_names.tolist() == ['DA', 'DA', 'HOH']
+    assert tables[0][1].elements.tolist() == ['P', '', 'O']
+    assert tables[1][1].coords.tolist() == [[-1.0, -2.0, -3.0]]
+
+    # Residue sequence numbers of more than 4 digits are hybrid-36 encoded or not written.
+    file_name = str(tmpdir.join("residues.pdb"))
+    res_seq_fields = ["9999", "A000", "A001", "ZZZZ", "a000", "    ", "****"]
+    with open(file_name, "w") as pdb_file:
+        for serial, res_seq_field in enumerate(res_seq_fields):
+            pdb_file.write("ATOM  %5d  P    DA A%s       1.000   2.000   3.000  1.00  0.00           P\n" %
+                           (serial + 1, res_seq_field))
+    atom_table = PdbAtomTableReader().read(file_name)[0][1]
+    assert atom_table.res_seq.tolist() == [9999, 10000, 10001, 1223055, 1223056, 0, 0]
+    assert atom_table.serial.tolist() == list(range(1, len(res_seq_fields) + 1))
+
+
 def test_show_hashes(capsys):
     """This is a dummy test that should be run last. It will always fail, and will
 show hash information in the stdout section of its failure report."""